@@ -1,3 +1,4 @@
+import os
 from fastapi import FastAPI, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
@@ -85,5 +86,5 @@ def get_image(input: MediaInput, current_user: models.User = Depends(auth.get_cu
 # Video Generator
 @app.post("/generate_video", response_model=MediaOutput)
 def get_video(input: MediaInput, current_user: models.User = Depends(auth.get_current_user)):
-    path = generate_post_video(input.image_url, input.caption)
-    return {"video_url": f"/generated/{path}"}
+    path = generate_post_video(input.image_url, input.caption)  # generated/videos/<hash>.mp4
+    return {"video_url": "/" + path.replace(os.sep, "/")}
@@ -1,20 +1,91 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 
 # Βασικός φάκελος backend
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Σωστό path για τη βάση δεδομένων SQLite
-DATABASE_URL = f"sqlite:///{os.path.join(BASE_DIR, 'database.db')}"
+# Σωστό path για τη βάση δεδομένων SQLite (default).
+# Με DATABASE_URL=postgresql+psycopg://... τρέχουμε σε PostgreSQL (πολλοί workers/nodes).
+DATABASE_URL = os.getenv("DATABASE_URL") or f"sqlite:///{os.path.join(BASE_DIR, 'database.db')}"
+# Προαιρετικά replica για τα GET endpoints· αλλιώς το ίδιο URL
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL") or DATABASE_URL
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Απαραίτητο για SQLite με FastAPI και SQLAlchemy
-)
+# Pragmas ανά νέο SQLite connection: WAL ώστε οι readers να μην μπλοκάρουν από commits/syncs
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.getenv("DB_CACHE_SIZE", "-65536")),  # αρνητικό = KiB (64MB)
+    "temp_store": "MEMORY",
+}
+
+WRITE_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "10"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def engine_options(url: str, *, pool_size: int = 5, max_overflow: int = MAX_OVERFLOW,
+                   pool_timeout: float = POOL_TIMEOUT) -> dict:
+    """Dialect-aware kwargs για create_engine (κοινά για database.db και engine.db)."""
+    opts = {"pool_size": pool_size, "max_overflow": max_overflow, "pool_timeout": pool_timeout}
+    if is_sqlite(url):
+        opts["connect_args"] = {"check_same_thread": False}  # Απαραίτητο για SQLite με FastAPI και SQLAlchemy
+    else:
+        # Server DB: ελέγχουμε connections που έκλεισε ο server/PgBouncer πριν τα δώσουμε
+        opts["pool_pre_ping"] = True
+        opts["pool_recycle"] = POOL_RECYCLE
+    return opts
+
+
+def apply_sqlite_pragmas(dbapi_conn, pragmas: dict) -> None:
+    cur = dbapi_conn.cursor()
+    try:
+        for name, value in pragmas.items():
+            cur.execute(f"PRAGMA {name}={value}")
+    finally:
+        cur.close()
+
+
+def make_engine(url: str, *, read_only: bool = False, pool_size: int = 5,
+                max_overflow: int = MAX_OVERFLOW, pragmas: dict | None = None):
+    """
+    Engine για SQLite ή server DB. Με read_only=True: στο SQLite κάθε connection γίνεται
+    query_only, στο PostgreSQL οι συναλλαγές ανοίγουν READ ONLY. Έτσι το pool αυτό
+    δεν μπορεί να κρατήσει write lock κατά λάθος.
+    """
+    eng = create_engine(url, **engine_options(url, pool_size=pool_size, max_overflow=max_overflow))
+    if not is_sqlite(url):
+        if read_only and eng.dialect.name == "postgresql":
+            eng = eng.execution_options(postgresql_readonly=True)
+        return eng
+
+    pragmas = dict(SQLITE_PRAGMAS if pragmas is None else pragmas)
+    if read_only:
+        pragmas["query_only"] = "ON"
+
+    @event.listens_for(eng, "connect")
+    def _on_connect(dbapi_conn, conn_record):
+        apply_sqlite_pragmas(dbapi_conn, pragmas)
+
+    return eng
+
+
+engine = make_engine(DATABASE_URL, pool_size=WRITE_POOL_SIZE)
+# Ξεχωριστό pool μόνο για ανάγνωση (GET endpoints: /me/posts, /me/credits, ...)
+read_engine = make_engine(DATABASE_READ_URL, read_only=True, pool_size=READ_POOL_SIZE)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 # Dependency για να παίρνουμε τη DB session στα FastAPI endpoints
@@ -24,3 +95,11 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency για read-only endpoints (δεν κάνουν ποτέ commit)
+def get_read_db():
+    db: Session = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,27 +1,35 @@
 
-from moviepy.editor import ImageClip, TextClip, CompositeVideoClip
-from PIL import Image
 import os
 
-def generate_promo_video(product_image, title, description, logo_path, cta_text, output_path, hashtags):
-    # Load product image and resize
-    background = ImageClip(product_image).resize(height=720)
+from PIL import Image, ImageDraw
+
+from production_engine.services.greek_text_renderer import load_font, render_text_block
+from production_engine.services.video_renderer import encode_still, fit_height
+
+PROMO_SECONDS = 6
 
-    # Logo
-    logo = ImageClip(logo_path).resize(height=100).set_position(("right", "top")).set_duration(6)
 
-    # Title
-    title_txt = TextClip(title, fontsize=60, color='white', font='DejaVu-Bold')
-    title_txt = title_txt.set_position(("center", 100)).set_duration(6)
+def _centered(draw, y, text, font, width, fill):
+    render_text_block(draw, (0, y), text, font, fill=fill, max_width=width, align="center", stroke_width=0)
+
+
+def generate_promo_video(product_image, title, description, logo_path, cta_text, output_path, hashtags):
+    # Load product image and resize (ο καμβάς έχει το μέγεθος της εικόνας, όπως πριν)
+    with Image.open(product_image) as im:
+        frame = fit_height(im, 720).convert("RGB")
+    draw = ImageDraw.Draw(frame)
+    W = frame.width
 
-    # Description
-    desc_txt = TextClip(description, fontsize=35, color='white', font='DejaVu-Sans')
-    desc_txt = desc_txt.set_position(("center", 200)).set_duration(6)
+    # Logo (πάνω δεξιά)
+    if logo_path and os.path.isfile(logo_path):
+        with Image.open(logo_path) as lg:
+            logo = fit_height(lg.convert("RGBA"), 100)
+        frame.paste(logo, (W - logo.width, 0), logo)
 
-    # CTA + Hashtags
-    cta_txt = TextClip(f"{cta_text}\n{hashtags}", fontsize=30, color='yellow', font='DejaVu-Sans')
-    cta_txt = cta_txt.set_position(("center", 550)).set_duration(6)
+    # Title / Description / CTA + Hashtags
+    _centered(draw, 100, title, load_font(60, bold=True), W, (255, 255, 255))
+    _centered(draw, 200, description, load_font(35), W, (255, 255, 255))
+    _centered(draw, 550, f"{cta_text}\n{hashtags}", load_font(30), W, (255, 255, 0))
 
-    # Combine
-    video = CompositeVideoClip([background.set_duration(6), logo, title_txt, desc_txt, cta_txt])
-    video.write_videofile(output_path, fps=24)
+    # Ένα frame -> ffmpeg loop για όλη τη διάρκεια
+    encode_still(frame, output_path, duration=PROMO_SECONDS, fps=24)
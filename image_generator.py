@@ -2,12 +2,24 @@
 
 from PIL import Image, ImageDraw, ImageFont
 import requests
-from BytesIO
+from io import BytesIO
 import os
 
+from services.image_mirror import local_original, schedule_mirror
+
+def _open_product_image(image_url):
+    # Τοπικό mirror πρώτα· σε miss κατεβάζουμε και βάζουμε το url στην ουρά του mirror
+    path = local_original(image_url)
+    if path:
+        schedule_mirror([image_url])  # revalidation σε background μόνο αν είναι stale
+        return Image.open(path)
+    response = requests.get(image_url, timeout=10)
+    response.raise_for_status()
+    schedule_mirror([image_url])
+    return Image.open(BytesIO(response.content))
+
 def generate_post_image(image_url, caption, output_path='static/post_image.jpg'):
-    response = requests.get(image_url)
-    image = Image.open(BytesIO(response.content)).convert("RGB")
+    image = _open_product_image(image_url).convert("RGB")
     image = image.resize((800, 800))  # Τετράγωνο Instagram-style
 
     draw = ImageDraw.Draw(image)
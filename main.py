@@ -5,7 +5,11 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from importlib import import_module
 
+from production_engine.tracing import TracingMiddleware
+
 app = FastAPI(title="Autoposter AI")
+# Server-Timing ανά request + histograms για το /metrics (βλ. production_engine/tracing.py)
+app.add_middleware(TracingMiddleware)
 
 # Static & Templates
 app.mount("/static", StaticFiles(directory="production_engine/static"), name="static")
@@ -54,7 +58,7 @@ seen: set[int] = set()
 # modules που μας νοιάζουν
 modules = (
     "auth", "users", "me", "tengine", "dashboard", "templates",
-    "products", "posts", "sync", "mock_woocommerce",
+    "products", "posts", "sync", "mock_woocommerce", "previews", "jobs", "ads", "metrics",
 )
 
 # ψάξε πρώτα στο παλιό namespace
@@ -69,3 +73,17 @@ for name in modules:
 @app.get("/healthz", include_in_schema=False)
 async def healthz():
     return {"ok": True}
+
+# TEMPLATE_PRELOAD=1: τα template bitmaps φορτώνονται πριν από το 1ο request μετά το deploy
+@app.on_event("startup")
+def check_engine_schema():
+    # το DDL τρέχει από το tools/migrate.py· εδώ μόνο έλεγχος, όχι σε κάθε worker process
+    from production_engine.engine_database import require_schema
+    require_schema()
+
+
+@app.on_event("startup")
+def preload_render_assets():
+    from services import image_generation
+    if image_generation.TEMPLATE_PRELOAD:
+        image_generation.preload_templates()
@@ -23,6 +23,14 @@ import models.credit_transaction
 config = context.config
 fileConfig(config.config_file_name)
 
+# DATABASE_URL (ίδιο env με το database.py) υπερισχύει του alembic.ini
+_env_url = os.getenv("DATABASE_URL")
+if _env_url:
+    config.set_main_option("sqlalchemy.url", _env_url.replace("%", "%%"))
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
 target_metadata = Base.metadata
 
 def run_migrations_offline():
@@ -32,6 +40,7 @@ def run_migrations_offline():
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        render_as_batch=_is_sqlite(url),  # SQLite: ALTER μέσω batch (copy table)
     )
 
     with context.begin_transaction():
@@ -45,7 +54,11 @@ def run_migrations_online():
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
 
         with context.begin_transaction():
             context.run_migrations()
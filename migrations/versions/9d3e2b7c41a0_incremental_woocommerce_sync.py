@@ -0,0 +1,38 @@
+"""incremental woocommerce sync: products.external_id, users sync marks
+
+Revision ID: 9d3e2b7c41a0
+Revises: 5c12beb4fbaf
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3e2b7c41a0'
+down_revision: Union[str, Sequence[str], None] = '5c12beb4fbaf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('products') as batch:
+        batch.add_column(sa.Column('external_id', sa.String(), nullable=True))
+        batch.create_index('ux_products_owner_external', ['owner_id', 'external_id'], unique=True)
+    with op.batch_alter_table('users') as batch:
+        batch.add_column(sa.Column('woocommerce_synced_at', sa.DateTime(), nullable=True))
+        batch.add_column(sa.Column('woocommerce_checked_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('users') as batch:
+        batch.drop_column('woocommerce_checked_at')
+        batch.drop_column('woocommerce_synced_at')
+    with op.batch_alter_table('products') as batch:
+        batch.drop_index('ux_products_owner_external')
+        batch.drop_column('external_id')
@@ -0,0 +1,35 @@
+"""normalise backfilled posts.created_at to SQLAlchemy's SQLite format
+
+Revision ID: a8d35f1e7c62
+Revises: e5a71c3d9b40
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d35f1e7c62'
+down_revision: Union[str, Sequence[str], None] = 'e5a71c3d9b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Στο SQLite το DateTime είναι TEXT και το SQLAlchemy γράφει/δένει 'YYYY-MM-DD HH:MM:SS.ffffff'.
+    # Το backfill του e5a71c3d9b40 (CURRENT_TIMESTAMP) έγραψε 'YYYY-MM-DD HH:MM:SS', οπότε στο
+    # keyset του /me/posts η σύγκριση κειμένου έβγαζε τα ίδια rows ξανά. Idempotent.
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute(sa.text(
+            "UPDATE posts SET created_at = created_at || '.000000' "
+            "WHERE created_at IS NOT NULL AND length(created_at) = 19"
+        ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    pass
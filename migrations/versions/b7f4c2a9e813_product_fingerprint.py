@@ -0,0 +1,70 @@
+"""product fingerprint + updated_at for change detection
+
+Revision ID: b7f4c2a9e813
+Revises: 9d3e2b7c41a0
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+import hashlib
+import json
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7f4c2a9e813'
+down_revision: Union[str, Sequence[str], None] = '9d3e2b7c41a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH = 1000
+
+# Αντίγραφο του models.product.product_fingerprint όπως ήταν σε αυτή την revision: η migration
+# δεν εισάγει application code, που μπορεί να αλλάξει (ή να μη φορτώνει) σε μελλοντικό upgrade.
+FINGERPRINT_FIELDS = ("name", "description", "price", "image_url", "categories")
+
+
+def _fingerprint(row) -> str:
+    payload = json.dumps([row.get(f) or "" for f in FINGERPRINT_FIELDS], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('products') as batch:
+        batch.add_column(sa.Column('fingerprint', sa.String(length=64), nullable=True))
+        batch.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch.create_index('ix_products_owner_updated', ['owner_id', 'updated_at'])
+
+    # Backfill σε batches (id-ordered), ώστε το 1ο sync μετά το upgrade να μη "βλέπει" αλλαγές
+    bind = op.get_bind()
+    products = sa.table(
+        'products', sa.column('id', sa.Integer), sa.column('name'), sa.column('description'),
+        sa.column('price'), sa.column('image_url'), sa.column('categories'),
+        sa.column('fingerprint'), sa.column('updated_at'),
+    )
+    now = datetime.utcnow()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(products).where(products.c.id > last_id).order_by(products.c.id).limit(BATCH)
+        ).mappings().all()
+        if not rows:
+            break
+        bind.execute(
+            products.update().where(products.c.id == sa.bindparam('pid'))
+            .values(fingerprint=sa.bindparam('fp'), updated_at=sa.bindparam('ts')),
+            [{"pid": r["id"], "fp": _fingerprint(r), "ts": now} for r in rows],
+        )
+        last_id = rows[-1]["id"]
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('products') as batch:
+        batch.drop_index('ix_products_owner_updated')
+        batch.drop_column('updated_at')
+        batch.drop_column('fingerprint')
@@ -0,0 +1,28 @@
+"""composite index products(owner_id, id) for keyset listing
+
+Revision ID: d41e8f0a6c25
+Revises: b7f4c2a9e813
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41e8f0a6c25'
+down_revision: Union[str, Sequence[str], None] = 'b7f4c2a9e813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_products_owner_id_id', 'products', ['owner_id', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_owner_id_id', table_name='products')
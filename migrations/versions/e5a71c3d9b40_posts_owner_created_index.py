@@ -0,0 +1,30 @@
+"""composite index posts(owner_id, created_at, id) for cursor listing
+
+Revision ID: e5a71c3d9b40
+Revises: d41e8f0a6c25
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a71c3d9b40'
+down_revision: Union[str, Sequence[str], None] = 'd41e8f0a6c25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Το cursor (created_at, id) θέλει created_at σε κάθε row
+    op.execute(sa.text("UPDATE posts SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL"))
+    op.create_index('ix_posts_owner_created_id', 'posts', ['owner_id', 'created_at', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_owner_created_id', table_name='posts')
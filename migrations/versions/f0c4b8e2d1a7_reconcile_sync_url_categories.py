@@ -0,0 +1,45 @@
+"""reconcile users.sync_url / products.categories, SQLite-safe
+
+Revision ID: f0c4b8e2d1a7
+Revises: a8d35f1e7c62
+Create Date: 2026-10-19 19:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f0c4b8e2d1a7'
+down_revision: Union[str, Sequence[str], None] = 'a8d35f1e7c62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Τα παλιά revisions (7b1f8f2d6bab, a3a99caac34d, 58507c8497ff, c010d718cfd6) προσθέτουν τις ίδιες
+# στήλες περισσότερες από μία φορές, οπότε οι βάσεις έφτασαν εδώ με διαφορετικούς δρόμους
+# (create_all, stamp, χειροκίνητα ALTER). Εδώ εξασφαλίζεται ότι υπάρχουν, μέσω batch ώστε να
+# δουλεύει και σε SQLite. Νέες βάσεις φτιάχνονται με tools/migrate.py (create_all + stamp head).
+COLUMNS = (
+    ('users', 'sync_url'),
+    ('products', 'categories'),
+)
+
+
+def _columns(table: str) -> set:
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in COLUMNS:
+        if column not in _columns(table):
+            with op.batch_alter_table(table) as batch:
+                batch.add_column(sa.Column(column, sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Οι στήλες ανήκουν στα αρχικά revisions· εκείνα τις αφαιρούν στο δικό τους downgrade
+    pass
@@ -1,5 +1,7 @@
 import enum
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Text
+import json
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Text, Index
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -9,6 +11,28 @@ try:
 except ImportError:
     from backend.database import Base
 
+class JSONList(TypeDecorator):
+    """
+    Λίστα (π.χ. media URLs) αποθηκευμένη ως JSON text. Δέχεται list ή έτοιμο JSON string
+    (παλιοί callers με json.dumps) και επιστρέφει πάντα list.
+    """
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, str):
+            return value
+        return json.dumps(list(value))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return []
+        try:
+            v = json.loads(value)
+        except ValueError:
+            return [value]
+        return v if isinstance(v, list) else [v]
+
 class PostTypeEnum(enum.Enum):
     image = "image"
     carousel = "carousel"
@@ -33,9 +57,14 @@ class Post(Base):
     type = Column(Enum(PostTypeEnum), nullable=False, default=PostTypeEnum.image)
     suggested_type = Column(Enum(PostTypeEnum), nullable=True)
     status = Column(Enum(PostStatusEnum), default=PostStatusEnum.pending)
-    media_urls = Column(Text, nullable=True)  # π.χ. JSON string με URLs
+    media_urls = Column(JSONList, nullable=True)  # λίστα URLs (JSON text στη βάση)
 
     created_at = Column(DateTime, default=datetime.utcnow)
 
     owner = relationship("User", back_populates="posts", foreign_keys=[owner_id])
     product = relationship("Product", back_populates="posts")
+
+    __table_args__ = (
+        # /me/posts: keyset σε (created_at, id) ανά χρήστη
+        Index("ix_posts_owner_created_id", "owner_id", "created_at", "id"),
+    )
@@ -1,4 +1,8 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+import hashlib
+import json
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index, DateTime, event
 from sqlalchemy.orm import relationship
 
 try:
@@ -6,6 +10,15 @@ try:
 except ImportError:
     from backend.database import Base
 
+# Πεδία που μετράνε ως "αλλαγή περιεχομένου" (ό,τι φαίνεται σε ένα render)
+FINGERPRINT_FIELDS = ("name", "description", "price", "image_url", "categories")
+
+def product_fingerprint(values) -> str:
+    """sha256 των FINGERPRINT_FIELDS (dict ή Product)· None και "" θεωρούνται ίδια."""
+    get = values.get if isinstance(values, dict) else lambda f: getattr(values, f, None)
+    payload = json.dumps([get(f) or "" for f in FINGERPRINT_FIELDS], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
 class Product(Base):
     __tablename__ = "products"
 
@@ -19,5 +32,27 @@ class Product(Base):
 
     price = Column(String, nullable=True)  # <-- Προσθήκη πεδίου τιμής
 
+    # id του προϊόντος στο eShop (WooCommerce): κλειδί για upsert/incremental sync
+    external_id = Column(String, nullable=True)
+
+    # Change detection: hash περιεχομένου και πότε άλλαξε τελευταία (όχι σε κάθε sync)
+    fingerprint = Column(String(64), nullable=True)
+    updated_at = Column(DateTime, nullable=True, default=datetime.utcnow)
+
     owner = relationship("User", back_populates="products")
     posts = relationship("Post", back_populates="product", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index("ux_products_owner_external", "owner_id", "external_id", unique=True),
+        Index("ix_products_owner_updated", "owner_id", "updated_at"),
+        Index("ix_products_owner_id_id", "owner_id", "id"),  # keyset listing ανά χρήστη
+    )
+
+# Για αλλαγές μέσω ORM objects (το bulk sync υπολογίζει μόνο του το fingerprint)
+@event.listens_for(Product, "before_insert")
+@event.listens_for(Product, "before_update")
+def _refresh_fingerprint(mapper, connection, target: Product):
+    fp = product_fingerprint(target)
+    if fp != target.fingerprint:
+        target.fingerprint = fp
+        target.updated_at = datetime.utcnow()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text
+from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime
 from sqlalchemy.orm import relationship
 
 from database import Base
@@ -20,6 +20,11 @@ class User(Base):
     
     sync_url = Column(String, nullable=True)  # <-- Πρόσθεσε αυτό το πεδίο
 
+    # Incremental WooCommerce sync: high-water mark (date_modified_gmt του eShop)
+    # και πότε έγινε τελευταία ο έλεγχος διαγραφών (ID-only pass)
+    woocommerce_synced_at = Column(DateTime, nullable=True)
+    woocommerce_checked_at = Column(DateTime, nullable=True)
+
     credits = Column(Integer, default=10)
 
     products = relationship("Product", back_populates="owner", cascade="all, delete-orphan")
@@ -0,0 +1,201 @@
+"""
+Data migrations για το engine.db (rewrites δεδομένων, όχι schema).
+
+Κάθε migration διαβάζει τον πίνακα σε chunks με keyset (id > last_id ORDER BY id), γράφει τις
+αλλαγές του chunk με executemany και αποθηκεύει το checkpoint (pe_data_migrations) στο ΙΔΙΟ
+transaction: μετά από crash/Ctrl-C συνεχίζει από το τελευταίο ολοκληρωμένο chunk.
+Το throttling (sleep ανάμεσα στα chunks + μικρότερα chunks όταν ένα transaction ξεπερνά το
+max_batch_ms) κρατάει σύντομα τα write locks, ώστε ο server να δουλεύει κανονικά στο μεταξύ.
+
+    class MyMigration(DataMigration):
+        name = "my_migration"
+        table = committed_posts_table
+        columns = ("urls_json",)
+        def transform(self, row): return {"urls_json": ...} or None
+
+    run_migration(MyMigration(), batch_size=1000, sleep=0.05)
+"""
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import Table, bindparam, insert, select, update
+
+from production_engine.engine_database import engine as default_engine, pe_data_migrations_table
+
+MIN_BATCH_SIZE = 50
+
+
+class DataMigration(ABC):
+    """Βάση για migrations: ορίζεις name/table/columns και transform()."""
+
+    name: str = ""
+    table: Table = None
+    columns: tuple = ()
+
+    @abstractmethod
+    def transform(self, row) -> Optional[dict]:
+        """Νέες τιμές {στήλη: τιμή} για το row, ή None αν δεν αλλάζει."""
+
+
+def get_checkpoint(name: str, engine=default_engine) -> Optional[dict]:
+    t = pe_data_migrations_table
+    with engine.connect() as conn:
+        row = conn.execute(select(t).where(t.c.name == name)).mappings().first()
+    return dict(row) if row else None
+
+
+def reset_checkpoint(name: str, engine=default_engine) -> None:
+    t = pe_data_migrations_table
+    with engine.begin() as conn:
+        conn.execute(t.delete().where(t.c.name == name))
+
+
+def _save_checkpoint(conn, name: str, exists: bool, **values) -> None:
+    t = pe_data_migrations_table
+    values["updated_at"] = datetime.utcnow()
+    if exists:
+        conn.execute(update(t).where(t.c.name == name).values(**values))
+    else:
+        conn.execute(insert(t).values(name=name, started_at=values["updated_at"], **values))
+
+
+def _write_changes(conn, table: Table, changes: list[dict]) -> None:
+    # executemany ανά σύνολο στηλών (συνήθως ένα)
+    by_cols: dict[tuple, list] = {}
+    for ch in changes:
+        by_cols.setdefault(tuple(sorted(k for k in ch if k != "_id")), []).append(ch)
+    for cols, rows in by_cols.items():
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("_id"))
+            .values({c: bindparam(f"_v_{c}") for c in cols})
+        )
+        conn.execute(stmt, [{"_id": r["_id"], **{f"_v_{c}": r[c] for c in cols}} for r in rows])
+
+
+def run_migration(
+    migration: DataMigration,
+    *,
+    batch_size: int = 1000,
+    sleep: float = 0.0,
+    max_batch_ms: Optional[float] = None,
+    dry_run: bool = False,
+    restart: bool = False,
+    engine=None,
+    on_progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Τρέχει (ή συνεχίζει) το migration μέχρι το τέλος του πίνακα.
+    - sleep: δευτερόλεπτα παύσης μετά από κάθε chunk
+    - max_batch_ms: αν ένα chunk κρατήσει περισσότερο, το επόμενο γίνεται μισό (όχι κάτω από
+      MIN_BATCH_SIZE)· όταν είναι γρήγορο ξαναμεγαλώνει ως το batch_size
+    - dry_run: μόνο μετράει, δεν γράφει ούτε δεδομένα ούτε checkpoint
+    - restart: ξεκινά από την αρχή (σβήνει το checkpoint)
+    Ένα τελειωμένο migration που ξανατρέχει επεξεργάζεται μόνο rows με id > last_id.
+    """
+    engine = engine or default_engine
+    name, table = migration.name, migration.table
+    assert name and table is not None, "DataMigration needs name and table"
+    if restart and not dry_run:
+        reset_checkpoint(name, engine)
+    cp = None if restart else get_checkpoint(name, engine)
+    last_id = cp["last_id"] if cp else 0
+    rows_seen = cp["rows_seen"] if cp else 0
+    rows_changed = cp["rows_changed"] if cp else 0
+    exists = cp is not None
+
+    cols = [table.c.id, *(table.c[c] for c in migration.columns)]
+    size = max(MIN_BATCH_SIZE, batch_size)
+    run_rows = run_changed = chunks = 0
+    t0 = time.perf_counter()
+    while True:
+        tb = time.perf_counter()
+        with engine.begin() as conn:
+            batch = conn.execute(
+                select(*cols).where(table.c.id > last_id).order_by(table.c.id).limit(size)
+            ).all()
+            if not batch:
+                if not dry_run:
+                    _save_checkpoint(conn, name, exists, last_id=last_id, rows_seen=rows_seen,
+                                     rows_changed=rows_changed, finished_at=datetime.utcnow())
+                break
+            changes = []
+            for row in batch:
+                new = migration.transform(row)
+                if new:
+                    changes.append({"_id": row.id, **new})
+            if not dry_run:
+                if changes:
+                    _write_changes(conn, table, changes)
+                _save_checkpoint(conn, name, exists, last_id=batch[-1].id, rows_seen=rows_seen + len(batch),
+                                 rows_changed=rows_changed + len(changes), finished_at=None)
+                exists = True
+        batch_ms = (time.perf_counter() - tb) * 1000
+        last_id = batch[-1].id
+        chunks += 1
+        rows_seen += len(batch)
+        rows_changed += len(changes)
+        run_rows += len(batch)
+        run_changed += len(changes)
+
+        if on_progress is not None:
+            elapsed = time.perf_counter() - t0
+            on_progress({
+                "last_id": last_id, "rows": run_rows, "changed": run_changed, "batch_size": size,
+                "batch_ms": round(batch_ms, 1), "rows_per_s": round(run_rows / elapsed, 1) if elapsed else None,
+            })
+        if max_batch_ms:
+            if batch_ms > max_batch_ms:
+                size = max(MIN_BATCH_SIZE, size // 2)
+            elif batch_ms < max_batch_ms / 4:
+                size = min(max(MIN_BATCH_SIZE, batch_size), size * 2)
+        if sleep > 0:
+            time.sleep(sleep)
+
+    elapsed = time.perf_counter() - t0
+    return {
+        "name": name,
+        "rows": run_rows,
+        "changed": run_changed,
+        "chunks": chunks,
+        "last_id": last_id,
+        "resumed": bool(cp) and not restart,
+        "total_rows": rows_seen,
+        "total_changed": rows_changed,
+        "dry_run": dry_run,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(run_rows / elapsed, 1) if elapsed else None,
+    }
+
+
+def add_cli_args(parser) -> None:
+    """Κοινά flags για τα tools/ που τρέχουν data migrations."""
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--sleep", type=float, default=0.0, help="παύση (sec) μετά από κάθε chunk")
+    parser.add_argument("--max-batch-ms", type=float, default=None,
+                        help="μικραίνει τα chunks όταν ένα transaction ξεπερνά αυτό το όριο")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--restart", action="store_true", help="αγνοεί το checkpoint, ξεκινά από id 0")
+    parser.add_argument("--quiet", action="store_true")
+
+
+def run_from_args(migration: DataMigration, args) -> dict:
+    def progress(p: dict) -> None:
+        print(f"  ..id<={p['last_id']} rows={p['rows']} changed={p['changed']} "
+              f"batch={p['batch_size']} ({p['batch_ms']}ms) {p['rows_per_s']} rows/s", flush=True)
+
+    res = run_migration(
+        migration,
+        batch_size=args.batch_size,
+        sleep=args.sleep,
+        max_batch_ms=args.max_batch_ms,
+        dry_run=args.dry_run,
+        restart=args.restart,
+        on_progress=None if args.quiet else progress,
+    )
+    print(f"{res['name']}: rows={res['rows']} changed={res['changed']} chunks={res['chunks']} "
+          f"last_id={res['last_id']} resumed={res['resumed']} dry_run={res['dry_run']} "
+          f"elapsed={res['elapsed_s']}s ({res['rows_per_s']} rows/s)")
+    return res
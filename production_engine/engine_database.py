@@ -1,13 +1,154 @@
-from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String, DateTime, Text
+"""
+Ένα και μοναδικό engine/pool για το production_engine/engine.db.
+Όλοι (previews, templates_engine, models) παίρνουν engine + πίνακες από εδώ,
+ώστε readers και writers να μοιράζονται το ίδιο pool και τα ίδια pragmas.
+"""
+import os, time, threading
+
+from sqlalchemy import (
+    create_engine, event, MetaData, Table, Column, Integer, Float, String, DateTime, Text, Index,
+    select, insert, update, delete, func, or_, inspect, text,
+)
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import QueuePool
+from datetime import datetime
+
+from database import apply_sqlite_pragmas, engine_options, is_sqlite
+
+PE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(PE_DIR, "engine.db")
+# ENGINE_DATABASE_URL=postgresql+psycopg://... για κοινή βάση μεταξύ workers/nodes
+DATABASE_URL = os.getenv("ENGINE_DATABASE_URL") or f"sqlite:///{DB_PATH}"
+
+# ---- Pool sizing (env overrides) ----
+POOL_SIZE = int(os.getenv("PE_DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("PE_DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("PE_DB_POOL_TIMEOUT", "30"))
+
+# ---- SQLite pragmas ανά νέο connection (μόνο όταν το backend είναι SQLite) ----
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("PE_DB_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("PE_DB_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.getenv("PE_DB_CACHE_SIZE", "-65536")),  # αρνητικό = KiB (64MB)
+}
+
+
+# ---- Pool metrics ----
+class PoolStats:
+    """Μετρητές για checkout/checkin του pool (thread-safe, φθηνοί)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.in_use = 0
+            self.max_in_use = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.hold_total = 0.0
+            self.hold_max = 0.0
+
+    def on_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def on_wait(self, seconds: float):
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def on_checkout(self):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+
+    def on_checkin(self, held: float | None):
+        with self._lock:
+            self.checkins += 1
+            self.in_use = max(0, self.in_use - 1)
+            if held is not None:
+                self.hold_total += held
+                self.hold_max = max(self.hold_max, held)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            n = self.checkouts or 1
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "in_use": self.in_use,
+                "max_in_use": self.max_in_use,
+                "wait_avg_ms": round(self.wait_total / n * 1000, 3),
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+                "hold_avg_ms": round(self.hold_total / n * 1000, 3),
+                "hold_max_ms": round(self.hold_max * 1000, 3),
+            }
+
+
+POOL_STATS = PoolStats()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool που μετρά πόσο περιμένει κάθε checkout για ελεύθερο connection."""
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_STATS.on_wait(time.perf_counter() - t0)
 
-DATABASE_URL = "sqlite:///production_engine/engine.db"
 
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False},
+    poolclass=TimedQueuePool,
     future=True,
+    **engine_options(DATABASE_URL, pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_timeout=POOL_TIMEOUT),
 )
 
+
+@event.listens_for(engine, "connect")
+def _on_connect(dbapi_conn, conn_record):
+    if is_sqlite(DATABASE_URL):
+        apply_sqlite_pragmas(dbapi_conn, SQLITE_PRAGMAS)
+    POOL_STATS.on_connect()
+
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_conn, conn_record, conn_proxy):
+    conn_record.info["checkout_ts"] = time.perf_counter()
+    POOL_STATS.on_checkout()
+
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_conn, conn_record):
+    ts = conn_record.info.pop("checkout_ts", None)
+    POOL_STATS.on_checkin(time.perf_counter() - ts if ts is not None else None)
+
+
+def pool_stats() -> dict:
+    out = POOL_STATS.snapshot()
+    out.update({
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "checked_out": engine.pool.checkedout(),
+        "overflow": engine.pool.overflow(),
+    })
+    return out
+
+
+# ORM Base για τα production_engine.models (ξεχωριστό metadata από τους Core πίνακες)
+Base = declarative_base()
+
 metadata = MetaData()
 
 committed_posts_table = Table(
@@ -15,8 +156,16 @@ committed_posts_table = Table(
     metadata,
     Column("id", Integer, primary_key=True, autoincrement=True),
     Column("preview_id", String(128), nullable=False),
-    Column("urls_json", Text, nullable=False),
+    Column("urls_json", Text, nullable=False),   # JSON λίστα ABS URLs (canonical, όπως επιστρέφονται)
     Column("created_at", DateTime, nullable=False),
+    Column("owner_id", Integer, nullable=True),   # users.id στη database.db· NULL = ανώνυμο/παλιό commit
+)
+
+# /previews/committed: keyset (id DESC) ανά χρήστη
+ix_committed_owner_id = Index(
+    "ix_committed_posts_owner_id",
+    committed_posts_table.c.owner_id,
+    committed_posts_table.c.id,
 )
 
 pe_templates_table = Table(
@@ -24,11 +173,11 @@ pe_templates_table = Table(
     metadata,
     Column("id", Integer, primary_key=True, autoincrement=True),
     Column("name", String(128), nullable=False),
-    Column("type", String(32), nullable=False),
-    Column("ratio", String(16), nullable=True),
-    Column("spec_json", Text, nullable=True),
+    Column("type", String(32), nullable=False),        # image|carousel|video
+    Column("ratio", String(16), nullable=True),        # e.g. "4:5", "1:1", "9:16"
+    Column("spec_json", Text, nullable=False),
     Column("thumb_url", String(512), nullable=True),
-    Column("created_at", DateTime, nullable=True),
+    Column("created_at", DateTime, nullable=True, default=datetime.utcnow),
 )
 
 pe_mapping_rules_table = Table(
@@ -36,8 +185,164 @@ pe_mapping_rules_table = Table(
     metadata,
     Column("id", Integer, primary_key=True, autoincrement=True),
     Column("category", String(128), nullable=False),
-    Column("post_type", String(32), nullable=False),
-    Column("mode", String(64), nullable=False),
+    Column("post_type", String(32), nullable=False),   # image|carousel|video
+    Column("mode", String(64), nullable=False),        # Κανονικό, κ.λπ.
     Column("template_id", Integer, nullable=False),
-    Column("created_at", DateTime, nullable=True),
+    Column("created_at", DateTime, nullable=True, default=datetime.utcnow),
 )
+
+# Ένας κανόνας ανά (category, post_type, mode) – το index καλύπτει και το lookup
+ux_mapping_rules = Index(
+    "ux_pe_mapping_rules_cat_type_mode",
+    pe_mapping_rules_table.c.category,
+    pe_mapping_rules_table.c.post_type,
+    pe_mapping_rules_table.c.mode,
+    unique=True,
+)
+
+# Checkpoints των data migrations (production_engine/data_migrations.py): μία γραμμή ανά migration
+pe_data_migrations_table = Table(
+    "pe_data_migrations",
+    metadata,
+    Column("name", String(128), primary_key=True),
+    Column("last_id", Integer, nullable=False, default=0),   # τελευταίο id που ολοκληρώθηκε
+    Column("rows_seen", Integer, nullable=False, default=0),
+    Column("rows_changed", Integer, nullable=False, default=0),
+    Column("started_at", DateTime, nullable=True),
+    Column("updated_at", DateTime, nullable=True),
+    Column("finished_at", DateTime, nullable=True),
+)
+
+# Ουρά render jobs (production_engine/jobs.py). priority: μικρότερο = νωρίτερα
+pe_jobs_table = Table(
+    "pe_jobs",
+    metadata,
+    Column("id", String(32), primary_key=True),           # uuid4 hex
+    Column("kind", String(64), nullable=False),
+    Column("owner_id", Integer, nullable=True),
+    Column("priority", Integer, nullable=False, default=5),
+    Column("status", String(16), nullable=False),         # queued|running|done|failed
+    Column("payload_json", Text, nullable=False),
+    Column("result_json", Text, nullable=True),
+    Column("progress_json", Text, nullable=True),         # πρόοδος που γράφει ο handler όσο τρέχει
+    Column("error", Text, nullable=True),
+    Column("attempts", Integer, nullable=False, default=0),
+    Column("max_attempts", Integer, nullable=False, default=3),
+    Column("run_after", DateTime, nullable=False),        # backoff μετά από αποτυχία
+    Column("locked_until", DateTime, nullable=True),      # visibility timeout του worker
+    Column("worker_id", String(64), nullable=True),
+    Column("created_at", DateTime, nullable=False),
+    Column("started_at", DateTime, nullable=True),
+    Column("finished_at", DateTime, nullable=True),
+    # ένα ενεργό job ανά key (π.χ. "sync:<user_id>")· γίνεται NULL όταν το job τελειώσει
+    Column("singleton_key", String(128), nullable=True),
+)
+
+# claim: επόμενο έτοιμο job ανά (status, priority, created_at)
+ix_pe_jobs_ready = Index(
+    "ix_pe_jobs_ready",
+    pe_jobs_table.c.status,
+    pe_jobs_table.c.priority,
+    pe_jobs_table.c.created_at,
+)
+
+# όριο ενεργών jobs ανά owner (count_active)
+ix_pe_jobs_owner = Index("ix_pe_jobs_owner_status", pe_jobs_table.c.owner_id, pe_jobs_table.c.status)
+
+# single-flight σε επίπεδο βάσης: τα NULL δεν συγκρούονται (SQLite και Postgres)
+ux_pe_jobs_singleton = Index("ux_pe_jobs_singleton_key", pe_jobs_table.c.singleton_key, unique=True)
+
+# Rate limiter (production_engine/ratelimit.py, backend "db"): GCRA, ένα TAT (epoch sec) ανά key
+pe_rate_limits_table = Table(
+    "pe_rate_limits",
+    metadata,
+    Column("key", String(191), primary_key=True),         # "<bucket>:<user_id>"
+    Column("tat", Float, nullable=False),                 # theoretical arrival time
+)
+
+# purge: ό,τι έχει tat < now είναι ήδη γεμάτο bucket (ισοδύναμο με απόν)
+ix_pe_rate_limits_tat = Index("ix_pe_rate_limits_tat", pe_rate_limits_table.c.tat)
+
+
+MAPPING_RULES_NORMALIZED = "mapping_rules_trim_dedupe"
+
+
+def _normalize_mapping_rules(conn):
+    """
+    One-off (γραμμή στο pe_data_migrations): το add_rule κάνει strip σε category/mode, οπότε
+    παλιοί κανόνες " Shoes" και "Shoes" είναι ο ίδιος κανόνας. Πρώτα dedupe στο trimmed κλειδί
+    (κρατάμε τον πιο πρόσφατο, μεγαλύτερο id) και μετά trim, ώστε να μη συγκρουστεί με το unique index.
+    """
+    m = pe_data_migrations_table
+    if conn.execute(select(m.c.name).where(m.c.name == MAPPING_RULES_NORMALIZED)).first() is not None:
+        return
+    t = pe_mapping_rules_table
+    keep = (
+        select(func.max(t.c.id))
+        .group_by(func.trim(t.c.category), t.c.post_type, func.trim(t.c.mode))
+        .scalar_subquery()
+    )
+    deleted = conn.execute(delete(t).where(t.c.id.not_in(keep))).rowcount or 0
+    trimmed = conn.execute(
+        update(t)
+        .where(or_(t.c.category != func.trim(t.c.category), t.c.mode != func.trim(t.c.mode)))
+        .values(category=func.trim(t.c.category), mode=func.trim(t.c.mode))
+    ).rowcount or 0
+    now = datetime.utcnow()
+    conn.execute(insert(m).values(
+        name=MAPPING_RULES_NORMALIZED, last_id=0, rows_seen=deleted + trimmed, rows_changed=deleted + trimmed,
+        started_at=now, updated_at=now, finished_at=now,
+    ))
+
+
+# Στήλες που προστέθηκαν μετά το create_all υπαρχουσών βάσεων: (πίνακας, στήλη) -> τύπος για το ALTER
+LATE_COLUMNS = {
+    ("committed_posts", "owner_id"): "INTEGER",
+    ("pe_jobs", "progress_json"): "TEXT",
+    ("pe_jobs", "singleton_key"): "VARCHAR(128)",
+}
+
+
+def _missing_columns(insp) -> list:
+    have = {}
+    for table, col in LATE_COLUMNS:
+        if table not in have:
+            have[table] = {c["name"] for c in insp.get_columns(table)}
+    return [(table, col) for table, col in LATE_COLUMNS if col not in have[table]]
+
+
+def _add_missing_columns(conn):
+    """Το engine.db δεν έχει migrations: στήλες που προστέθηκαν αργότερα μπαίνουν με ALTER."""
+    for table, col in _missing_columns(inspect(conn)):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {col} {LATE_COLUMNS[(table, col)]}"))
+
+
+def schema_missing() -> list:
+    """Τι λείπει από το engine.db (πίνακες, "πίνακας.στήλη"). Μόνο ανάγνωση· κενή λίστα = ενημερωμένο."""
+    insp = inspect(engine)
+    tables = set(insp.get_table_names())
+    missing = [t for t in metadata.tables if t not in tables]
+    if missing:
+        return missing
+    return [f"{table}.{col}" for table, col in _missing_columns(insp)]
+
+
+def require_schema() -> None:
+    """Για το startup server/worker: αποτυγχάνει νωρίς αντί να τρέξει DDL από κάθε process."""
+    missing = schema_missing()
+    if missing:
+        raise RuntimeError(f"engine.db schema out of date (missing: {', '.join(missing)}); "
+                           f"run `python tools/migrate.py` first")
+
+
+def init_schema() -> None:
+    """DDL του engine.db. Τρέχει από ένα μόνο σημείο πριν ξεκινήσουν server και workers
+    (tools/migrate.py), όχι στο import."""
+    with engine.begin() as conn:
+        metadata.create_all(conn)
+        _add_missing_columns(conn)
+        ix_committed_owner_id.create(conn, checkfirst=True)
+        ix_pe_jobs_owner.create(conn, checkfirst=True)
+        ux_pe_jobs_singleton.create(conn, checkfirst=True)
+        _normalize_mapping_rules(conn)
+        ux_mapping_rules.create(conn, checkfirst=True)
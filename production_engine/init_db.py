@@ -2,10 +2,22 @@
 ΤΡΕΞΙΜΟ:
     cd ~/autoposter-ai
     python -m production_engine.init_db
+
+Μόνο το engine.db· το tools/migrate.py τρέχει αυτό μαζί με τη database.db.
 """
 
-from production_engine.engine_database import Base, engine
+from production_engine.engine_database import Base, engine, init_schema
 
-if __name__ == "__main__":
+
+def init_engine_db() -> None:
+    """init_schema() (πίνακες, ALTER για νέες στήλες, indexes) + οι ORM πίνακες των models."""
+    from production_engine.models import (  # noqa: F401
+        brand_asset, committed_post, mapping_rule, product_asset, prompt, template,
+    )
+    init_schema()
     Base.metadata.create_all(bind=engine)
+
+
+if __name__ == "__main__":
+    init_engine_db()
     print("[production_engine] Database initialized (engine.db).")
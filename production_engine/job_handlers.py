@@ -0,0 +1,84 @@
+"""
+Handlers της ουράς (production_engine/jobs.py). Τα φορτώνουν ο worker και το /jobs router.
+Κάθε handler παίρνει το payload (dict) και επιστρέφει JSON-serializable result.
+"""
+from pydantic import ValidationError
+
+from production_engine.jobs import JobError, handler
+
+
+@handler("previews.render")
+def render_preview(payload: dict) -> dict:
+    """Ίδιο με το POST /previews/render."""
+    from production_engine.routers.previews import RenderRequest, render_image
+    try:
+        req = RenderRequest(**payload)
+    except ValidationError as e:
+        raise JobError(str(e))
+    return render_image(req)
+
+
+@handler("sync.url")
+def sync_from_url(payload: dict) -> dict:
+    """Κατάλογος από το users.sync_url (POST /me/products/sync)."""
+    from database import SessionLocal
+    from models import User
+    from routers.sync import SyncProgress, run_url_sync
+
+    db = SessionLocal()
+    try:
+        user = db.get(User, payload.get("owner_id"))
+        if user is None or not user.sync_url:
+            raise JobError("Το sync_url δεν έχει οριστεί για τον χρήστη.")
+        return run_url_sync(db, user.id, user.sync_url, SyncProgress())
+    finally:
+        db.close()
+
+
+@handler("sync.woocommerce")
+def sync_woocommerce(payload: dict) -> dict:
+    """Incremental (ή full) WooCommerce sync (POST /me/woocommerce/sync)."""
+    from database import SessionLocal
+    from models import User
+    from routers.sync import SyncProgress
+    from services.woocommerce_sync import fetch_and_store_products_from_woocommerce
+
+    db = SessionLocal()
+    try:
+        user = db.get(User, payload.get("owner_id"))
+        if user is None or not (user.woocommerce_url and user.consumer_key and user.consumer_secret):
+            raise JobError("Δεν έχουν οριστεί WooCommerce credentials.")
+        progress = SyncProgress()
+        return fetch_and_store_products_from_woocommerce(
+            db, user, full=bool(payload.get("full")), on_page=progress.page_done)
+    finally:
+        db.close()
+
+
+@handler("ads.generate")
+def generate_ad(payload: dict) -> dict:
+    """Image/carousel/video ad για ένα προϊόν του owner_id (services/post_generator)."""
+    from database import SessionLocal
+    from models import Product
+    from services import post_generator
+
+    post_type = payload.get("post_type")
+    if post_type not in ("image", "carousel", "video"):
+        raise JobError("Invalid post_type. Choose from 'image', 'carousel', 'video'.")
+    db = SessionLocal()
+    try:
+        product = db.query(Product).filter(
+            Product.id == payload.get("product_id"), Product.owner_id == payload.get("owner_id")
+        ).first()
+        if product is None:
+            raise JobError("Product not found")
+        try:
+            if post_type == "image":
+                return {"url": post_generator.generate_ad_content(product, post_type)}
+            if post_type == "carousel":
+                return {"urls": post_generator.generate_carousel_images(product)}
+            return {"url": post_generator.generate_video_ad(product)}
+        except (TypeError, ValueError) as e:  # άκυρα δεδομένα προϊόντος: ίδιο αποτέλεσμα σε κάθε retry
+            raise JobError(f"Invalid product data: {e}") from e
+    finally:
+        db.close()
@@ -0,0 +1,265 @@
+"""
+Durable ουρά για renders και product syncs (πίνακας pe_jobs στο engine.db ή στο ENGINE_DATABASE_URL).
+
+Το API κάνει enqueue() και επιστρέφει αμέσως job id· τα renders τρέχουν σε ξεχωριστά
+processes (python -m production_engine.worker), οπότε η χωρητικότητα κλιμακώνεται ανεξάρτητα
+από τους HTTP workers.
+
+- priority: μικρότερο = νωρίτερα (PRIORITIES: interactive previews πριν από bulk)
+- claim(): optimistic UPDATE ... WHERE status ίδιο -> ένας μόνο worker παίρνει κάθε job
+  (δουλεύει ίδια σε SQLite και Postgres, χωρίς SELECT FOR UPDATE)
+- visibility timeout: ο worker κρατάει lease (locked_until) και το ανανεώνει με heartbeat()·
+  αν πεθάνει, το job ξαναγίνεται διαθέσιμο όταν λήξει το lease
+- retries: fail() ξαναβάζει το job στην ουρά με exponential backoff ως max_attempts
+- singleton_key: το πολύ ένα ενεργό (queued/running) job ανά key, με unique index στη βάση,
+  άρα ισχύει ανάμεσα σε όλους τους HTTP workers· το key ελευθερώνεται όταν το job τελειώσει
+- progress: ο handler γράφει report_progress() όσο τρέχει, οποιοσδήποτε worker το διαβάζει
+"""
+import json
+import logging
+import os
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from production_engine.engine_database import engine, pe_jobs_table
+
+logger = logging.getLogger(__name__)
+
+JOB_VISIBILITY_TIMEOUT = float(os.getenv("JOB_VISIBILITY_TIMEOUT", "120"))  # sec lease ανά claim
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "2"))  # 2, 4, 8s ...
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "24"))
+JOB_MAX_ACTIVE_PER_OWNER = int(os.getenv("JOB_MAX_ACTIVE_PER_OWNER", "50"))  # queued + running
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+PRIORITIES = {"interactive": 0, "default": 5, "bulk": 10}
+
+
+class JobError(Exception):
+    """Σφάλμα handler που ΔΕΝ αξίζει retry (π.χ. άκυρο payload)."""
+
+
+class JobBusy(Exception):
+    """Υπάρχει ήδη ενεργό job με το ίδιο singleton_key (το `job` είναι το dict του)."""
+
+    def __init__(self, job: dict):
+        super().__init__(f"{job['kind']} job {job['job_id']} is already {job['status']}")
+        self.job = job
+
+
+# ---------- handlers ----------
+HANDLERS: dict[str, Callable[[dict], dict]] = {}
+
+
+def handler(kind: str):
+    """Decorator: καταχωρεί fn(payload) -> result dict για το `kind`."""
+    def deco(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return deco
+
+
+# ---------- producer ----------
+def enqueue(kind: str, payload: dict, *, owner_id: Optional[int] = None,
+            priority: int = PRIORITIES["default"], max_attempts: int = JOB_MAX_ATTEMPTS,
+            singleton_key: Optional[str] = None) -> str:
+    """JobBusy αν υπάρχει ήδη ενεργό job με το ίδιο singleton_key."""
+    t = pe_jobs_table
+    for _ in range(3):  # το ενεργό job μπορεί να τελειώσει ανάμεσα στο insert και στο select
+        now = datetime.utcnow()
+        job_id = uuid.uuid4().hex
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(t).values(
+                    id=job_id, kind=kind, owner_id=owner_id, priority=int(priority), status=QUEUED,
+                    payload_json=json.dumps(payload, ensure_ascii=False), attempts=0,
+                    max_attempts=max(1, max_attempts), run_after=now, created_at=now,
+                    singleton_key=singleton_key,
+                ))
+            return job_id
+        except IntegrityError:
+            if singleton_key is None:
+                raise
+            with engine.connect() as conn:
+                row = conn.execute(select(t).where(t.c.singleton_key == singleton_key)).first()
+            if row is not None:
+                raise JobBusy(_to_dict(row))
+    raise RuntimeError(f"could not enqueue {kind} for singleton_key {singleton_key!r}")
+
+
+def _to_dict(row) -> dict:
+    return {
+        "job_id": row.id,
+        "kind": row.kind,
+        "status": row.status,
+        "priority": row.priority,
+        "owner_id": row.owner_id,
+        "attempts": row.attempts,
+        "max_attempts": row.max_attempts,
+        "result": json.loads(row.result_json) if row.result_json else None,
+        "progress": json.loads(row.progress_json) if row.progress_json else None,
+        "error": row.error,
+        "created_at": row.created_at.isoformat() + "Z" if row.created_at else None,
+        "started_at": row.started_at.isoformat() + "Z" if row.started_at else None,
+        "finished_at": row.finished_at.isoformat() + "Z" if row.finished_at else None,
+    }
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    with engine.connect() as conn:
+        row = conn.execute(select(pe_jobs_table).where(pe_jobs_table.c.id == job_id)).first()
+    return _to_dict(row) if row else None
+
+
+def list_jobs(owner_id: int, kinds: Optional[list[str]] = None, limit: int = 50) -> list[dict]:
+    """Τα πιο πρόσφατα jobs του owner (προαιρετικά μόνο αυτών των kinds)."""
+    t = pe_jobs_table
+    q = select(t).where(t.c.owner_id == owner_id)
+    if kinds:
+        q = q.where(t.c.kind.in_(kinds))
+    with engine.connect() as conn:
+        rows = conn.execute(q.order_by(t.c.created_at.desc()).limit(limit)).all()
+    return [_to_dict(r) for r in rows]
+
+
+def count_active(owner_id: int) -> int:
+    """Jobs του owner που δεν έχουν τελειώσει (για το όριο του POST /jobs)."""
+    t = pe_jobs_table
+    with engine.connect() as conn:
+        return conn.execute(
+            select(func.count()).select_from(t).where(t.c.owner_id == owner_id, t.c.status.in_((QUEUED, RUNNING)))
+        ).scalar_one()
+
+
+def queue_stats() -> dict:
+    """Πλήθος jobs ανά status (για monitoring)."""
+    t = pe_jobs_table
+    with engine.connect() as conn:
+        rows = conn.execute(select(t.c.status, func.count()).group_by(t.c.status)).all()
+    out = {s: 0 for s in (QUEUED, RUNNING, DONE, FAILED)}
+    out.update({status: n for status, n in rows})
+    return out
+
+
+# ---------- consumer ----------
+def _ready(now: datetime):
+    t = pe_jobs_table
+    return or_(
+        and_(t.c.status == QUEUED, t.c.run_after <= now),
+        and_(t.c.status == RUNNING, t.c.locked_until < now),  # lease έληξε: ο worker χάθηκε
+    )
+
+
+def claim(worker_id: str, kinds: Optional[list[str]] = None,
+          visibility: float = JOB_VISIBILITY_TIMEOUT) -> Optional[dict]:
+    """Παίρνει το επόμενο έτοιμο job (ή None). Επιστρέφει dict με id/kind/payload/attempts."""
+    t = pe_jobs_table
+    for _ in range(10):  # λίγες προσπάθειες αν άλλος worker πρόλαβε το ίδιο job
+        now = datetime.utcnow()
+        cond = _ready(now)
+        if kinds:
+            cond = and_(cond, t.c.kind.in_(kinds))
+        with engine.begin() as conn:
+            cand = conn.execute(
+                select(t.c.id, t.c.kind, t.c.payload_json, t.c.attempts, t.c.max_attempts)
+                .where(cond).order_by(t.c.priority, t.c.created_at).limit(1)
+            ).first()
+            if cand is None:
+                return None
+            if cand.attempts >= cand.max_attempts:
+                # ο worker χάθηκε ξανά και ξανά πάνω σε αυτό το job: σταματάμε
+                conn.execute(update(t).where(t.c.id == cand.id, cond).values(
+                    status=FAILED, error="visibility timeout exceeded", locked_until=None, finished_at=now,
+                    singleton_key=None))
+                continue
+            res = conn.execute(update(t).where(t.c.id == cand.id, cond).values(
+                status=RUNNING, worker_id=worker_id, attempts=t.c.attempts + 1,
+                locked_until=now + timedelta(seconds=visibility), started_at=now,
+            ))
+            if res.rowcount == 1:
+                return {"id": cand.id, "kind": cand.kind, "payload": json.loads(cand.payload_json),
+                        "attempts": cand.attempts + 1, "max_attempts": cand.max_attempts}
+    return None
+
+
+def _owned(job_id: str, worker_id: str):
+    t = pe_jobs_table
+    return and_(t.c.id == job_id, t.c.worker_id == worker_id, t.c.status == RUNNING)
+
+
+def heartbeat(job_id: str, worker_id: str, visibility: float = JOB_VISIBILITY_TIMEOUT) -> bool:
+    """Ανανεώνει το lease. False: το job δεν είναι πια δικό μας."""
+    until = datetime.utcnow() + timedelta(seconds=visibility)
+    with engine.begin() as conn:
+        res = conn.execute(update(pe_jobs_table).where(_owned(job_id, worker_id)).values(locked_until=until))
+    return res.rowcount == 1
+
+
+def complete(job_id: str, worker_id: str, result: dict) -> bool:
+    with engine.begin() as conn:
+        res = conn.execute(update(pe_jobs_table).where(_owned(job_id, worker_id)).values(
+            status=DONE, result_json=json.dumps(result, ensure_ascii=False), error=None,
+            locked_until=None, finished_at=datetime.utcnow(), singleton_key=None,
+        ))
+    if res.rowcount != 1:
+        logger.warning("job %s: lease lost before completion (worker %s)", job_id, worker_id)
+    return res.rowcount == 1
+
+
+def fail(job_id: str, worker_id: str, error: str, *, retry: bool = True) -> str:
+    """Retry με backoff όσο attempts < max_attempts, αλλιώς FAILED. Επιστρέφει το νέο status."""
+    t = pe_jobs_table
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        row = conn.execute(select(t.c.attempts, t.c.max_attempts).where(_owned(job_id, worker_id))).first()
+        if row is None:
+            return ""
+        if retry and row.attempts < row.max_attempts:
+            delay = JOB_RETRY_BACKOFF * (2 ** (row.attempts - 1))
+            values = {"status": QUEUED, "run_after": now + timedelta(seconds=delay)}
+        else:
+            values = {"status": FAILED, "finished_at": now, "singleton_key": None}
+        conn.execute(update(t).where(_owned(job_id, worker_id)).values(
+            error=error[:2000], locked_until=None, worker_id=None, **values))
+    return values["status"]
+
+
+# ---------- progress (από μέσα σε handler) ----------
+_current: ContextVar[Optional[tuple[str, str]]] = ContextVar("pe_current_job", default=None)
+
+
+@contextmanager
+def running(job_id: str, worker_id: str):
+    """Ο worker τυλίγει την κλήση του handler· current_job() επιστρέφει (job_id, worker_id)."""
+    token = _current.set((job_id, worker_id))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def current_job() -> Optional[tuple[str, str]]:
+    return _current.get()
+
+
+def report_progress(job_id: str, worker_id: str, progress: dict) -> bool:
+    """Γράφει την πρόοδο (JSON) του job. False: το job δεν είναι πια δικό μας."""
+    with engine.begin() as conn:
+        res = conn.execute(update(pe_jobs_table).where(_owned(job_id, worker_id)).values(
+            progress_json=json.dumps(progress, ensure_ascii=False)))
+    return res.rowcount == 1
+
+
+def purge_finished(older_than_hours: float = JOB_RETENTION_HOURS) -> int:
+    t = pe_jobs_table
+    cutoff = datetime.utcnow() - timedelta(hours=older_than_hours)
+    with engine.begin() as conn:
+        res = conn.execute(delete(t).where(t.c.status.in_((DONE, FAILED)), t.c.finished_at < cutoff))
+    return res.rowcount or 0
@@ -0,0 +1,28 @@
+"""
+Canonical absolute URLs για ό,τι σερβίρεται από το /static.
+
+Στη βάση γράφονται absolute URLs ΜΟΝΟ με βάση το PUBLIC_BASE_URL (ρυθμίζεται από τον operator).
+Χωρίς αυτό γράφονται τα relative paths (/static/...)· ποτέ URL από το Host header ενός request.
+Η μορφή που αποθηκεύεται είναι και αυτή που επιστρέφεται: οι listings δεν ξαναγράφουν URLs.
+Όταν οριστεί PUBLIC_BASE_URL, τα παλιά relative rows περνάνε από tools/migrate_urls_abs.py.
+"""
+import os
+from typing import Optional
+from urllib.parse import urljoin
+
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "").rstrip("/")
+
+
+def to_abs_url(u: str, base: str) -> str:
+    """Relative (/static/...) -> absolute με βάση το `base`· τα absolute μένουν ως έχουν."""
+    if u.startswith("http://") or u.startswith("https://"):
+        return u
+    if u.startswith("/"):
+        return base + u
+    return urljoin(base + "/", u)
+
+
+def stored_url(u: str, base: Optional[str] = None) -> str:
+    """Η μορφή που αποθηκεύεται: absolute με το PUBLIC_BASE_URL, αλλιώς όπως ήρθε."""
+    base = PUBLIC_BASE_URL if base is None else base
+    return to_abs_url(u, base) if base else u
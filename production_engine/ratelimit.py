@@ -0,0 +1,176 @@
+"""
+Rate limiting με GCRA (Generic Cell Rate Algorithm): ένα νούμερο ανά key, το TAT (theoretical
+arrival time). Όριο `limit` ανά `period` sec = burst έως `limit` και μετά ένα αίτημα κάθε
+period/limit sec· ισοδύναμο με token bucket χωρητικότητας `limit`.
+
+    from production_engine.ratelimit import enforce
+    enforce("preview", user.id, limit=12, period=60, response=response)   # 429 + Retry-After όταν ξεπεραστεί
+
+Backends (RATE_LIMIT_BACKEND):
+  memory  ανά process (default)· keys με TAT <= now σβήνονται (γεμάτο bucket = κανένα state),
+          και σκληρό όριο RATE_LIMIT_MAX_KEYS (LRU)
+  db      πίνακας pe_rate_limits στο engine.db (ή ENGINE_DATABASE_URL): ίδιο όριο για όλους τους
+          workers/processes. Compare-and-set UPDATE, χωρίς locks· αν η βάση αποτύχει, fail-open
+Headers: RateLimit-Limit / RateLimit-Remaining / RateLimit-Reset / RateLimit-Policy, και Retry-After στο 429.
+"""
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Optional
+
+from fastapi import HTTPException, Response
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_SWEEP_INTERVAL = float(os.getenv("RATE_LIMIT_SWEEP_INTERVAL", "60"))  # sec ανάμεσα σε purges
+
+
+class RateDecision(NamedTuple):
+    allowed: bool
+    limit: int
+    period: float
+    remaining: int
+    reset: float        # sec μέχρι να γεμίσει ξανά το bucket
+    retry_after: float  # sec μέχρι να επιτραπεί το επόμενο (0 όταν allowed)
+
+    def headers(self) -> dict:
+        h = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(math.ceil(self.reset)),
+            "RateLimit-Policy": f"{self.limit};w={int(self.period)}",
+        }
+        if not self.allowed:
+            h["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return h
+
+
+def gcra(tat: Optional[float], now: float, limit: int, period: float, cost: int = 1):
+    """(decision, νέο TAT ή None όταν απορρίπτεται). Καθαρή συνάρτηση: τα backends κάνουν το atomic."""
+    interval = period / limit
+    tat = now if tat is None or tat < now else tat
+    new_tat = tat + interval * cost
+    allow_at = new_tat - period
+    if allow_at > now + 1e-9:
+        return RateDecision(False, limit, period, 0, tat - now, allow_at - now), None
+    remaining = int((period - (new_tat - now)) / interval + 1e-9)
+    return RateDecision(True, limit, period, remaining, new_tat - now, 0.0), new_tat
+
+
+Step = Callable[[Optional[float]], tuple]  # TAT -> (decision, νέο TAT | None)
+
+
+# ---------- backends ----------
+class MemoryBackend:
+    name = "memory"
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS, sweep_interval: float = RATE_LIMIT_SWEEP_INTERVAL):
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self._tats: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def apply(self, key: str, now: float, step: Step) -> RateDecision:
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            decision, new_tat = step(self._tats.get(key))
+            if new_tat is not None:
+                self._tats[key] = new_tat
+                self._tats.move_to_end(key)
+                while len(self._tats) > self.max_keys:
+                    self._tats.popitem(last=False)  # πιο παλιά ενεργό key
+            return decision
+
+    def _sweep(self, now: float) -> None:
+        idle = [k for k, tat in self._tats.items() if tat <= now]
+        for k in idle:
+            del self._tats[k]
+        self._next_sweep = now + self.sweep_interval
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+class DbBackend:
+    name = "db"
+
+    def __init__(self, sweep_interval: float = RATE_LIMIT_SWEEP_INTERVAL):
+        from production_engine.engine_database import engine, pe_rate_limits_table
+        self.engine = engine
+        self.table = pe_rate_limits_table
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+
+    def apply(self, key: str, now: float, step: Step) -> RateDecision:
+        from sqlalchemy import delete, insert, select, update
+        from sqlalchemy.exc import IntegrityError
+
+        t = self.table
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.sweep_interval
+            with self.engine.begin() as conn:
+                conn.execute(delete(t).where(t.c.tat <= now))
+        for _ in range(10):  # λίγες επαναλήψεις αν άλλος worker άλλαξε το ίδιο key
+            with self.engine.begin() as conn:
+                old = conn.execute(select(t.c.tat).where(t.c.key == key)).scalar()
+                decision, new_tat = step(old)
+                if new_tat is None:
+                    return decision
+                try:
+                    if old is None:
+                        conn.execute(insert(t).values(key=key, tat=new_tat))
+                        return decision
+                    res = conn.execute(update(t).where(t.c.key == key, t.c.tat == old).values(tat=new_tat))
+                    if res.rowcount == 1:
+                        return decision
+                except IntegrityError:
+                    pass  # ταυτόχρονο πρώτο insert: ξαναδιάβασε
+        raise RuntimeError(f"rate limit contention on {key!r}")
+
+
+BACKENDS = {"memory": MemoryBackend, "db": DbBackend}
+
+
+class RateLimiter:
+    def __init__(self, backend=None, clock: Callable[[], float] = time.time):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.clock = clock  # wall clock: κοινό μεταξύ processes για το db backend
+
+    def hit(self, key: str, limit: int, period: float, cost: int = 1) -> RateDecision:
+        now = self.clock()
+        try:
+            return self.backend.apply(key, now, lambda tat: gcra(tat, now, limit, period, cost))
+        except Exception as e:
+            logger.warning("rate limiter %s failed for %s, allowing: %s", self.backend.name, key, e)
+            return RateDecision(True, limit, period, limit, 0.0, 0.0)
+
+
+def _make_backend(name: str):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND {name!r} (choose from {sorted(BACKENDS)})")
+    return BACKENDS[name]()
+
+
+LIMITER = RateLimiter(_make_backend(RATE_LIMIT_BACKEND))
+
+
+def enforce(bucket: str, key, limit: int, period: float, response: Optional[Response] = None,
+            cost: int = 1) -> RateDecision:
+    """429 με Retry-After/RateLimit-* όταν ξεπεραστεί· αλλιώς τα headers μπαίνουν στο `response`."""
+    decision = LIMITER.hit(f"{bucket}:{key}", limit, period, cost)
+    if not decision.allowed:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded for {bucket} (limit={limit}/{int(period)}s)",
+            headers=decision.headers(),
+        )
+    if response is not None:
+        response.headers.update(decision.headers())
+    return decision
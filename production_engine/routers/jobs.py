@@ -0,0 +1,79 @@
+"""
+/jobs: ασύγχρονα renders μέσω της ουράς (production_engine/jobs.py).
+POST επιστρέφει αμέσως 202 + job_id· το render το κάνει ο production_engine.worker.
+"""
+import asyncio
+import time
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+
+from models import User
+from token_module import get_current_user, get_current_user_optional
+from production_engine import jobs
+from production_engine import job_handlers  # noqa: F401  (καταχωρεί τους handlers)
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+# kind -> default priority. Κάθε enqueue θέλει login: η ουρά είναι durable και κοινή για όλους
+PUBLIC_KINDS = {
+    "previews.render": "interactive",
+    "ads.generate": "default",
+}
+JOB_MAX_WAIT = 30.0  # sec για long-poll στο GET /jobs/{id}?wait=
+
+
+class JobIn(BaseModel):
+    kind: str
+    payload: dict = Field(default_factory=dict)
+    # μόνο τα ονόματα του jobs.PRIORITIES· αριθμοί από τον client θα μπορούσαν να προσπεράσουν όλη την ουρά
+    priority: Optional[Literal["interactive", "default", "bulk"]] = None
+
+
+def _visible_job(job_id: str, user: Optional[User]) -> dict:
+    job = jobs.get_job(job_id)
+    if job is None or (job["owner_id"] is not None and (user is None or user.id != job["owner_id"])):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("", status_code=202)
+def create_job(body: JobIn, user: User = Depends(get_current_user)):
+    if body.kind not in PUBLIC_KINDS:
+        raise HTTPException(status_code=422, detail=f"Unknown job kind. Choose from {sorted(PUBLIC_KINDS)}")
+    if jobs.count_active(user.id) >= jobs.JOB_MAX_ACTIVE_PER_OWNER:
+        raise HTTPException(status_code=429, detail=f"Too many active jobs (max {jobs.JOB_MAX_ACTIVE_PER_OWNER})",
+                            headers={"Retry-After": "5"})
+    payload = dict(body.payload)
+    payload["owner_id"] = user.id  # ο handler ελέγχει ιδιοκτησία με αυτό, όχι με ό,τι έστειλε ο client
+    priority = jobs.PRIORITIES[body.priority or PUBLIC_KINDS[body.kind]]
+    job_id = jobs.enqueue(body.kind, payload, owner_id=user.id, priority=priority)
+    return {"job_id": job_id, "status": jobs.QUEUED, "status_url": f"/jobs/{job_id}"}
+
+
+@router.get("/{job_id}")
+async def job_status(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=JOB_MAX_WAIT, description="long-poll: περιμένει ως N sec να τελειώσει"),
+    user: Optional[User] = Depends(get_current_user_optional),
+):
+    job = await run_in_threadpool(_visible_job, job_id, user)
+    deadline = time.monotonic() + wait
+    while job["status"] not in (jobs.DONE, jobs.FAILED) and time.monotonic() < deadline:
+        await asyncio.sleep(0.25)
+        job = await run_in_threadpool(_visible_job, job_id, user)
+    return job
+
+
+@router.get("/{job_id}/result")
+def job_result(job_id: str, user: Optional[User] = Depends(get_current_user_optional)):
+    """200 + result όταν τελειώσει· 202 όσο τρέχει· 409 αν απέτυχε οριστικά."""
+    job = _visible_job(job_id, user)
+    if job["status"] == jobs.DONE:
+        return job["result"]
+    if job["status"] == jobs.FAILED:
+        raise HTTPException(status_code=409, detail=f"Job failed: {job['error']}")
+    return JSONResponse(status_code=202, content={"job_id": job_id, "status": job["status"]})
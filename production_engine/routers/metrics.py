@@ -0,0 +1,55 @@
+"""
+GET /metrics σε Prometheus text format: histograms του render tracing (production_engine/tracing.py),
+DB pool (engine_database.pool_stats) και jobs ανά status (jobs.queue_stats).
+Τα νούμερα είναι ανά process (κάθε uvicorn worker έχει τα δικά του)· το scrape τα αθροίζει.
+"""
+import logging
+
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+
+from production_engine import tracing
+from production_engine.engine_database import pool_stats
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["metrics"])
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# pool_stats key -> (metric, type, help)
+_POOL_METRICS = {
+    "connects": ("autoposter_db_pool_connects_total", "counter", "New DB connections opened."),
+    "checkouts": ("autoposter_db_pool_checkouts_total", "counter", "Connection checkouts from the pool."),
+    "checked_out": ("autoposter_db_pool_checked_out", "gauge", "Connections currently checked out."),
+    "max_in_use": ("autoposter_db_pool_max_in_use", "gauge", "Peak concurrent checkouts."),
+    "overflow": ("autoposter_db_pool_overflow", "gauge", "Current pool overflow."),
+    "pool_size": ("autoposter_db_pool_size", "gauge", "Configured pool size."),
+    "wait_max_ms": ("autoposter_db_pool_wait_max_ms", "gauge", "Longest wait for a free connection (ms)."),
+}
+
+
+def _collect() -> str:
+    lines = [tracing.prometheus_text().rstrip("\n")]
+
+    stats = pool_stats()
+    for key, (name, kind, help_text) in _POOL_METRICS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {stats[key]}"]
+
+    try:
+        from production_engine import jobs
+        queue = jobs.queue_stats()
+    except Exception as e:  # ο πίνακας jobs μπορεί να μην υπάρχει ακόμα
+        logger.warning("metrics: queue_stats failed: %s", e)
+        queue = {}
+    if queue:
+        lines += ["# HELP autoposter_jobs Render jobs by status.", "# TYPE autoposter_jobs gauge"]
+        lines += [f'autoposter_jobs{{status="{status}"}} {n}' for status, n in sorted(queue.items())]
+    return "\n".join(lines) + "\n"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    body = await run_in_threadpool(_collect)  # queue_stats κάνει query
+    return PlainTextResponse(body, media_type=CONTENT_TYPE)
@@ -1,50 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, func, and_, or_
 from sqlalchemy.orm import Session
-from typing import List
-import json
+from typing import Optional
+from datetime import datetime
+import base64
 
-from database import get_db
-from token_module import get_current_user
+from database import get_read_db
+from token_module import get_current_user_readonly
 from models import Post
+from services.post_counts import get_post_count
 
 router = APIRouter(prefix="/me", tags=["posts"])
 
-def _media_list(v):
-    if v is None:
-        return []
-    if isinstance(v, list):
-        return v
+# Μόνο οι στήλες της λίστας (όχι content)
+LIST_COLUMNS = (Post.id, Post.title, Post.type, Post.status, Post.product_id, Post.created_at, Post.media_urls)
+
+def _encode_cursor(created_at: datetime, post_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{post_id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
     try:
-        return json.loads(v)
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        ts, pid = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(pid)
     except Exception:
-        return [str(v)]
+        raise HTTPException(status_code=400, detail="invalid cursor")
 
 @router.get("/posts")
-def list_posts(db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    q = db.query(Post).filter(Post.owner_id == current_user.id).order_by(Post.created_at.desc())
-    out = []
-    for p in q.all():
-        out.append({
-            "id": p.id,
-            "title": getattr(p, "title", None),
-            "type": getattr(p, "type", None),
-            "status": getattr(p, "status", None),
-            "created_at": getattr(p, "created_at", None),
-            "media_urls": _media_list(getattr(p, "media_urls", None)),
-        })
-    return out
+def list_posts(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor της προηγούμενης σελίδας"),
+    db: Session = Depends(get_read_db),
+    current_user = Depends(get_current_user_readonly),
+):
+    """
+    Posts του χρήστη, νεότερα πρώτα. Keyset pagination σε (created_at, id) πάνω στο
+    ix_posts_owner_created_id· το total έρχεται από cached counter.
+    """
+    q = select(*LIST_COLUMNS).where(Post.owner_id == current_user.id)
+    if cursor:
+        ts, pid = _decode_cursor(cursor)
+        q = q.where(or_(Post.created_at < ts, and_(Post.created_at == ts, Post.id < pid)))
+    rows = db.execute(q.order_by(Post.created_at.desc(), Post.id.desc()).limit(limit + 1)).mappings().all()
+
+    items = [dict(r) for r in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = _encode_cursor(last["created_at"], last["id"])
+    total = get_post_count(
+        current_user.id,
+        lambda: db.execute(select(func.count()).select_from(Post).where(Post.owner_id == current_user.id)).scalar_one(),
+    )
+    return {"items": items, "next_cursor": next_cursor, "total": total}
 
 @router.get("/posts/{post_id}")
-def get_post(post_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    p = db.query(Post).filter(Post.id == post_id, Post.owner_id == current_user.id).first()
-    if not p:
+def get_post(post_id: int, db: Session = Depends(get_read_db), current_user = Depends(get_current_user_readonly)):
+    row = db.execute(
+        select(*LIST_COLUMNS, Post.content).where(Post.id == post_id, Post.owner_id == current_user.id)
+    ).mappings().first()
+    if not row:
         raise HTTPException(status_code=404, detail="not found")
-    return {
-        "id": p.id,
-        "title": getattr(p, "title", None),
-        "content": getattr(p, "content", None),
-        "type": getattr(p, "type", None),
-        "status": getattr(p, "status", None),
-        "created_at": getattr(p, "created_at", None),
-        "media_urls": _media_list(getattr(p, "media_urls", None)),
-    }
+    return dict(row)
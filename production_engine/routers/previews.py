@@ -3,20 +3,24 @@ import os
 import json
 from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException, Body, Header, Request
+from fastapi import APIRouter, Depends, HTTPException, Body, Header, Query, Request
 from pydantic import BaseModel, Field, RootModel
 from sqlalchemy import insert, select, desc
 from PIL import Image, ImageDraw, ImageFont
-from urllib.parse import urljoin
 
 from production_engine.engine_database import engine, committed_posts_table
 from production_engine.engine_database import pe_templates_table  # για resolve spec
+from production_engine.public_urls import stored_url
+from production_engine.tracing import stage, traced
 from starlette.responses import JSONResponse
 
+from models import User
+from token_module import get_current_user_optional, get_current_user_readonly
+
 import httpx
 
 # ΝΕΟ: ελληνικός renderer
-from production_engine.services.greek_text_renderer import render_image_greek  # <-- προσθήκη
+from production_engine.services.greek_text_renderer import compose_image_greek
 
 router = APIRouter()
 
@@ -56,7 +60,7 @@ FONTS_DIR = os.path.join("production_engine", "assets", "fonts")  # <-- προσ
 
 os.makedirs(GENERATED_DIR, exist_ok=True)
 
-
+@traced("db_spec")
 def _load_template_spec(template_id: int) -> Optional[dict]:
     with engine.connect() as conn:
         row = conn.execute(
@@ -87,9 +91,11 @@ def _open_image_from_static(url_path: str) -> Image.Image:
             full = alt
         else:
             raise FileNotFoundError(full)
-    return Image.open(full).convert("RGBA")
+    with stage("decode"):
+        return Image.open(full).convert("RGBA")
 
 
+@traced("resize")
 def _paste_fit(img: Image.Image, slot: dict) -> Image.Image:
     # fit: "contain" (default) ή "cover"
     fit = slot.get("fit", "contain")
@@ -154,6 +160,7 @@ def _wrap_text_by_width(text: str, font: ImageFont.FreeTypeFont, max_width: int,
     return lines
 
 
+@traced("text_layout")
 def _draw_text(draw: ImageDraw.ImageDraw, slot: dict, text: str, font_dir: str):
     """
     Βελτιωμένο text renderer για slots:
@@ -280,22 +287,19 @@ def render_image(payload: RenderRequest):
             rel = payload.brand_logo_url[len("/static/"):]
             brand_logo_path = os.path.join(STATIC_ROOT, rel)
 
-        # Ρεντάρουμε προσωρινό PNG και το χρησιμοποιούμε ως base
-        tmp_name = f"tmp_{int(datetime.utcnow().timestamp()*1000)}.png"
-        tmp_path = os.path.join(GENERATED_DIR, tmp_name)
-        render_image_greek(
-            tmp_path,
+        # Το ελληνικό layout απευθείας ως base (χωρίς προσωρινό PNG και ξαναδιάβασμα)
+        base = compose_image_greek(
             title=title,
             price=price,
             cta=cta,
             brand_logo_path=brand_logo_path
         )
-        base = Image.open(tmp_path).convert("RGBA")
 
     # save
     preview_id = f"prev_{int(datetime.utcnow().timestamp()*1000)}"
     out_path = os.path.join(GENERATED_DIR, f"{preview_id}.png")
-    base.convert("RGB").save(out_path, "PNG")
+    with stage("encode"):
+        base.convert("RGB").save(out_path, "PNG")
 
     return {
         "preview_id": preview_id,
@@ -353,18 +357,18 @@ async def debit_one_credit(authorization: Optional[str]) -> None:
 @router.post("/previews/commit")
 async def commit_preview(
     payload: CommitRequest,
-    request: Request,
-    authorization: Optional[str] = Header(default=None, alias="Authorization")
+    authorization: Optional[str] = Header(default=None, alias="Authorization"),
+    user: Optional[User] = Depends(get_current_user_optional),
 ):
     """
     1) Credits guard: debit 1 credit στο κεντρικό backend (αν δεν είναι disabled).
-    2) Αν ΟΚ, γράφουμε committed_posts.
+    2) Αν ΟΚ, γράφουμε committed_posts (owner_id = ο χρήστης του token, αν υπάρχει).
     3) Fallback: αν δεν δόθηκαν urls, χρησιμοποίησε αυτόματα το /static/generated/<preview_id>.png
-    4) Normalize: πάντα ABSOLUTE URLs με βάση το request.base_url
+    4) Normalize: με PUBLIC_BASE_URL αποθηκεύονται absolute (canonical) URLs, αλλιώς relative
+       (production_engine/public_urls.py)· η απάντηση έχει τα URLs όπως αποθηκεύτηκαν
     """
-    await debit_one_credit(authorization)
-
-    base = str(request.base_url).rstrip("/")
+    with stage("credits"):
+        await debit_one_credit(authorization)
 
     # --- Derive final URLs ---
     urls_in = payload.urls or []
@@ -381,22 +385,15 @@ async def commit_preview(
         else:
             raise HTTPException(status_code=422, detail="No URLs provided and preview file not found")
 
-    # Normalize -> ABSOLUTE
-    def to_abs(u: str) -> str:
-        if u.startswith("http://") or u.startswith("https://"):
-            return u
-        if u.startswith("/"):
-            return base + u
-        return urljoin(base + "/", u)
-
-    abs_urls = [to_abs(u) for u in urls]
+    stored = [stored_url(str(u)) for u in urls]
 
     now = datetime.utcnow()
-    with engine.begin() as conn:
+    with stage("db_commit"), engine.begin() as conn:
         res = conn.execute(
             insert(committed_posts_table).values(
+                owner_id=user.id if user is not None else None,
                 preview_id=payload.preview_id,
-                urls_json=json.dumps(abs_urls),
+                urls_json=json.dumps(stored),
                 created_at=now
             )
         )
@@ -405,52 +402,50 @@ async def commit_preview(
     return {
         "post_id": int(new_id),
         "preview_id": payload.preview_id,
-        "urls": abs_urls,
+        "urls": stored,
         "created_at": now.isoformat() + "Z",
     }
 
 
 @router.get("/previews/committed")
-def list_committed(request: Request, limit: int = 20, offset: int = 0):
+def list_committed(
+    limit: int = Query(20, ge=1, le=100),
+    before_id: Optional[int] = Query(None, ge=1, description="Cursor: next_before_id της προηγούμενης σελίδας"),
+    user: User = Depends(get_current_user_readonly),
+):
     """
-    Επιστρέφει πρόσφατα commits με basic pagination.
-    ΠΑΝΤΑ επιστρέφει ABS URLs.
+    Τα commits του χρήστη, νεότερα πρώτα, με keyset pagination (before_id) πάνω στο
+    ix_committed_posts_owner_id. Rows χωρίς owner (ανώνυμα commits, και όσα έγιναν πριν μπει η
+    στήλη owner_id) δεν εμφανίζονται σε κανέναν· tools/backfill_committed_owner.py τα αναθέτει.
+    Τα URLs επιστρέφονται όπως αποθηκεύτηκαν (canonical, βλ. production_engine/public_urls.py):
+    absolute με PUBLIC_BASE_URL, αλλιώς relative /static/... που ο browser λύνει ως προς το origin.
     """
-    limit = max(1, min(100, int(limit)))
-    offset = max(0, int(offset))
-
-    base = str(request.base_url).rstrip("/")
+    c = committed_posts_table.c
+    stmt = (
+        select(c.id, c.preview_id, c.urls_json, c.created_at)
+        .where(c.owner_id == user.id)
+        .order_by(desc(c.id))
+        .limit(limit + 1)
+    )
+    if before_id is not None:
+        stmt = stmt.where(c.id < before_id)
 
     with engine.connect() as conn:
-        rows = conn.execute(
-            select(
-                committed_posts_table.c.id,
-                committed_posts_table.c.preview_id,
-                committed_posts_table.c.urls_json,
-                committed_posts_table.c.created_at
-            ).order_by(desc(committed_posts_table.c.id))
-             .limit(limit)
-             .offset(offset)
-        ).mappings().all()
-
-    def to_abs(u: str) -> str:
-        if u.startswith("http://") or u.startswith("https://"):
-            return u
-        if u.startswith("/"):
-            return base + u
-        return urljoin(base + "/", u)
+        rows = conn.execute(stmt).all()
 
+    has_more = len(rows) > limit
+    rows = rows[:limit]
     out = []
     for r in rows:
         try:
-            urls = json.loads(r["urls_json"] or "[]")
-        except Exception:
+            urls = json.loads(r.urls_json or "[]")
+        except ValueError:
             urls = []
-        abs_urls = [to_abs(str(u)) for u in urls]
         out.append({
-            "id": int(r["id"]),
-            "preview_id": r["preview_id"],
-            "urls": abs_urls,
-            "created_at": r["created_at"].isoformat() + "Z" if r.get("created_at") else None
+            "id": int(r.id),
+            "preview_id": r.preview_id,
+            "urls": urls,
+            "created_at": r.created_at.isoformat() + "Z" if r.created_at else None
         })
-    return {"items": out, "limit": limit, "offset": offset, "count": len(out)}
+    next_before_id = out[-1]["id"] if has_more else None
+    return {"items": out, "limit": limit, "count": len(out), "next_before_id": next_before_id}
@@ -1,46 +1,81 @@
 # production_engine/routers/templates_engine.py
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import Optional, List, Literal
+from typing import Optional, List, Literal, Union
 from datetime import datetime
-import os, json
+import json, os, threading, time
 
 # Χρησιμοποιούμε SQLAlchemy Core (όχι ORM) για να ΜΗΝ μπλέκουμε με άλλα models
-from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String, Text, DateTime, select, insert, update
+from sqlalchemy import select, insert, update, delete
+from sqlalchemy.exc import IntegrityError
+
+# Κοινό engine/pool + πίνακες για το engine.db
+from production_engine.engine_database import (
+    engine, pool_stats,
+    pe_templates_table as pe_templates,
+    pe_mapping_rules_table as pe_mapping_rules,
+)
 
 router = APIRouter()
 
-# ---- DB/paths ----
-PE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DB_PATH = os.path.join(PE_DIR, "engine.db")
-ENGINE_URL = f"sqlite:///{DB_PATH}"
-engine = create_engine(ENGINE_URL, connect_args={"check_same_thread": False})
-metadata = MetaData()
-
-# ---- Πίνακες (Core) ----
-pe_templates = Table(
-    "pe_templates", metadata,
-    Column("id", Integer, primary_key=True),
-    Column("name", String, nullable=False),
-    Column("type", String, nullable=False),   # image|carousel|video
-    Column("ratio", String, nullable=True),   # e.g. "4:5", "1:1", "9:16"
-    Column("spec_json", Text, nullable=False),
-    Column("thumb_url", String, nullable=True),
-    Column("created_at", DateTime, default=datetime.utcnow),
-)
+# ---- In-memory πίνακας resolution ----
+# "*" = wildcard σε category ή mode. Precedence (πιο ειδικό πρώτα):
+#   (category, post_type, mode) > (category, post_type, *) > (*, post_type, mode) > (*, post_type, *)
+WILDCARD = "*"
+# Οι αλλαγές από αυτό το process καθαρίζουν αμέσως τον πίνακα· αλλαγές από άλλους workers
+# φαίνονται το πολύ μετά από MAPPING_RULES_CACHE_TTL sec.
+MAPPING_RULES_CACHE_TTL = float(os.getenv("MAPPING_RULES_CACHE_TTL", "5"))
 
-pe_mapping_rules = Table(
-    "pe_mapping_rules", metadata,
-    Column("id", Integer, primary_key=True),
-    Column("category", String, nullable=False),
-    Column("post_type", String, nullable=False),  # image|carousel|video
-    Column("mode", String, nullable=False),       # Κανονικό, κ.λπ.
-    Column("template_id", Integer, nullable=False),
-    Column("created_at", DateTime, default=datetime.utcnow),
-)
+_rules_lock = threading.Lock()
+_rules_table: Optional[tuple[dict, float]] = None  # (πίνακας, expires_at)
+
+def _rule_key(category: str, post_type: str, mode: str) -> tuple:
+    return (category.strip(), post_type, mode.strip())
+
+def _load_rules_table() -> dict:
+    with engine.connect() as conn:
+        rows = conn.execute(select(
+            pe_mapping_rules.c.category, pe_mapping_rules.c.post_type,
+            pe_mapping_rules.c.mode, pe_mapping_rules.c.template_id,
+        )).fetchall()
+    return {_rule_key(r.category, r.post_type, r.mode): r.template_id for r in rows}
+
+def _get_rules_table() -> dict:
+    global _rules_table
+    cached = _rules_table
+    if cached is None or cached[1] <= time.monotonic():
+        with _rules_lock:
+            if _rules_table is None or _rules_table[1] <= time.monotonic():
+                _rules_table = (_load_rules_table(), time.monotonic() + MAPPING_RULES_CACHE_TTL)
+            cached = _rules_table
+    return cached[0]
 
-with engine.begin() as conn:
-    metadata.create_all(conn)
+def invalidate_rules_cache() -> None:
+    """Καλείται μετά από κάθε αλλαγή κανόνων· το επόμενο resolve ξαναχτίζει τον πίνακα."""
+    global _rules_table
+    with _rules_lock:
+        _rules_table = None
+
+def _match_rule(table: dict, categories: List[str], post_type: str, mode: str) -> Optional[tuple]:
+    """Επιστρέφει (template_id, category, mode) για τον πιο ειδικό κανόνα ή None."""
+    mode_keys = (mode, WILDCARD) if mode != WILDCARD else (WILDCARD,)
+    for cat in categories:
+        for m in mode_keys:
+            tid = table.get(_rule_key(cat, post_type, m))
+            if tid is not None:
+                return tid, cat, m
+    for m in mode_keys:
+        tid = table.get(_rule_key(WILDCARD, post_type, m))
+        if tid is not None:
+            return tid, WILDCARD, m
+    return None
+
+def _split_categories(value) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [c.strip() for c in value if c and str(c).strip()]
 
 # ---- Pydantic σχήματα (Pydantic v1) ----
 class Slot(BaseModel):
@@ -84,7 +119,20 @@ class ResolveBody(BaseModel):
     post_type: Literal["image","carousel","video"]
     mode: str
 
+class CatalogProduct(BaseModel):
+    id: int
+    categories: Optional[Union[str, List[str]]] = None  # "A, B" (όπως στο products.categories) ή λίστα
+
+class BulkResolveBody(BaseModel):
+    post_type: Literal["image","carousel","video"]
+    mode: str
+    products: List[CatalogProduct]
+
 # ---- Endpoints ----
+@router.get("/tengine/db/pool")
+def db_pool_stats():
+    return pool_stats()
+
 @router.post("/tengine/templates/register")
 def register_template(body: RegisterTemplateBody):
     # Pydantic v1: .json()
@@ -127,28 +175,86 @@ def get_template(tid: int):
     data["spec"] = json.loads(data.pop("spec_json"))
     return data
 
+@router.get("/tengine/mapping/rules")
+def list_rules():
+    with engine.connect() as conn:
+        rows = conn.execute(select(
+            pe_mapping_rules.c.id, pe_mapping_rules.c.category, pe_mapping_rules.c.post_type,
+            pe_mapping_rules.c.mode, pe_mapping_rules.c.template_id,
+        ).order_by(pe_mapping_rules.c.id)).fetchall()
+    return [dict(r._mapping) for r in rows]
+
 @router.post("/tengine/mapping/rules")
 def add_rule(body: MappingRuleBody):
+    # ίδια κανονικοποίηση με τον πίνακα resolution: " Shoes " και "Shoes" είναι ο ίδιος κανόνας
+    category, post_type, mode = _rule_key(body.category, body.post_type, body.mode)
+    if not category or not mode:
+        raise HTTPException(status_code=400, detail="category and mode must not be empty")
+    for attempt in range(2):
+        try:
+            with engine.begin() as conn:
+                # check ότι υπάρχει template
+                t = conn.execute(select(pe_templates.c.id).where(pe_templates.c.id == body.template_id)).fetchone()
+                if not t:
+                    raise HTTPException(status_code=400, detail="template_id invalid")
+                # upsert: ίδιο (category, post_type, mode) -> αλλάζει μόνο το template_id
+                existing = conn.execute(
+                    select(pe_mapping_rules.c.id)
+                    .where(pe_mapping_rules.c.category == category)
+                    .where(pe_mapping_rules.c.post_type == post_type)
+                    .where(pe_mapping_rules.c.mode == mode)
+                ).fetchone()
+                if existing:
+                    rid = existing.id
+                    conn.execute(update(pe_mapping_rules).where(pe_mapping_rules.c.id == rid).values(
+                        template_id=body.template_id
+                    ))
+                else:
+                    rid = conn.execute(insert(pe_mapping_rules).values(
+                        category=category, post_type=post_type, mode=mode,
+                        template_id=body.template_id, created_at=datetime.utcnow()
+                    )).inserted_primary_key[0]
+            break
+        except IntegrityError:
+            # άλλο request έβαλε τον ίδιο κανόνα ανάμεσα στο select και στο insert (unique index):
+            # η δεύτερη προσπάθεια τον βρίσκει και κάνει update
+            if attempt:
+                raise
+    invalidate_rules_cache()
+    return {"rule_id": rid, "updated": bool(existing)}
+
+@router.delete("/tengine/mapping/rules/{rid}")
+def delete_rule(rid: int):
     with engine.begin() as conn:
-        # check ότι υπάρχει template
-        t = conn.execute(select(pe_templates.c.id).where(pe_templates.c.id == body.template_id)).fetchone()
-        if not t:
-            raise HTTPException(status_code=400, detail="template_id invalid")
-        rid = conn.execute(insert(pe_mapping_rules).values(
-            category=body.category, post_type=body.post_type, mode=body.mode,
-            template_id=body.template_id, created_at=datetime.utcnow()
-        )).inserted_primary_key[0]
-    return {"rule_id": rid}
+        res = conn.execute(delete(pe_mapping_rules).where(pe_mapping_rules.c.id == rid))
+    if res.rowcount == 0:
+        raise HTTPException(status_code=404, detail="rule not found")
+    invalidate_rules_cache()
+    return {"ok": True}
 
 @router.post("/tengine/mapping/resolve")
 def resolve_rule(body: ResolveBody):
-    with engine.begin() as conn:
-        row = conn.execute(
-            select(pe_mapping_rules.c.template_id)
-            .where(pe_mapping_rules.c.category == body.category)
-            .where(pe_mapping_rules.c.post_type == body.post_type)
-            .where(pe_mapping_rules.c.mode == body.mode)
-        ).fetchone()
-    if not row:
+    hit = _match_rule(_get_rules_table(), [body.category], body.post_type, body.mode)
+    if not hit:
         raise HTTPException(status_code=404, detail="no mapping")
-    return {"template_id": row.template_id}
+    tid, category, mode = hit
+    return {"template_id": tid, "matched": {"category": category, "post_type": body.post_type, "mode": mode}}
+
+@router.post("/tengine/mapping/resolve/bulk")
+def resolve_bulk(body: BulkResolveBody):
+    """
+    Αντιστοίχιση ολόκληρου καταλόγου σε templates με μία κλήση.
+    Για κάθε προϊόν δοκιμάζονται οι κατηγορίες του με τη σειρά και μετά το wildcard.
+    """
+    table = _get_rules_table()
+    results = []
+    unresolved = 0
+    for p in body.products:
+        hit = _match_rule(table, _split_categories(p.categories), body.post_type, body.mode)
+        if hit:
+            tid, category, mode = hit
+            results.append({"product_id": p.id, "template_id": tid, "category": category, "mode": mode})
+        else:
+            unresolved += 1
+            results.append({"product_id": p.id, "template_id": None, "category": None, "mode": None})
+    return {"results": results, "resolved": len(results) - unresolved, "unresolved": unresolved}
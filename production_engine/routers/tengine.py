@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from fastapi.responses import JSONResponse
 from starlette.routing import Mount
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 import os, re, io, time, json, base64, secrets, uuid, shutil
@@ -10,9 +11,11 @@ from PIL import Image
 from database import get_db
 from models import User, Post
 from token_module import get_current_user
+from production_engine.tracing import stage
 
 # Template registry
 from services.template_registry import REGISTRY
+from services.image_mirror import CANVAS_SIZES, derivative_bytes, fit_image, product_box, schedule_mirror
 
 # Προσπάθησε να έχεις cairosvg για PNG finals
 try:
@@ -24,20 +27,11 @@ except Exception:
 router = APIRouter(prefix="/tengine", tags=["tengine"])
 
 # ---------- Rate limiting ----------
-from collections import deque
-_RATE_BUCKETS: dict[tuple[int, str], deque] = {}
-
-def _check_rate(user_id: int, bucket: str, limit: int, period_sec: int):
-    now = time.time()
-    dq = _RATE_BUCKETS.setdefault((user_id, bucket), deque())
-    while dq and now - dq[0] > period_sec:
-        dq.popleft()
-    if len(dq) >= limit:
-        raise HTTPException(
-            status_code=429,
-            detail=f"Rate limit exceeded for {bucket} (limit={limit}/{period_sec}s)"
-        )
-    dq.append(now)
+# GCRA με bounded state· RATE_LIMIT_BACKEND=db για κοινό όριο σε όλους τους workers
+from production_engine.ratelimit import enforce
+
+def _check_rate(user_id: int, bucket: str, limit: int, period_sec: int, response: Response | None = None):
+    enforce(bucket, user_id, limit, period_sec, response)
 
 # ---------- Helpers ----------
 def _static_dir(app) -> str:
@@ -78,9 +72,7 @@ def _safe_url(u: str | None) -> str | None:
     return None
 
 def _ratio_to_size(ratio: str):
-    if ratio == "9:16": return (1080, 1920)
-    if ratio == "4:5":  return (1080, 1350)
-    return (1080, 1080)  # 1:1
+    return CANVAS_SIZES.get(ratio, CANVAS_SIZES["1:1"])  # default 1:1
 
 def _image_to_data_uri(url: str, box_w: int, box_h: int, cover=True, static_dir: str | None = None) -> str | None:
     try:
@@ -91,34 +83,29 @@ def _image_to_data_uri(url: str, box_w: int, box_h: int, cover=True, static_dir:
                 base = os.path.abspath("assets")
                 mount = "/assets/"
             local_path = os.path.join(base, url[len(mount):].lstrip("/"))
-            with open(local_path, "rb") as fh:
+            with stage("fetch"), open(local_path, "rb") as fh:
                 data = fh.read()
         else:
-            r = requests.get(url, timeout=10)
-            r.raise_for_status()
-            data = r.content
-        im = Image.open(io.BytesIO(data)).convert("RGBA")
-        if cover:
-            rw, rh = box_w / im.width, box_h / im.height
-            scale = max(rw, rh)
-            nw, nh = int(im.width*scale), int(im.height*scale)
-            im = im.resize((nw, nh), Image.LANCZOS)
-            x = (nw - box_w)//2
-            y = (nh - box_h)//2
-            im = im.crop((x, y, x+box_w, y+box_h))
-        else:
-            rw, rh = box_w / im.width, box_h / im.height
-            scale = min(rw, rh)
-            nw, nh = max(1,int(im.width*scale)), max(1,int(im.height*scale))
-            im = im.resize((nw, nh), Image.LANCZOS)
-            bg = Image.new("RGBA", (box_w, box_h), (0,0,0,0))
-            ox = (box_w - nw)//2
-            oy = (box_h - nh)//2
-            bg.paste(im, (ox,oy), im)
-            im = bg
-        out = io.BytesIO()
-        im.save(out, format="PNG")
-        b64 = base64.b64encode(out.getvalue()).decode("ascii")
+            # Πρώτα το τοπικό mirror (έτοιμο PNG στο μέγεθος του box)
+            with stage("mirror"):
+                png = derivative_bytes(url, box_w, box_h, cover)
+            if png is not None:
+                schedule_mirror([url])  # no-op εκτός αν το index είναι stale (revalidation σε background)
+                return "data:image/png;base64," + base64.b64encode(png).decode("ascii")
+            with stage("fetch"):
+                r = requests.get(url, timeout=10)
+                r.raise_for_status()
+                data = r.content
+            schedule_mirror([url])  # την επόμενη φορά από το mirror
+        with stage("decode"):
+            src = Image.open(io.BytesIO(data))
+            src.load()
+        with stage("resize"):
+            im = fit_image(src, box_w, box_h, cover)
+        with stage("encode"):
+            out = io.BytesIO()
+            im.save(out, format="PNG")
+            b64 = base64.b64encode(out.getvalue()).decode("ascii")
         return f"data:image/png;base64,{b64}"
     except Exception:
         return None
@@ -155,7 +142,7 @@ def _write_svg(meta: dict, out_path: str, is_preview: bool, static_dir: str):
     cta_text = _safe_text(meta.get("cta_text"), 40)
     badge_text = _safe_text(meta.get("badge_text"), 20)
 
-    product_img = _image_to_data_uri(image_url, int(W*0.9), int(H*0.55), cover=True, static_dir=static_dir) if image_url else None
+    product_img = _image_to_data_uri(image_url, *product_box(ratio), cover=True, static_dir=static_dir) if image_url else None
     logo_img    = _image_to_data_uri(logo_url, 200, 80, cover=False, static_dir=static_dir) if logo_url else None
 
     parts = [ _svg_header(W,H), _grad_bg(W,H, brand_color) ]
@@ -180,7 +167,7 @@ def _write_svg(meta: dict, out_path: str, is_preview: bool, static_dir: str):
     parts.append('</svg>')
     svg = "".join(parts)
     _ensure_dir(os.path.dirname(out_path))
-    with open(out_path, "w", encoding="utf-8") as f:
+    with stage("write"), open(out_path, "w", encoding="utf-8") as f:
         f.write(svg)
 
 def _normalize_preview_url_to_static_path(preview_url: str) -> str:
@@ -214,14 +201,16 @@ def _final_from_preview(preview_static_path: str, static_dir: str) -> str:
             svg_text = open(src, "r", encoding="utf-8").read()
         except UnicodeDecodeError:
             svg_text = open(src, "r", encoding="latin-1", errors="ignore").read()
-        cairosvg.svg2png(bytestring=svg_text.encode("utf-8"), write_to=dst)
+        with stage("rasterize"):
+            cairosvg.svg2png(bytestring=svg_text.encode("utf-8"), write_to=dst)
         rel = os.path.relpath(dst, static_dir).replace(os.sep, "/")
         return f"/static/{rel}"
     else:
         # Fallback: SVG copy
         final_name = f"final_{uid}.svg"
         dst = os.path.join(finals_dir, final_name)
-        shutil.copyfile(src, dst)
+        with stage("write"):
+            shutil.copyfile(src, dst)
         rel = os.path.relpath(dst, static_dir).replace(os.sep, "/")
         return f"/static/{rel}"
 
@@ -248,8 +237,8 @@ class CommitIn(BaseModel):
 
 # ---------- Endpoints ----------
 @router.post("/preview")
-def preview(req: Request, payload: PreviewIn, current_user: User = Depends(get_current_user)):
-    _check_rate(current_user.id, "preview", limit=12, period_sec=60)
+def preview(req: Request, payload: PreviewIn, response: Response, current_user: User = Depends(get_current_user)):
+    _check_rate(current_user.id, "preview", limit=12, period_sec=60, response=response)
     static_dir = _static_dir(req.app)
     prev_dir = os.path.join(static_dir, "generated", "previews")
     _ensure_dir(prev_dir)
@@ -284,7 +273,7 @@ def preview(req: Request, payload: PreviewIn, current_user: User = Depends(get_c
             raise HTTPException(status_code=422, detail=str(e))
 
         svg = REGISTRY.render_svg(rec, context)
-        with open(svg_path, "w", encoding="utf-8") as f:
+        with stage("write"), open(svg_path, "w", encoding="utf-8") as f:
             f.write(svg)
 
         # meta για debug
@@ -324,14 +313,23 @@ def preview(req: Request, payload: PreviewIn, current_user: User = Depends(get_c
     return {"preview_url": f"/static/generated/previews/{svg_name}"}
 
 @router.post("/commit")
-def commit(req: Request, body: CommitIn, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    _check_rate(current_user.id, "commit", limit=20, period_sec=3600)
-
-    if current_user.credits is None or current_user.credits < 1:
-        raise HTTPException(status_code=402, detail="Not enough credits")
-    # χρέωση πρώτα (debounce spam)
-    current_user.credits -= 1
-    db.add(current_user); db.commit(); db.refresh(current_user)
+def commit(req: Request, body: CommitIn, response: Response, db: Session = Depends(get_db),
+           current_user: User = Depends(get_current_user)):
+    _check_rate(current_user.id, "commit", limit=20, period_sec=3600, response=response)
+
+    # χρέωση πρώτα (debounce spam)· conditional UPDATE όπως το /me/use-credit: ταυτόχρονα
+    # commits δεν χάνουν χρεώσεις και δεν πάνε κάτω από 0
+    with stage("db_credits"):
+        res = db.execute(
+            update(User)
+            .where(User.id == current_user.id, User.credits >= 1)
+            .values(credits=User.credits - 1)
+        )
+        if res.rowcount != 1:
+            db.rollback()
+            raise HTTPException(status_code=402, detail="Not enough credits")
+        db.commit()
+        db.refresh(current_user)
 
     static_dir = _static_dir(req.app)
     normalized_path = _normalize_preview_url_to_static_path(body.preview_url)
@@ -354,5 +352,6 @@ def commit(req: Request, body: CommitIn, db: Session = Depends(get_db), current_
         try: setattr(post, "title", "Autoposter Image")
         except Exception: pass
 
-    db.add(post); db.commit(); db.refresh(post)
+    with stage("db_post"):
+        db.add(post); db.commit(); db.refresh(post)
     return {"post_id": post.id, "media_urls": media_urls, "credits_left": current_user.credits}
@@ -2,6 +2,8 @@ import os
 from typing import List, Tuple, Optional
 from PIL import Image, ImageDraw, ImageFont
 
+from production_engine.tracing import stage, traced
+
 FONT_DIR = os.path.join(os.path.dirname(__file__), "..", "assets", "fonts")
 SYSTEM_FONT_DIRS = [
     "/usr/share/fonts/truetype/noto",
@@ -59,6 +61,7 @@ def _wrap_text_by_width(text: str, font: ImageFont.FreeTypeFont, max_width: int,
         if line: lines.append(line)
     return lines
 
+@traced("text_layout")
 def render_text_block(
     draw: ImageDraw.ImageDraw,
     xy: Tuple[int, int],
@@ -90,8 +93,7 @@ def render_text_block(
         y += lh
     return y
 
-def render_image_greek(
-    out_path: str,
+def compose_image_greek(
     *,
     size=(1080, 1350),
     bg=(13, 18, 32),
@@ -99,7 +101,8 @@ def render_image_greek(
     price="",
     cta="Δες περισσότερα",
     brand_logo_path: Optional[str] = None,
-) -> str:
+) -> Image.Image:
+    """Το image του render_image_greek στη μνήμη (χωρίς encode/γράψιμο)."""
     im = Image.new("RGB", size, bg)
     draw = ImageDraw.Draw(im)
     title_fnt = load_font(60, bold=True)
@@ -117,14 +120,20 @@ def render_image_greek(
 
     if brand_logo_path and os.path.isfile(brand_logo_path):
         try:
-            logo = Image.open(brand_logo_path).convert("RGBA")
+            with stage("decode"):
+                logo = Image.open(brand_logo_path).convert("RGBA")
             maxw = 240
             ratio = min(maxw / logo.width, 1.0)
             new_size = (int(logo.width * ratio), int(logo.height * ratio))
-            logo = logo.resize(new_size, Image.LANCZOS)
+            with stage("resize"):
+                logo = logo.resize(new_size, Image.LANCZOS)
             im.paste(logo, (size[0] - new_size[0] - 64, 64), logo)
         except Exception:
             pass
+    return im
 
-    im.save(out_path, "PNG", optimize=True)
+def render_image_greek(out_path: str, **kwargs) -> str:
+    im = compose_image_greek(**kwargs)
+    with stage("encode"):
+        im.save(out_path, "PNG", optimize=True)
     return out_path
@@ -0,0 +1,24 @@
+"""Ένα threading.Lock ανά κλειδί (π.χ. cache key), που απελευθερώνεται όταν δεν το κρατάει κανείς."""
+import threading
+import weakref
+
+
+class _KeyLock:
+    __slots__ = ("lock", "__weakref__")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+
+class KeyedLocks:
+    def __init__(self):
+        self._locks: "weakref.WeakValueDictionary[str, _KeyLock]" = weakref.WeakValueDictionary()
+        self._guard = threading.Lock()
+
+    def get(self, key: str) -> _KeyLock:
+        """Κράτα το αποτέλεσμα σε μεταβλητή όσο χρειάζεσαι το lock (`with kl.lock:`)."""
+        with self._guard:
+            kl = self._locks.get(key)
+            if kl is None:
+                kl = self._locks[key] = _KeyLock()
+            return kl
@@ -0,0 +1,193 @@
+"""
+Text-to-speech για τα captions των video, με cache στον δίσκο.
+
+Backends (TTS_BACKEND):
+  gtts     Google TTS μέσω gTTS (δίκτυο, mp3)· το `voice` είναι το tld (com, gr, ...) (default)
+  offline  τοπικό WAV χωρίς δίκτυο (τόνοι ανά λέξη)· μόνο για tests/benchmarks, με ρητό TTS_BACKEND=offline
+Αν το backend που ζητήθηκε δεν φορτώνει (π.χ. λείπει το gTTS) -> RuntimeError, όχι σιωπηλό fallback
+σε "μπιπ" αντί για φωνή. Νέο backend: register_backend("name", factory).
+
+caption_audio(text, lang, voice) -> path στο TTS_CACHE_DIR, με κλειδί το hash των
+(backend, text, lang, voice). Ίδιο caption σε πολλά videos = μία σύνθεση. Ένα synth ανά
+κλειδί (per-key lock), γράψιμο σε μοναδικό temp + os.replace, και LRU eviction όταν το
+μέγεθος του cache ξεπεράσει το TTS_CACHE_MAX_BYTES.
+
+Το eviction δεν σβήνει αρχεία που χρησιμοποιούνται: όσο κρατάς `with pinned_caption_audio(...) as path:`
+το αρχείο είναι pinned σε αυτό το process, και αρχεία με mtime μέσα στο TTS_EVICT_GRACE_SEC
+(κάθε hit κάνει touch) δεν σβήνονται από κανένα process.
+"""
+import array
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+import wave
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from production_engine.services.keyed_locks import KeyedLocks
+
+logger = logging.getLogger(__name__)
+
+TTS_BACKEND = os.getenv("TTS_BACKEND", "gtts")
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "media_cache", "tts")
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+TTS_EVICT_GRACE_SEC = float(os.getenv("TTS_EVICT_GRACE_SEC", "600"))  # > διάρκεια ενός video render
+
+
+# ---------- backends ----------
+class GTTSBackend:
+    name = "gtts"
+    ext = "mp3"
+
+    def __init__(self):
+        from gtts import gTTS  # optional dependency
+        self._gtts = gTTS
+
+    def synthesize(self, text: str, lang: str, voice: Optional[str], out_path: str) -> None:
+        self._gtts(text, lang=lang, tld=voice or "com").save(out_path)
+
+
+class OfflineBackend:
+    """Ντετερμινιστικό WAV (16kHz mono): ένας τόνος ανά λέξη, ~0.3s/λέξη."""
+    name = "offline"
+    ext = "wav"
+    rate = 16000
+
+    def synthesize(self, text: str, lang: str, voice: Optional[str], out_path: str) -> None:
+        words = text.split() or [""]
+        samples = array.array("h")
+        for word in words[:200]:
+            digest = hashlib.md5(f"{voice}:{word}".encode("utf-8")).digest()
+            freq = 180 + digest[0] * 2
+            n = int(self.rate * 0.25)
+            for i in range(n):
+                env = math.sin(math.pi * i / n)  # fade in/out ανά λέξη
+                samples.append(int(8000 * env * math.sin(2 * math.pi * freq * i / self.rate)))
+            samples.extend([0] * int(self.rate * 0.05))
+        with wave.open(out_path, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(self.rate)
+            wf.writeframes(samples.tobytes())
+
+
+BACKENDS: dict[str, Callable[[], object]] = {"gtts": GTTSBackend, "offline": OfflineBackend}
+_backends: dict[str, object] = {}
+_backends_lock = threading.Lock()
+
+
+def register_backend(name: str, factory: Callable[[], object]) -> None:
+    BACKENDS[name] = factory
+    _backends.pop(name, None)
+
+
+def get_backend(name: Optional[str] = None):
+    name = name or TTS_BACKEND
+    with _backends_lock:
+        if name in _backends:
+            return _backends[name]
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown TTS backend {name!r} (choose from {sorted(BACKENDS)})")
+        try:
+            backend = BACKENDS[name]()
+        except ImportError as e:
+            raise RuntimeError(f"TTS backend {name!r} is not available ({e}); "
+                               f"install it (requirements.txt) or set TTS_BACKEND") from e
+        _backends[name] = backend
+        return backend
+
+
+# ---------- cache ----------
+_synth_locks = KeyedLocks()
+_evict_lock = threading.Lock()
+_pinned: Counter = Counter()  # path -> πόσοι callers το χρησιμοποιούν τώρα (guarded by _evict_lock)
+
+
+def audio_cache_key(backend_name: str, text: str, lang: str, voice: Optional[str]) -> str:
+    raw = "\x1f".join([backend_name, lang, voice or "", text])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _enforce_limit(keep: str, max_bytes: int, grace: Optional[float] = None) -> int:
+    """
+    LRU (mtime· τα hits κάνουν touch) μέχρι το cache να χωράει στο max_bytes. Παραλείπει το `keep`,
+    τα pinned και όσα άγγιξε κάποιος τα τελευταία `grace` sec. Επιστρέφει πόσα σβήστηκαν.
+    """
+    grace = TTS_EVICT_GRACE_SEC if grace is None else grace
+    with _evict_lock:
+        try:
+            entries = [e for e in os.scandir(TTS_CACHE_DIR) if e.is_file() and not e.name.startswith(".tmp-")]
+        except FileNotFoundError:
+            return 0
+        stats = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in entries]
+        total = sum(size for _, size, _ in stats)
+        cutoff = time.time() - grace
+        removed = 0
+        for mtime, size, path in sorted(stats):
+            if total <= max_bytes or mtime > cutoff:
+                break  # ταξινομημένα κατά mtime: από εδώ και πέρα όλα είναι πρόσφατα
+            if path == keep or _pinned[path]:
+                continue
+            try:
+                os.unlink(path)
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+def caption_audio(text: str, lang: str = "el", voice: Optional[str] = None, *,
+                  backend: Optional[str] = None, max_bytes: Optional[int] = None) -> str:
+    """
+    Path σε audio για το `text` (από το cache ή νέα σύνθεση). Προστατεύεται από eviction μόνο για
+    TTS_EVICT_GRACE_SEC· για χρήση που μπορεί να κρατήσει περισσότερο, pinned_caption_audio.
+    """
+    be = get_backend(backend)
+    key = audio_cache_key(be.name, text, lang, voice)
+    path = os.path.join(TTS_CACHE_DIR, f"{key}.{be.ext}")
+    if os.path.exists(path):
+        try:
+            os.utime(path)  # LRU
+            return path
+        except OSError:
+            pass  # σβήστηκε μόλις τώρα από eviction: ξαναφτιάχνεται
+    kl = _synth_locks.get(key)
+    with kl.lock:
+        if os.path.exists(path):
+            return path
+        os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+        tmp = os.path.join(TTS_CACHE_DIR, f".tmp-{uuid.uuid4().hex}.{be.ext}")
+        t0 = time.perf_counter()
+        try:
+            be.synthesize(text, lang, voice, tmp)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        logger.info("tts %s synthesized %d chars in %.0fms", be.name, len(text), (time.perf_counter() - t0) * 1000)
+    _enforce_limit(path, TTS_CACHE_MAX_BYTES if max_bytes is None else max_bytes)
+    return path
+
+
+@contextmanager
+def pinned_caption_audio(text: str, lang: str = "el", voice: Optional[str] = None, *,
+                         backend: Optional[str] = None, max_bytes: Optional[int] = None):
+    """Σαν caption_audio, αλλά το αρχείο δεν σβήνεται από το eviction όσο είμαστε μέσα στο with."""
+    be = get_backend(backend)
+    path = os.path.join(TTS_CACHE_DIR, f"{audio_cache_key(be.name, text, lang, voice)}.{be.ext}")
+    with _evict_lock:  # pin πριν το lookup: ανάμεσα στα δύο δεν μπορεί να σβηστεί
+        _pinned[path] += 1
+    try:
+        yield caption_audio(text, lang, voice, backend=backend, max_bytes=max_bytes)
+    finally:
+        with _evict_lock:
+            _pinned[path] -= 1
+            if not _pinned[path]:
+                del _pinned[path]
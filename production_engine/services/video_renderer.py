@@ -1,4 +1,199 @@
+"""
+Video encoding με ffmpeg subprocess (αντί για moviepy clips).
+
+Τα frames φτιάχνονται με PIL και περνάνε ως raw RGB στο stdin του ffmpeg:
+- encode_still(): ΕΝΑ frame + loop filter για όλη τη διάρκεια (τα περισσότερα ads είναι
+  στατική εικόνα· ο x264 με -tune stillimage κωδικοποιεί τα ίδια frames σχεδόν δωρεάν)
+- encode_frames(): ροή από frames (animation), χωρίς να κρατιούνται όλα στη μνήμη
+Δεν γράφονται προσωρινά JPEG/PNG· το mp4 γράφεται σε temp δίπλα στο output και μπαίνει
+στη θέση του με os.replace.
+
+Ρυθμίσεις: VIDEO_FPS, VIDEO_PRESET (x264 preset), VIDEO_CRF, FFMPEG_BIN.
+
+Cache: cached_video() κρατάει τα mp4 με όνομα το hash των inputs (video_cache_key)· ίδια
+inputs -> ίδιο αρχείο, χωρίς νέο encode. Ένας render ανά key σε κάθε process (per-key lock)·
+μεταξύ processes το χειρότερο είναι δύο ίδια encodes, αφού το publish είναι atomic.
+"""
+import hashlib
+import json
+import os
+import shutil
+import subprocess
 import uuid
+from typing import Callable, Iterable, Optional
+
+from PIL import Image
+
+from production_engine.services.keyed_locks import KeyedLocks
+
+VIDEO_FPS = int(os.getenv("VIDEO_FPS", "24"))
+VIDEO_PRESET = os.getenv("VIDEO_PRESET", "veryfast")
+VIDEO_CRF = int(os.getenv("VIDEO_CRF", "23"))
+VIDEO_CACHE_DIR = os.getenv("VIDEO_CACHE_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "media_cache", "videos")
+VIDEO_CACHE_VERSION = 1  # αύξησέ το όταν αλλάζει το layout των frames, ώστε να μην ξαναχρησιμοποιηθούν παλιά
+
+
+class VideoEncodeError(RuntimeError):
+    pass
+
+
+def ffmpeg_exe() -> str:
+    """FFMPEG_BIN -> ffmpeg στο PATH -> το binary του imageio-ffmpeg (είναι στα requirements)."""
+    exe = os.getenv("FFMPEG_BIN") or shutil.which("ffmpeg")
+    if exe:
+        return exe
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception as e:
+        raise VideoEncodeError(f"ffmpeg not found (set FFMPEG_BIN): {e}")
+
+
+def _even_rgb(im: Image.Image) -> Image.Image:
+    # yuv420p θέλει ζυγές διαστάσεις
+    im = im.convert("RGB")
+    w, h = im.width - im.width % 2, im.height - im.height % 2
+    return im if (w, h) == im.size else im.crop((0, 0, w, h))
+
+
+def _x264_args(preset: str, crf: int, tune: Optional[str]) -> list[str]:
+    args = ["-c:v", "libx264", "-preset", preset, "-crf", str(crf), "-pix_fmt", "yuv420p"]
+    if tune:
+        args += ["-tune", tune]
+    return args + ["-movflags", "+faststart"]
+
+
+def _encode(input_args: list[str], output_args: list[str], out_path: str, feed) -> str:
+    """Τρέχει ffmpeg -> temp mp4 στο ίδιο dir, feed(stdin) γράφει τα frames, μετά os.replace."""
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    os.makedirs(out_dir, exist_ok=True)
+    tmp = os.path.join(out_dir, f".tmp-{uuid.uuid4().hex}.mp4")
+    cmd = [ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-y",
+           *input_args, *output_args, "-f", "mp4", tmp]
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        try:
+            feed(proc.stdin)
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass  # το ffmpeg τερμάτισε νωρίς· το σφάλμα είναι στο stderr
+        err = proc.stderr.read().decode("utf-8", "replace")
+        if proc.wait() != 0:
+            raise VideoEncodeError(f"ffmpeg exited with {proc.returncode}: {err.strip()[-2000:]}")
+        os.replace(tmp, out_path)
+        return out_path
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def encode_still(
+    image: Image.Image,
+    out_path: str,
+    *,
+    duration: float,
+    fps: int = VIDEO_FPS,
+    audio_path: Optional[str] = None,
+    preset: str = VIDEO_PRESET,
+    crf: int = VIDEO_CRF,
+) -> str:
+    """Στατική εικόνα για `duration` sec (προαιρετικά με ήχο, κομμένο στη διάρκεια)."""
+    frame = _even_rgb(image)
+    inputs = ["-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{frame.width}x{frame.height}",
+              "-framerate", str(fps), "-i", "pipe:0"]
+    outputs = ["-vf", "loop=loop=-1:size=1:start=0", "-t", f"{duration:.3f}", "-r", str(fps)]
+    if audio_path:
+        inputs += ["-i", audio_path]
+        outputs += ["-map", "0:v", "-map", "1:a", "-c:a", "aac", "-b:a", "128k"]
+    outputs += _x264_args(preset, crf, tune="stillimage")
+    data = frame.tobytes()
+    return _encode(inputs, outputs, out_path, lambda stdin: stdin.write(data))
+
+
+def encode_frames(
+    frames: Iterable[Image.Image],
+    out_path: str,
+    *,
+    size: tuple[int, int],
+    fps: int = VIDEO_FPS,
+    audio_path: Optional[str] = None,
+    preset: str = VIDEO_PRESET,
+    crf: int = VIDEO_CRF,
+) -> str:
+    """Ροή frames (ίδιου μεγέθους `size`, ζυγές διαστάσεις) -> mp4."""
+    w, h = size
+    if w % 2 or h % 2:
+        raise ValueError("size must have even dimensions")
+    inputs = ["-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{w}x{h}", "-framerate", str(fps), "-i", "pipe:0"]
+    outputs = []
+    if audio_path:
+        inputs += ["-i", audio_path]
+        outputs += ["-map", "0:v", "-map", "1:a", "-c:a", "aac", "-b:a", "128k", "-shortest"]
+    outputs += _x264_args(preset, crf, tune=None)
+
+    def feed(stdin):
+        for im in frames:
+            if im.size != (w, h):
+                raise ValueError(f"frame size {im.size} != {size}")
+            stdin.write(im.convert("RGB").tobytes())
+
+    return _encode(inputs, outputs, out_path, feed)
+
+
+# ---------- cache ----------
+def video_cache_key(kind: str, **inputs) -> str:
+    """sha256 των inputs (product fields, template, duration, caption/φωνή ...) + ρυθμίσεων encoder."""
+    payload = {"kind": kind, "v": VIDEO_CACHE_VERSION, "fps": VIDEO_FPS, "preset": VIDEO_PRESET,
+               "crf": VIDEO_CRF, "inputs": inputs}
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+_render_locks = KeyedLocks()
+
+
+def cached_video(key: str, render: Callable[[str], object], cache_dir: Optional[str] = None) -> tuple[str, bool]:
+    """
+    <cache_dir>/<key>.mp4: αν υπάρχει επιστρέφεται αμέσως, αλλιώς render(path) (π.χ. encode_still,
+    που γράφει σε μοναδικό temp + os.replace). Επιστρέφει (path, hit).
+    """
+    path = os.path.join(cache_dir or VIDEO_CACHE_DIR, f"{key}.mp4")
+    if os.path.exists(path):
+        return path, True
+    kl = _render_locks.get(key)
+    with kl.lock:
+        if os.path.exists(path):  # το έφτιαξε άλλο thread όσο περιμέναμε
+            return path, True
+        render(path)
+    return path, False
+
+
+def publish_copy(src: str, dst: str) -> str:
+    """Αντίγραφο (ή hard link) του src στο dst, atomic: μοναδικό temp + os.replace."""
+    dst_dir = os.path.dirname(os.path.abspath(dst))
+    os.makedirs(dst_dir, exist_ok=True)
+    tmp = os.path.join(dst_dir, f".tmp-{uuid.uuid4().hex}{os.path.splitext(dst)[1]}")
+    try:
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    return dst
+
+
+def fit_height(im: Image.Image, height: int) -> Image.Image:
+    """Resize με σταθερό aspect ratio στο `height` (ζυγό πλάτος)."""
+    w = max(2, round(im.width * height / im.height))
+    return im.resize((w - w % 2, height), Image.LANCZOS)
+
 
 def render_video_preview(template_id: int, payload: dict) -> dict:
     """
@@ -0,0 +1,205 @@
+"""
+Ελαφρύ tracing του render pipeline: χρόνος ανά stage (db, fetch, decode, resize, text layout,
+svg template, rasterize, encode/write).
+
+    from production_engine.tracing import stage, traced
+
+    with stage("decode"):
+        im = Image.open(path).convert("RGBA")
+
+    @traced("svg_template")
+    def render_svg(...): ...
+
+Κάθε stage πάει:
+  - στο trace του τρέχοντος request (contextvar) -> header `Server-Timing` από το TracingMiddleware
+  - σε process-wide histograms -> GET /metrics (Prometheus text format, production_engine/routers/metrics.py)
+  - SLOW_RENDER_MS > 0: requests πιο αργά από το όριο γράφονται στο log "production_engine.slow_render"
+    με το breakdown ανά stage (opt-in, default off)
+Εκτός request (render worker, scripts) τα stages μετράνε μόνο στα histograms.
+Nested stages δεν μετράνε διπλά: ένα stage μέσα σε stage με το ΙΔΙΟ όνομα δεν καταγράφεται
+(π.χ. text_layout μέσα σε text_layout), και ένα stage με άλλο όνομα αφαιρείται από τον χρόνο
+του εξωτερικού (κάθε stage καταγράφει μόνο τον δικό του χρόνο), οπότε το άθροισμα <= total.
+"""
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+slow_logger = logging.getLogger("production_engine.slow_render")
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") not in ("0", "false", "False")
+SLOW_RENDER_MS = float(os.getenv("SLOW_RENDER_MS", "0"))  # 0 = χωρίς slow log
+
+# seconds, όπως θέλει το Prometheus
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# ---------- histograms ----------
+class Histogram:
+    """Cumulative histogram ανά tuple από labels (thread-safe)."""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series: dict[tuple, list] = {}  # labels -> [counts ανά bucket, sum, count]
+
+    def observe(self, seconds: float, *labels) -> None:
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, le in enumerate(self.buckets):
+                if seconds <= le:
+                    s[0][i] += 1
+            s[1] += seconds
+            s[2] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {labels: (list(c), total, n) for labels, (c, total, n) in self._series.items()}
+
+    def exposition(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, n) in sorted(self.snapshot().items()):
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, labels))
+            sep = "," if base else ""
+            for le, c in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{le}"}} {c}')
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {n}')
+            lines.append(f"{self.name}_sum{{{base}}} {total:.6f}" if base else f"{self.name}_sum {total:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {n}" if base else f"{self.name}_count {n}")
+        return lines
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+STAGE_SECONDS = Histogram("autoposter_render_stage_seconds",
+                          "Duration of render pipeline stages.", ("stage",))
+REQUEST_SECONDS = Histogram("autoposter_http_request_duration_seconds",
+                            "Duration of traced HTTP requests (until response headers).", ("method", "route"))
+
+
+# ---------- per-request trace ----------
+class Trace:
+    """Χρόνοι ανά stage για ένα request· ίδιο stage πολλές φορές (π.χ. ένα text slot) αθροίζεται."""
+
+    __slots__ = ("t0", "stages", "_lock")
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.stages: dict[str, list] = {}  # name -> [seconds, count]
+        self._lock = threading.Lock()  # τα sync endpoints τρέχουν σε threadpool
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            s = self.stages.setdefault(name, [0.0, 0])
+            s[0] += seconds
+            s[1] += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.t0
+
+    def server_timing(self, total: float) -> str:
+        parts = [f"{name};dur={sec * 1000:.1f}" for name, (sec, _) in self.stages.items()]
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("render_trace", default=None)
+# ανοιχτά stages στο τρέχον context: (name, [χρόνος των nested stages])
+_open: contextvars.ContextVar[tuple] = contextvars.ContextVar("render_stages", default=())
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str):
+    stack = _open.get()
+    if any(open_name == name for open_name, _ in stack):
+        yield  # ήδη μέσα στο ίδιο stage: μετράει στο εξωτερικό
+        return
+    children = [0.0]
+    token = _open.set(stack + ((name, children),))
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t0
+        _open.reset(token)
+        if stack:
+            stack[-1][1][0] += dt  # ο γονιός αφαιρεί αυτόν τον χρόνο από τον δικό του
+        own = max(0.0, dt - children[0])
+        STAGE_SECONDS.observe(own, name)
+        tr = _current.get()
+        if tr is not None:
+            tr.add(name, own)
+
+
+def traced(name: str):
+    """Decorator: όλη η συνάρτηση μετράει ως ένα stage."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+# ---------- ASGI middleware ----------
+class TracingMiddleware:
+    """
+    Ανοίγει ένα Trace ανά HTTP request, γράφει Server-Timing στην απάντηση και μετρά τη διάρκεια
+    στο REQUEST_SECONDS (label: το route template, όχι το path, ώστε να μην εκρήγνυται το cardinality).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        tr = Trace()
+        token = _current.set(tr)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                total = tr.elapsed()
+                route = scope.get("route")
+                REQUEST_SECONDS.observe(total, scope.get("method", ""), getattr(route, "path", None) or "unmatched")
+                if SERVER_TIMING:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", tr.server_timing(total).encode("latin-1")))
+                    message = {**message, "headers": headers}
+                if SLOW_RENDER_MS and tr.stages and total * 1000 >= SLOW_RENDER_MS:
+                    breakdown = " ".join(f"{n}={s * 1000:.0f}ms/{c}" for n, (s, c) in
+                                         sorted(tr.stages.items(), key=lambda kv: -kv[1][0]))
+                    slow_logger.warning("slow render %s %s %.0fms: %s", scope.get("method"),
+                                        scope.get("path"), total * 1000, breakdown)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+
+
+def prometheus_text() -> str:
+    """Όλα τα histograms του tracing σε Prometheus exposition format."""
+    return "\n".join(STAGE_SECONDS.exposition() + REQUEST_SECONDS.exposition()) + "\n"
@@ -0,0 +1,132 @@
+"""
+Render worker: διαβάζει jobs από την ουρά (production_engine/jobs.py) και τα εκτελεί.
+
+    python -m production_engine.worker                     # 2 processes, όλα τα kinds
+    python -m production_engine.worker -c 4 --kinds previews.render
+    python -m production_engine.worker --once              # αδειάζει την ουρά και βγαίνει
+
+Τρέχει από το root του repo (όπως ο server), ώστε τα static paths να είναι ίδια.
+SIGTERM/SIGINT: κάθε process τελειώνει το τρέχον job και σταματά.
+"""
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+
+logger = logging.getLogger("production_engine.worker")
+
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "0.5"))  # sec όταν η ουρά είναι άδεια
+WORKER_PURGE_EVERY = 600.0  # sec ανάμεσα σε καθαρισμούς παλιών jobs
+
+
+def _run_one(job: dict, worker_id: str, visibility: float) -> None:
+    from production_engine import jobs
+
+    stop = threading.Event()
+
+    def beat():
+        # heartbeat στο 1/3 του lease, για όσο τρέχει ο handler
+        while not stop.wait(visibility / 3):
+            if not jobs.heartbeat(job["id"], worker_id, visibility):
+                return
+
+    hb = threading.Thread(target=beat, name=f"hb-{job['id'][:8]}", daemon=True)
+    hb.start()
+    t0 = time.perf_counter()
+    try:
+        fn = jobs.HANDLERS.get(job["kind"])
+        if fn is None:
+            raise jobs.JobError(f"no handler for kind {job['kind']!r}")
+        with jobs.running(job["id"], worker_id):
+            result = fn(job["payload"])
+        stop.set()
+        jobs.complete(job["id"], worker_id, result if isinstance(result, dict) else {"result": result})
+        logger.info("job %s %s done in %.0fms", job["id"], job["kind"], (time.perf_counter() - t0) * 1000)
+    except jobs.JobError as e:
+        stop.set()
+        jobs.fail(job["id"], worker_id, str(e), retry=False)
+        logger.info("job %s %s rejected: %s", job["id"], job["kind"], e)
+    except Exception as e:
+        stop.set()
+        status = jobs.fail(job["id"], worker_id, f"{type(e).__name__}: {e}")
+        logger.warning("job %s %s attempt %s failed (%s): %s\n%s", job["id"], job["kind"],
+                       job["attempts"], status, e, traceback.format_exc())
+    finally:
+        hb.join(timeout=1)
+
+
+def run_worker(worker_id: str, kinds=None, *, once: bool = False,
+               stop_event=None, poll_interval: float = WORKER_POLL_INTERVAL) -> int:
+    """Κύριος βρόχος ενός worker. Επιστρέφει πόσα jobs εκτέλεσε."""
+    from production_engine import jobs, job_handlers  # noqa: F401  (καταχωρεί τους handlers)
+    from production_engine.engine_database import require_schema
+    from services import image_generation
+
+    require_schema()
+    if image_generation.TEMPLATE_PRELOAD:
+        image_generation.preload_templates()
+
+    done = 0
+    last_purge = 0.0
+    while stop_event is None or not stop_event.is_set():
+        if time.monotonic() - last_purge > WORKER_PURGE_EVERY:
+            last_purge = time.monotonic()
+            try:
+                jobs.purge_finished()
+            except Exception as e:
+                logger.warning("purge failed: %s", e)
+        job = jobs.claim(worker_id, kinds)
+        if job is None:
+            if once:
+                break
+            if stop_event is not None:
+                stop_event.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+            continue
+        _run_one(job, worker_id, jobs.JOB_VISIBILITY_TIMEOUT)
+        done += 1
+    return done
+
+
+def _process_main(index: int, kinds, once: bool, stop_event) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # ο parent χειρίζεται το Ctrl-C
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(message)s")
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    n = run_worker(worker_id, kinds, once=once, stop_event=stop_event)
+    logger.info("worker %s exiting after %s jobs", worker_id, n)
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("-c", "--concurrency", type=int, default=int(os.getenv("WORKER_CONCURRENCY", "2")))
+    p.add_argument("--kinds", default="", help="comma-separated (default: όλα)")
+    p.add_argument("--once", action="store_true", help="έξοδος όταν αδειάσει η ουρά")
+    a = p.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(message)s")
+    kinds = [k.strip() for k in a.kinds.split(",") if k.strip()] or None
+
+    ctx = mp.get_context("spawn")  # καθαρά processes: όχι κληρονομημένα DB connections/threads
+    stop_event = ctx.Event()
+    procs = [ctx.Process(target=_process_main, args=(i, kinds, a.once, stop_event), name=f"render-worker-{i}")
+             for i in range(max(1, a.concurrency))]
+    for proc in procs:
+        proc.start()
+
+    def shutdown(signum, frame):
+        logger.info("signal %s: stopping workers after current jobs", signum)
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    for proc in procs:
+        proc.join()
+
+
+if __name__ == "__main__":
+    main()
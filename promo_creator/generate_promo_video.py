@@ -1,6 +1,10 @@
-from moviepy.editor import *
 from PIL import Image, ImageDraw, ImageFont
 import os
+import sys
+
+# τρέχει και ως script μέσα από το promo_creator/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from production_engine.services.video_renderer import encode_still  # noqa: E402
 
 def generate_promo_video(product_name, price, image_path, logo_path=None, output_path="promo_video.mp4"):
     # Ρυθμίσεις
@@ -26,22 +30,9 @@ def generate_promo_video(product_name, price, image_path, logo_path=None, output
     # Σχεδίαση CTA
     draw.text((50, 220), "Αγόρασέ το τώρα! 👉", font=font_cta, fill="lightgreen")
 
-    # Αποθήκευση προσωρινής εικόνας
-    temp_img_path = "temp_promo_image.jpg"
-    img.save(temp_img_path)
-
-    # Δημιουργία video από εικόνα
-    clip = ImageClip(temp_img_path).set_duration(5)
-
-    # Προσθήκη μουσικής (προαιρετικά)
-    # audio = AudioFileClip("music.mp3").subclip(0, 5)
-    # clip = clip.set_audio(audio)
-
-    # Τελική απόδοση
-    clip.write_videofile(output_path, fps=24)
-
-    # Καθαρισμός
-    os.remove(temp_img_path)
+    # Video από την εικόνα: ένα frame στο ffmpeg, loop για 5s (χωρίς προσωρινό JPEG)
+    # Μουσική (προαιρετικά): encode_still(..., audio_path="music.mp3")
+    encode_still(img, output_path, duration=5, fps=24)
     print(f"✅ Promo video saved as {output_path}")
 
 # Δοκιμή
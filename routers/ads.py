@@ -1,26 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from database import get_db
-from models import Product
-from services.generator import generate_ad_content, generate_carousel_images, generate_video_ad
-from routers.auth import get_current_user, User
+from database import get_read_db
+from models import Product, User
+from token_module import get_current_user_readonly
+from production_engine import jobs
 
 router = APIRouter()
 
-@router.post("/me/products/{product_id}/generate-ad")
-def generate_ad(product_id: int, post_type: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    product = db.query(Product).filter(Product.id == product_id, Product.user_id == current_user.id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-
-    if post_type == "image":
-        url = generate_ad_content(product, post_type)
-    elif post_type == "carousel":
-        urls = generate_carousel_images(product)
-        return {"urls": urls}
-    elif post_type == "video":
-        url = generate_video_ad(product)
-    else:
+@router.post("/me/products/{product_id}/generate-ad", status_code=202)
+def generate_ad(product_id: int, post_type: str, db: Session = Depends(get_read_db),
+                current_user: User = Depends(get_current_user_readonly)):
+    # Το render (ειδικά το video) γίνεται στον production_engine.worker· εδώ μόνο enqueue
+    if post_type not in ("image", "carousel", "video"):
         raise HTTPException(status_code=400, detail="Invalid post_type. Choose from 'image', 'carousel', 'video'.")
+    exists = db.query(Product.id).filter(Product.id == product_id, Product.owner_id == current_user.id).first()
+    if not exists:
+        raise HTTPException(status_code=404, detail="Product not found")
 
-    return {"url": url}
+    job_id = jobs.enqueue(
+        "ads.generate",
+        {"product_id": product_id, "post_type": post_type, "owner_id": current_user.id},
+        owner_id=current_user.id,
+        priority=jobs.PRIORITIES["bulk" if post_type == "video" else "default"],
+    )
+    return {"job_id": job_id, "status": jobs.QUEUED, "status_url": f"/jobs/{job_id}"}
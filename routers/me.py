@@ -1,15 +1,15 @@
 # routers/me.py
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from fastapi.responses import FileResponse
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-import os, json, uuid, time
+import os, uuid, time
 
 from database import get_db
 from models import User, Post
-from token_module import get_current_user
-
-from cairosvg import svg2png  # να είναι εγκατεστημένο
+from models.credit_transaction import CreditTransaction
+from token_module import get_current_user, get_current_user_readonly
 
 router = APIRouter(prefix="/me", tags=["me"])
 
@@ -22,12 +22,31 @@ class WooCreds(BaseModel):
 
 # ---------- Credits ----------
 @router.get("/credits")
-def credits(current_user: User = Depends(get_current_user)):
+def credits(current_user: User = Depends(get_current_user_readonly)):
     return {"credits": int(current_user.credits or 0)}
 
+@router.post("/use-credit")
+def use_credit(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    Χρέωση 1 credit (το καλεί το /previews/commit μέσω CREDITS_DEBIT_URL).
+    Ένα conditional UPDATE: ταυτόχρονα commits δεν χάνουν χρεώσεις και δεν πάνε κάτω από 0.
+    """
+    res = db.execute(
+        update(User)
+        .where(User.id == current_user.id, User.credits >= 1)
+        .values(credits=User.credits - 1)
+    )
+    if res.rowcount != 1:
+        db.rollback()
+        raise HTTPException(status_code=402, detail="Not enough credits")
+    db.add(CreditTransaction(user_id=current_user.id, type="use", amount=1, description="preview commit"))
+    db.commit()
+    left = db.execute(select(User.credits).where(User.id == current_user.id)).scalar_one()
+    return {"ok": True, "credits": int(left or 0)}
+
 # ---------- Woo credentials ----------
 @router.get("/woocommerce-credentials")
-def get_wc(current_user: User = Depends(get_current_user)):
+def get_wc(current_user: User = Depends(get_current_user_readonly)):
     return {
         "url": current_user.woocommerce_url,
         "ck": current_user.consumer_key,
@@ -49,31 +68,7 @@ def set_wc(body: WooCreds, db: Session = Depends(get_db), current_user: User = D
     db.refresh(current_user)
     return {"ok": True}
 
-# ---------- Posts list ----------
-@router.get("/posts")
-def my_posts(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    rows = (
-        db.query(Post)
-        .filter(Post.owner_id == current_user.id)
-        .order_by(Post.id.desc())
-        .limit(50)
-        .all()
-    )
-    out = []
-    for p in rows:
-        try:
-            media = json.loads(p.media_urls) if isinstance(p.media_urls, str) else (p.media_urls or [])
-        except Exception:
-            media = []
-        out.append({
-            "id": p.id,
-            "title": getattr(p, "title", "") or "Autoposter Post",
-            "type": getattr(p, "type", "image"),
-            "status": getattr(p, "status", "pending"),
-            "created_at": getattr(p, "created_at", None),
-            "media_urls": media,
-        })
-    return out
+# /me/posts (λίστα/σελίδες): production_engine/routers/posts.py
 
 # ---------- PNG από SVG finals ----------
 @router.get("/posts/{post_id}/png")
@@ -82,10 +77,7 @@ def post_png(post_id: int, db: Session = Depends(get_db), current_user: User = D
     if not p:
         raise HTTPException(status_code=404, detail="post not found")
 
-    try:
-        media = json.loads(p.media_urls) if isinstance(p.media_urls, str) else (p.media_urls or [])
-    except Exception:
-        media = []
+    media = p.media_urls or []  # JSONList: ήδη list
     if not media:
         raise HTTPException(status_code=404, detail="no media")
 
@@ -113,6 +105,11 @@ def post_png(post_id: int, db: Session = Depends(get_db), current_user: User = D
     out_dir = os.path.join(static_dir, "generated", "png")
     os.makedirs(out_dir, exist_ok=True)
     out_path = os.path.join(out_dir, f"post_{post_id}.png")
+    # lazy: χωρίς cairosvg να λείπει μόνο αυτό το endpoint, όχι όλο το /me
+    try:
+        from cairosvg import svg2png
+    except Exception:
+        raise HTTPException(status_code=503, detail="cairosvg not available")
     svg2png(url=svg_path, write_to=out_path)
     return FileResponse(out_path, media_type="image/png", filename=f"post_{post_id}.png")
 
@@ -1,22 +1,92 @@
-from fastapi import APIRouter
-from typing import List
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import List, Optional
 
 router = APIRouter()
 
+# Τοπικό stand-in του WooCommerce REST API για tests/benchmarks:
+#   MOCK_WOO_PRODUCTS   μέγεθος καταλόγου (default 2 demo προϊόντα)
+#   MOCK_WOO_LATENCY_MS καθυστέρηση ανά σελίδα
+#   MOCK_WOO_FAIL_RATE  πιθανότητα 503 ανά αίτημα (για έλεγχο retries)
+MOCK_WOO_PRODUCTS = int(os.getenv("MOCK_WOO_PRODUCTS", "2"))
+MOCK_WOO_LATENCY_MS = float(os.getenv("MOCK_WOO_LATENCY_MS", "0"))
+MOCK_WOO_FAIL_RATE = float(os.getenv("MOCK_WOO_FAIL_RATE", "0"))
+
+# Το προϊόν i "τροποποιήθηκε" στο _BASE_MODIFIED + i sec, εκτός από όσα άλλαξαν μέσω /mock/catalog
+_BASE_MODIFIED = datetime(2025, 1, 1)
+_touched: dict[int, datetime] = {}
+_deleted: set[int] = set()
+
+def _modified_at(i: int) -> datetime:
+    return _touched.get(i, _BASE_MODIFIED + timedelta(seconds=i))
+
+def _mock_product(i: int) -> dict:
+    touched = i in _touched
+    return {
+        "id": i,
+        "name": f"Demo Product {i}",
+        "description": f"Περιγραφή demo προϊόντος {i}" + (" (ενημερωμένο)" if touched else ""),
+        "price": f"{10 + i % 90}.90",
+        "status": "publish",
+        "categories": [{"name": f"Κατηγορία {i % 7}"}],
+        "images": [{"src": "https://via.placeholder.com/150"}],
+        "date_modified_gmt": _modified_at(i).isoformat(timespec="seconds"),
+    }
+
 @router.get("/wp-json/wc/v3/products", response_model=List[dict])
-def mock_products():
-    # Επιστρέφει λίστα με demo προϊόντα
-    return [
-        {
-            "id": 1,
-            "name": "Demo Product 1",
-            "description": "Περιγραφή demo προϊόντος 1",
-            "images": [{"src": "https://via.placeholder.com/150"}]
-        },
-        {
-            "id": 2,
-            "name": "Demo Product 2",
-            "description": "Περιγραφή demo προϊόντος 2",
-            "images": [{"src": "https://via.placeholder.com/150"}]
-        },
-    ]
+def mock_products(
+    response: Response,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(10, ge=1, le=100),  # όπως το WooCommerce: default 10, max 100
+    modified_after: Optional[str] = None,
+    fields: Optional[str] = Query(None, alias="_fields"),
+):
+    if MOCK_WOO_FAIL_RATE and random.random() < MOCK_WOO_FAIL_RATE:
+        raise HTTPException(status_code=503, detail="mock upstream failure")
+    if MOCK_WOO_LATENCY_MS:
+        time.sleep(MOCK_WOO_LATENCY_MS / 1000)
+
+    if modified_after:
+        after = datetime.fromisoformat(modified_after.rstrip("Z"))
+        first = max(1, int((after - _BASE_MODIFIED).total_seconds()) + 1)
+        candidates = {i for i in range(first, MOCK_WOO_PRODUCTS + 1) if i not in _touched}
+        candidates.update(i for i, ts in _touched.items() if ts > after and i <= MOCK_WOO_PRODUCTS)
+        ids = sorted(candidates - _deleted)
+    else:
+        ids = [i for i in range(1, MOCK_WOO_PRODUCTS + 1) if i not in _deleted]
+
+    total = len(ids)
+    response.headers["X-WP-Total"] = str(total)
+    response.headers["X-WP-TotalPages"] = str(max(1, -(-total // per_page)))
+
+    start = (page - 1) * per_page
+    rows = [_mock_product(i) for i in ids[start:start + per_page]]
+    if fields:
+        keep = [f.strip() for f in fields.split(",")]
+        rows = [{k: r[k] for k in keep if k in r} for r in rows]
+    return rows
+
+@router.post("/wp-json/mock/catalog")
+def mock_catalog(
+    size: Optional[int] = Query(None, ge=0),
+    touch: Optional[str] = Query(None, description="ids (comma) που 'άλλαξαν' τώρα"),
+    delete: Optional[str] = Query(None, description="ids (comma) που διαγράφηκαν"),
+    reset: bool = False,
+):
+    """Βοηθητικό για tests: αλλαγές στον mock κατάλογο (μέγεθος, τροποποιήσεις, διαγραφές)."""
+    global MOCK_WOO_PRODUCTS
+    if reset:
+        _touched.clear()
+        _deleted.clear()
+    if size is not None:
+        MOCK_WOO_PRODUCTS = size
+    now = datetime.utcnow().replace(microsecond=0)
+    for i in filter(None, (touch or "").split(",")):
+        _touched[int(i)] = now
+    for i in filter(None, (delete or "").split(",")):
+        _deleted.add(int(i))
+    return {"size": MOCK_WOO_PRODUCTS, "touched": len(_touched), "deleted": len(_deleted)}
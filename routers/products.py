@@ -1,20 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select, literal
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Optional
 
-from database import get_db
+from database import get_db, get_read_db
 from models.product import Product
 from models.user import User
 from schemas import ProductCreate, ProductOut
-from token_module import get_current_user
+from token_module import get_current_user, get_current_user_readonly
 
 router = APIRouter(
     tags=["Products"]
 )
 
-@router.get("/", response_model=List[ProductOut])
-def get_products(db: Session = Depends(get_db)):
-    return db.query(Product).all()
+# Στήλες που επιτρέπεται να ζητηθούν με ?fields=
+LISTING_FIELDS = ("id", "name", "description", "price", "image_url", "categories",
+                  "available", "external_id", "updated_at")
+DEFAULT_FIELDS = ("id", "name", "description", "price", "image_url", "categories", "available")
+
+def _like_escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+@router.get("/me/products")
+@router.get("/", include_in_schema=False)
+def list_products(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[int] = Query(None, description="next_cursor της προηγούμενης σελίδας"),
+    fields: Optional[str] = Query(None, description="π.χ. id,name,image_url"),
+    category: Optional[str] = None,
+    available: Optional[bool] = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_readonly),
+):
+    """
+    Προϊόντα του χρήστη, keyset pagination στο (owner_id, id): κάθε σελίδα είναι ένα
+    range scan στο ix_products_owner_id_id, όσο βαθιά κι αν είναι (όχι OFFSET).
+    """
+    names = [f.strip() for f in fields.split(",")] if fields else list(DEFAULT_FIELDS)
+    unknown = [f for f in names if f not in LISTING_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown fields: {', '.join(unknown)}")
+    if "id" not in names:
+        names.insert(0, "id")  # χρειάζεται για το cursor
+
+    q = select(*(getattr(Product, f) for f in names)).where(Product.owner_id == current_user.id)
+    if cursor is not None:
+        q = q.where(Product.id > cursor)
+    if available is not None:
+        q = q.where(Product.available == available)
+    if category:
+        # categories αποθηκεύονται ως "A, B, C"
+        padded = literal(", ") + Product.categories + literal(",")
+        q = q.where(padded.like(f"%, {_like_escape(category.strip())},%", escape="\\"))
+    # limit+1 για να ξέρουμε αν υπάρχει επόμενη σελίδα χωρίς COUNT
+    rows = db.execute(q.order_by(Product.id).limit(limit + 1)).mappings().all()
+
+    items = [dict(r) for r in rows[:limit]]
+    next_cursor = items[-1]["id"] if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
 
 @router.post("/", response_model=ProductOut)
 def create_product(
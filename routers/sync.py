@@ -1,66 +1,217 @@
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select
 from sqlalchemy.orm import Session
+from database import get_read_db
 from models.product import Product
 from models.user import User
-from schemas import ProductOut
-from database import get_db
-from token_module import get_current_user
+from token_module import get_current_user, get_current_user_readonly
+from services.image_mirror import schedule_product_images
+from services.product_sync import BATCH_SIZE, ProductUpserter
+from production_engine import jobs
 import requests
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-@router.post("/me/products/sync", response_model=list[ProductOut])
-def sync_products_from_url(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    print("DEBUG current_user type:", type(current_user))
-    print("DEBUG current_user fields:", vars(current_user))
+SYNC_URL_TIMEOUT = float(os.getenv("SYNC_URL_TIMEOUT", "60"))  # τρέχει σε background, όχι μέσα στο request
+SYNC_EVENTS_POLL = float(os.getenv("SYNC_EVENTS_POLL", "1"))  # sec ανάμεσα σε reads του job για το SSE
+# Τα syncs τρέχουν ως jobs της ουράς του production_engine (python -m production_engine.worker).
+# Το πολύ ένα ενεργό sync ανά user (singleton_key "sync:<id>"), όποιος κι αν είναι ο HTTP worker.
+SYNC_KINDS = {"sync.url": "sync_url", "sync.woocommerce": "woocommerce"}  # job kind -> όνομα στο API
+# /me/products/changed: rows πιο νέα από now - skew δεν επιστρέφονται ακόμα. Το updated_at
+# γράφεται ακριβώς πριν το commit (ProductUpserter.stamp_changed), οπότε αρκεί να καλύψει το κενό
+# stamp -> commit ενός transaction και τη διαφορά ρολογιών ανάμεσα σε workers.
+CHANGED_SKEW = timedelta(seconds=float(os.getenv("CHANGED_SKEW_SEC", "5")))
 
-    if not hasattr(current_user, 'sync_url'):
-        raise HTTPException(status_code=400, detail="Το sync_url δεν υπάρχει στο αντικείμενο current_user.")
+def _text(value) -> str:
+    return "" if value is None else str(value)
 
-    if not current_user.sync_url:
-        raise HTTPException(status_code=400, detail="Το sync_url δεν έχει οριστεί για τον χρήστη.")
+def _category_names(value) -> str:
+    # όπως το map_woo_product: "A, B"· δέχεται λίστα από strings ή {"name": ...}
+    if isinstance(value, (list, tuple)):
+        return ", ".join(c.get("name", "") if isinstance(c, dict) else str(c) for c in value)
+    return _text(value)
+
+class SyncProgress:
+    """
+    Πρόοδος του sync που τρέχει σε worker (production_engine/jobs.py): γράφεται στο pe_jobs,
+    οπότε το polling / SSE τη βλέπει από οποιονδήποτε HTTP worker.
+    """
+
+    def __init__(self):
+        self._job = jobs.current_job()  # None εκτός worker (π.χ. κλήση από script)
+        self.pages_fetched = 0
+        self.rows_written = 0
+
+    def page_done(self, page: int, rows: int) -> None:
+        self.pages_fetched += 1
+        self.rows_written += rows
+        self._flush()
+
+    def rows_done(self, rows: int) -> None:
+        self.rows_written += rows
+        self._flush()
 
+    def _flush(self) -> None:
+        if self._job is not None:
+            jobs.report_progress(*self._job, {"pages_fetched": self.pages_fetched, "rows_written": self.rows_written})
+
+def run_url_sync(db: Session, user_id: int, sync_url: str, progress: SyncProgress) -> dict:
+    """Handler του job "sync.url" (production_engine/job_handlers.py)."""
     try:
-        response = requests.get(current_user.sync_url, timeout=10)
+        response = requests.get(sync_url, timeout=SYNC_URL_TIMEOUT)
         response.raise_for_status()
         external_products = response.json()
     except Exception as e:
-        raise HTTPException(status_code=502, detail=f"Αποτυχία σύνδεσης στο eShop: {str(e)}")
-
-    synced = []
-    for p in external_products:
-        name = p.get("name")
-        description = p.get("description", "")
-        image_url = p.get("image", "")
-
-        if not name:
-            continue  # αγνοούμε προϊόν χωρίς όνομα
-
-        existing = db.query(Product).filter(
-            Product.name == name,
-            Product.owner_id == current_user.id
-        ).first()
-
-        if existing:
-            existing.description = description
-            existing.image_url = image_url
-            db.commit()
-            db.refresh(existing)
-            synced.append(existing)
-        else:
-            new_product = Product(
-                name=name,
-                description=description,
-                image_url=image_url,
-                available=True,
-                owner_id=current_user.id
-            )
-            db.add(new_product)
-            db.commit()
-            db.refresh(new_product)
-            synced.append(new_product)
-
-    return synced
+        raise RuntimeError(f"Αποτυχία σύνδεσης στο eShop: {str(e)}")
+    progress.page_done(1, 0)
+
+    # Ολόκληρος ο κατάλογος σε ΕΝΑ transaction: αποτυχία στη μέση -> rollback, κανένα μισό sync
+    # (το job ξανατρέχει από την αρχή). Τα batches κρατάνε μικρά τα statements, όχι τα commits.
+    upserter = ProductUpserter(db, user_id)
+    for start in range(0, len(external_products), BATCH_SIZE):
+        chunk = external_products[start:start + BATCH_SIZE]
+        items = [
+            {
+                "name": p.get("name"),
+                "description": p.get("description", ""),
+                "image_url": p.get("image", ""),
+                "price": _text(p.get("price")),
+                "categories": _category_names(p.get("categories")),
+            }
+            for p in chunk
+        ]
+        upserter.apply(items)
+        progress.rows_done(len(chunk))
+    upserter.stamp_changed()
+    db.commit()
+    schedule_product_images({"image_url": p.get("image", "")} for p in external_products)
+    summary = upserter.summary()
+    logger.info("product sync user_id=%s %s", user_id, summary)
+    return summary
+
+def _job_view(job: dict) -> dict:
+    """pe_jobs row -> το σχήμα που περιμένουν wizard/dashboard (rows_written, errors, summary)."""
+    progress = job.get("progress") or {}
+    return {
+        "job_id": job["job_id"],
+        "kind": SYNC_KINDS.get(job["kind"], job["kind"]),
+        "status": job["status"],
+        "pages_fetched": progress.get("pages_fetched", 0),
+        "rows_written": progress.get("rows_written", 0),
+        "errors": [job["error"]] if job["error"] else [],
+        "summary": job["result"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+
+def _submit(user_id: int, kind: str, payload: dict) -> dict:
+    try:
+        job_id = jobs.enqueue(kind, {**payload, "owner_id": user_id}, owner_id=user_id,
+                              singleton_key=f"sync:{user_id}")
+    except jobs.JobBusy as e:
+        if e.job["kind"] != kind:
+            raise HTTPException(status_code=409, detail={"message": "Τρέχει ήδη άλλο sync.", "job": _job_view(e.job)})
+        return {**_job_view(e.job), "deduplicated": True}
+    return {**_job_view(jobs.get_job(job_id)), "deduplicated": False}
+
+@router.post("/me/products/sync", status_code=202)
+def sync_products_from_url(current_user: User = Depends(get_current_user)):
+    """Βάζει σε ουρά sync από το sync_url· επιστρέφει job (ίδιο job αν τρέχει ήδη ένα, 409 αν τρέχει WooCommerce sync)."""
+    if not getattr(current_user, "sync_url", None):
+        raise HTTPException(status_code=400, detail="Το sync_url δεν έχει οριστεί για τον χρήστη.")
+    return _submit(current_user.id, "sync.url", {})
+
+@router.post("/me/woocommerce/sync", status_code=202)
+def sync_products_from_woocommerce(full: bool = False, current_user: User = Depends(get_current_user)):
+    """Incremental WooCommerce sync σε background (full=true για πλήρη κατάλογο)."""
+    if not (current_user.woocommerce_url and current_user.consumer_key and current_user.consumer_secret):
+        raise HTTPException(status_code=400, detail="Δεν έχουν οριστεί WooCommerce credentials.")
+    return _submit(current_user.id, "sync.woocommerce", {"full": full})
+
+def _get_job(job_id: str, user: User) -> dict:
+    job = jobs.get_job(job_id)
+    if job is None or job["owner_id"] != user.id or job["kind"] not in SYNC_KINDS:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/me/sync/jobs")
+def list_sync_jobs(current_user: User = Depends(get_current_user_readonly)):
+    return [_job_view(j) for j in jobs.list_jobs(current_user.id, kinds=list(SYNC_KINDS))]
+
+@router.get("/me/sync/jobs/{job_id}")
+def get_sync_job(job_id: str, current_user: User = Depends(get_current_user_readonly)):
+    return _job_view(_get_job(job_id, current_user))
+
+@router.get("/me/sync/jobs/{job_id}/events")
+def stream_sync_job(job_id: str, current_user: User = Depends(get_current_user_readonly)):
+    """Server-Sent Events: ένα `data:` σε κάθε αλλαγή προόδου, τελευταίο όταν τελειώσει το job."""
+    _get_job(job_id, current_user)
+
+    def events():
+        last, idle = None, 0.0
+        while True:
+            job = jobs.get_job(job_id)
+            if job is None:  # purge_finished
+                break
+            view = _job_view(job)
+            if view != last:
+                last, idle = view, 0.0
+                yield f"data: {json.dumps(view, ensure_ascii=False)}\n\n"
+            elif idle >= 15:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            if job["status"] in (jobs.DONE, jobs.FAILED):
+                break
+            time.sleep(SYNC_EVENTS_POLL)
+            idle += SYNC_EVENTS_POLL
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def _encode_cursor(updated_at: datetime, product_id: int) -> str:
+    raw = f"{updated_at.isoformat()}|{product_id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        ts, pid = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(pid)
+    except Exception:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+@router.get("/me/products/changed")
+def changed_products(
+    cursor: Optional[str] = Query(None, description="cursor της προηγούμενης απάντησης· χωρίς cursor: όλα"),
+    limit: int = Query(1000, ge=1, le=5000),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_readonly),
+):
+    """
+    Ids προϊόντων που είναι νέα ή άλλαξε το περιεχόμενό τους (fingerprint), σε σειρά (updated_at, id).
+    Το `cursor` της απάντησης δίνεται στην επόμενη κλήση (π.χ. για re-render μόνο αυτών)· όσο
+    `has_more`, υπάρχουν κι άλλα αμέσως. Κάθε αλλαγή εμφανίζεται μία φορά, με καθυστέρηση έως
+    CHANGED_SKEW (βλ. παραπάνω).
+    """
+    horizon = datetime.utcnow() - CHANGED_SKEW
+    q = select(Product.id, Product.updated_at).where(
+        Product.owner_id == current_user.id, Product.updated_at <= horizon)
+    if cursor:
+        ts, pid = _decode_cursor(cursor)
+        q = q.where(or_(Product.updated_at > ts, and_(Product.updated_at == ts, Product.id > pid)))
+    rows = db.execute(q.order_by(Product.updated_at, Product.id).limit(limit + 1)).all()
+    page = rows[:limit]
+    next_cursor = _encode_cursor(page[-1].updated_at, page[-1].id) if page else cursor
+    return {"ids": [r.id for r in page], "count": len(page), "cursor": next_cursor, "has_more": len(rows) > limit}
@@ -1,23 +1,106 @@
 # services/image_generation.py
+"""
+Image / carousel posts από templates (templates_images/).
+
+Carousel: κάθε διαφορετικό template και η γραμματοσειρά φορτώνονται ΜΙΑ φορά ανά carousel και
+τα slides γίνονται render παράλληλα (threads: το PNG encode/resize του PIL αφήνει το GIL).
+Τα αρχεία γράφονται ως σύνολο: πρώτα όλα σε temp dir, που γίνεται με ένα rename το directory
+του carousel (publish_slide_dir)· ένας reader βλέπει ή όλα τα slides ή κανένα.
+Layout: create_carousel_post γράφει output_dir/<sha256 των slides>/carousel_N.png (ΟΧΙ πια
+output_dir/carousel_N.png) και επιστρέφει αυτά τα paths· ίδιο carousel -> ίδιο directory.
+
+Templates: κάθε PNG ανοίγει και γίνεται RGBA μία φορά (read-only cache, ξαναδιαβάζεται μόνο
+αν αλλάξει το mtime)· κάθε render δουλεύει σε Image.copy(). Οι γραμματοσειρές είναι memoized.
+TEMPLATE_PRELOAD=1: ο server φορτώνει όλα τα templates στο startup (preload_templates).
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Iterable, Optional
 from PIL import Image, ImageDraw, ImageFont
+import hashlib
+import io
+import logging
 import os
+import shutil
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
 
 TEMPLATES_DIR = "templates_images/"
+CAROUSEL_WORKERS = int(os.getenv("CAROUSEL_WORKERS", str(min(8, os.cpu_count() or 2))))
+TEMPLATE_CACHE_MAX = int(os.getenv("TEMPLATE_CACHE_MAX", "64"))  # templates στη μνήμη (LRU)
+TEMPLATE_PRELOAD = os.getenv("TEMPLATE_PRELOAD", "0") == "1"
 
-def load_template(template_name: str) -> Image.Image:
-    path = os.path.join(TEMPLATES_DIR, template_name)
-    img = Image.open(path).convert("RGBA")
+_templates: "OrderedDict[str, tuple[float, Image.Image]]" = OrderedDict()
+_templates_lock = threading.Lock()
+
+_pool: Optional[ThreadPoolExecutor] = None
+
+def _slide_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=max(1, CAROUSEL_WORKERS), thread_name_prefix="carousel")
+    return _pool
+
+def cached_template(template_name: str) -> Image.Image:
+    """Το κοινό (read-only) RGBA του template. ΜΗΝ το αλλάξεις· για render: load_template()."""
+    path = os.path.abspath(os.path.join(TEMPLATES_DIR, template_name))
+    mtime = os.stat(path).st_mtime
+    with _templates_lock:
+        hit = _templates.get(path)
+        if hit is not None and hit[0] == mtime:
+            _templates.move_to_end(path)
+            return hit[1]
+    with Image.open(path) as im:
+        img = im.convert("RGBA")
+    with _templates_lock:
+        _templates[path] = (mtime, img)
+        _templates.move_to_end(path)
+        while len(_templates) > max(1, TEMPLATE_CACHE_MAX):
+            _templates.popitem(last=False)
     return img
 
-def add_caption(img: Image.Image, text: str, position=(10, 10), font_path=None, font_size=24, color=(255, 255, 255)) -> Image.Image:
-    draw = ImageDraw.Draw(img)
+def load_template(template_name: str) -> Image.Image:
+    """Ιδιωτικό αντίγραφο του template (από το cache) για να ζωγραφίσει ο caller."""
+    return cached_template(template_name).copy()
+
+def preload_templates(names: Optional[Iterable[str]] = None) -> int:
+    """Φορτώνει στο cache τα `names` (default: όλες οι εικόνες του TEMPLATES_DIR). Επιστρέφει πόσα."""
+    t0 = time.perf_counter()
+    if names is None:
+        try:
+            names = [n for n in sorted(os.listdir(TEMPLATES_DIR))
+                     if n.lower().endswith((".png", ".jpg", ".jpeg", ".webp"))]
+        except FileNotFoundError:
+            names = []
+    n = 0
+    for name in names:
+        try:
+            cached_template(name)
+            n += 1
+        except (OSError, ValueError) as e:
+            logger.warning("template preload: %s: %s", name, e)
+    logger.info("template preload: %d templates in %.0fms", n, (time.perf_counter() - t0) * 1000)
+    return n
+
+@lru_cache(maxsize=64)
+def load_caption_font(font_path=None, font_size=24) -> ImageFont.ImageFont:
+    # memoized: ίδιο (path, size) -> ίδιο font object, χωρίς νέο truetype()/fallback σε κάθε κλήση
     try:
         if font_path and os.path.isfile(font_path):
-            font = ImageFont.truetype(font_path, font_size)
-        else:
-            font = ImageFont.truetype("arial.ttf", font_size)
+            return ImageFont.truetype(font_path, font_size)
+        return ImageFont.truetype("arial.ttf", font_size)
     except OSError:
-        font = ImageFont.load_default()
+        return ImageFont.load_default()
+
+def add_caption(img: Image.Image, text: str, position=(10, 10), font_path=None, font_size=24, color=(255, 255, 255),
+                font: Optional[ImageFont.ImageFont] = None) -> Image.Image:
+    draw = ImageDraw.Draw(img)
+    if font is None:
+        font = load_caption_font(font_path, font_size)
     draw.text(position, text, font=font, fill=color)
     return img
 
@@ -26,14 +109,53 @@ def create_image_post(template_name: str, caption: str, output_path: str, font_p
     img = add_caption(img, caption, position=(20, 20), font_path=font_path, font_size=font_size)
     img.save(output_path)
 
+# ---------- carousel ----------
+def png_bytes(img: Image.Image) -> bytes:
+    out = io.BytesIO()
+    img.save(out, format="PNG")
+    return out.getvalue()
+
+def render_slides(render_slide: Callable[[int], Image.Image], count: int) -> list[bytes]:
+    """render_slide(i) -> Image για i in range(count), παράλληλα· PNG bytes με τη σειρά των slides."""
+    return list(_slide_pool().map(lambda i: png_bytes(render_slide(i)), range(count)))
+
+def _write_staged(stage_dir: str, files: dict[str, bytes]) -> None:
+    os.makedirs(stage_dir)
+    for name, data in files.items():
+        with open(os.path.join(stage_dir, name), "wb") as fh:
+            fh.write(data)
+
+def publish_slide_dir(final_dir: str, files: dict[str, bytes]) -> list[str]:
+    """
+    Νέο directory για ΟΛΟ το carousel, με ένα atomic rename: ή υπάρχουν όλα τα slides ή κανένα.
+    Αν το final_dir υπάρχει ήδη (ίδιο carousel από άλλο request), κρατάμε το υπάρχον.
+    """
+    parent = os.path.dirname(os.path.abspath(final_dir))
+    stage = os.path.join(parent, f".tmp-{uuid.uuid4().hex}")
+    os.makedirs(parent, exist_ok=True)
+    try:
+        _write_staged(stage, files)
+        try:
+            os.rename(stage, final_dir)
+        except OSError:
+            if not os.path.isdir(final_dir):
+                raise
+    finally:
+        shutil.rmtree(stage, ignore_errors=True)
+    return [os.path.join(final_dir, name) for name in files]
+
 def create_carousel_post(template_names: list[str], captions: list[str], output_dir: str, font_path=None, font_size=24) -> list[str]:
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    output_paths = []
-    for i, (template_name, caption) in enumerate(zip(template_names, captions)):
-        img = load_template(template_name)
-        img = add_caption(img, caption, position=(20, 20), font_path=font_path, font_size=font_size)
-        output_path = os.path.join(output_dir, f"carousel_{i+1}.png")
-        img.save(output_path)
-        output_paths.append(output_path)
-    return output_paths
+    """Paths των slides, στο output_dir/<sha256 των slides>/carousel_N.png (ίδιο carousel -> ίδιο dir)."""
+    pairs = list(zip(template_names, captions))
+    # Κάθε template/font μία φορά για όλο το carousel· κάθε slide δουλεύει σε copy()
+    templates = {name: cached_template(name) for name in set(template_names)}
+    font = load_caption_font(font_path, font_size)
+
+    def render(i: int) -> Image.Image:
+        template_name, caption = pairs[i]
+        return add_caption(templates[template_name].copy(), caption, position=(20, 20), font=font)
+
+    slides = render_slides(render, len(pairs))
+    key = hashlib.sha256(b"".join(hashlib.sha256(data).digest() for data in slides)).hexdigest()
+    return publish_slide_dir(os.path.join(output_dir, key),
+                             {f"carousel_{i+1}.png": data for i, data in enumerate(slides)})
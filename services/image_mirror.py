@@ -0,0 +1,272 @@
+# services/image_mirror.py
+"""
+Τοπικό mirror των εικόνων προϊόντων (content-addressed) + έτοιμα derivatives.
+
+    <IMAGE_MIRROR_DIR>/orig/ab/<sha256>.<ext>       original, κλειδί το hash του περιεχομένου
+    <IMAGE_MIRROR_DIR>/urls/cd/<sha256(url)>        index: url -> {hash, etag, last_modified} (JSON)
+    <IMAGE_MIRROR_DIR>/deriv/ab/<sha256>_<w>x<h>_<cover|contain>.png
+
+Το sync καλεί schedule_product_images() και οι λήψεις γίνονται σε background threads. Τα renders
+ζητούν derivative_bytes()/local_original() και πάνε στο δίκτυο μόνο σε miss.
+Revalidation: index entry παλαιότερο από IMAGE_MIRROR_REVALIDATE_SEC (mtime του index) ξαναμπαίνει
+στην ουρά, με conditional GET (If-None-Match / If-Modified-Since)· 304 = απλό touch, αλλιώς νέο
+content hash. Μέχρι τότε σερβίρεται το παλιό (stale-while-revalidate).
+Η ουρά είναι bounded (IMAGE_MIRROR_QUEUE_MAX urls σε αναμονή/λήψη)· ό,τι δεν χωράει αγνοείται
+και ξαναζητείται στο επόμενο sync/render.
+Όλες οι εγγραφές είναι atomic (temp + os.replace), άρα ασφαλείς με πολλούς workers.
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
+import requests
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGE_MIRROR_DIR = os.getenv("IMAGE_MIRROR_DIR") or os.path.join(BASE_DIR, "media_cache", "images")
+IMAGE_MIRROR_WORKERS = int(os.getenv("IMAGE_MIRROR_WORKERS", "4"))
+IMAGE_MIRROR_MAX_BYTES = int(os.getenv("IMAGE_MIRROR_MAX_BYTES", str(25 * 1024 * 1024)))
+IMAGE_MIRROR_TIMEOUT = float(os.getenv("IMAGE_MIRROR_TIMEOUT", "20"))
+IMAGE_MIRROR_ON_SYNC = os.getenv("IMAGE_MIRROR_ON_SYNC", "1") == "1"  # 0: μόνο lazy, από τα renders
+IMAGE_MIRROR_REVALIDATE_SEC = float(os.getenv("IMAGE_MIRROR_REVALIDATE_SEC", str(24 * 3600)))
+IMAGE_MIRROR_QUEUE_MAX = int(os.getenv("IMAGE_MIRROR_QUEUE_MAX", "1000"))
+
+# Μεγέθη καμβά ανά ratio (ίδια με τον tengine)
+CANVAS_SIZES = {
+    "1:1": (1080, 1080),
+    "4:5": (1080, 1350),
+    "9:16": (1080, 1920),
+}
+
+def product_box(ratio: str) -> tuple[int, int]:
+    """Το πλαίσιο της εικόνας προϊόντος στο template (90% πλάτος, 55% ύψος)."""
+    w, h = CANVAS_SIZES.get(ratio, CANVAS_SIZES["1:1"])
+    return int(w * 0.9), int(h * 0.55)
+
+# Derivatives που φτιάχνονται αμέσως μετά τη λήψη: το product box κάθε ratio
+STANDARD_DERIVATIVES = [(*product_box(r), True) for r in CANVAS_SIZES]
+
+_EXT = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def _shard(kind: str, name: str) -> str:
+    return os.path.join(IMAGE_MIRROR_DIR, kind, name[:2], name)
+
+def _atomic_write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+def fit_image(im: Image.Image, box_w: int, box_h: int, cover: bool = True) -> Image.Image:
+    """cover: γεμίζει το box και κόβει τα άκρα· contain: χωράει ολόκληρη σε διάφανο φόντο."""
+    im = im.convert("RGBA")
+    rw, rh = box_w / im.width, box_h / im.height
+    if cover:
+        scale = max(rw, rh)
+        nw, nh = max(box_w, int(im.width*scale)), max(box_h, int(im.height*scale))
+        im = im.resize((nw, nh), Image.LANCZOS)
+        x = (nw - box_w)//2
+        y = (nh - box_h)//2
+        return im.crop((x, y, x+box_w, y+box_h))
+    scale = min(rw, rh)
+    nw, nh = max(1, int(im.width*scale)), max(1, int(im.height*scale))
+    im = im.resize((nw, nh), Image.LANCZOS)
+    bg = Image.new("RGBA", (box_w, box_h), (0, 0, 0, 0))
+    bg.paste(im, ((box_w - nw)//2, (box_h - nh)//2), im)
+    return bg
+
+# ---------- lookups (χωρίς δίκτυο) ----------
+def _index_path(url: str) -> str:
+    return _shard("urls", _sha256(url.encode("utf-8")))
+
+def _read_index(url: str) -> Optional[dict]:
+    try:
+        with open(_index_path(url), "r", encoding="utf-8") as fh:
+            raw = fh.read().strip()
+    except OSError:
+        return None
+    if not raw:
+        return None
+    if not raw.startswith("{"):
+        return {"hash": raw}  # παλιό format: σκέτο content hash
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+def _write_index(url: str, chash: str, resp: requests.Response) -> None:
+    entry = {"hash": chash, "etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+    _atomic_write(_index_path(url), json.dumps(entry).encode("utf-8"))
+
+def content_hash_for(url: str) -> Optional[str]:
+    entry = _read_index(url)
+    return entry.get("hash") if entry else None
+
+def is_stale(url: str) -> bool:
+    """True αν το url δεν έχει ελεγχθεί στην πηγή τα τελευταία IMAGE_MIRROR_REVALIDATE_SEC."""
+    try:
+        return time.time() - os.path.getmtime(_index_path(url)) > IMAGE_MIRROR_REVALIDATE_SEC
+    except OSError:
+        return True
+
+def _original_path(chash: str) -> Optional[str]:
+    d = os.path.dirname(_shard("orig", chash))
+    try:
+        for name in os.listdir(d):
+            if name.startswith(chash):
+                return os.path.join(d, name)
+    except OSError:
+        pass
+    return None
+
+def local_original(url: str) -> Optional[str]:
+    """Path του mirrored original ή None."""
+    chash = content_hash_for(url)
+    return _original_path(chash) if chash else None
+
+def _derivative_path(chash: str, w: int, h: int, cover: bool) -> str:
+    return _shard("deriv", f"{chash}_{w}x{h}_{'cover' if cover else 'contain'}.png")
+
+def _build_derivative(orig_path: str, chash: str, w: int, h: int, cover: bool) -> bytes:
+    with Image.open(orig_path) as im:
+        out = io.BytesIO()
+        fit_image(im, w, h, cover).save(out, format="PNG")
+    data = out.getvalue()
+    _atomic_write(_derivative_path(chash, w, h, cover), data)
+    return data
+
+def derivative_bytes(url: str, w: int, h: int, cover: bool = True) -> Optional[bytes]:
+    """PNG w x h από το τοπικό mirror· αν υπάρχει μόνο το original, φτιάχνεται τώρα (χωρίς δίκτυο)."""
+    chash = content_hash_for(url)
+    if not chash:
+        return None
+    path = _derivative_path(chash, w, h, cover)
+    try:
+        with open(path, "rb") as fh:
+            return fh.read()
+    except OSError:
+        pass
+    orig = local_original(url)
+    if not orig:
+        return None
+    try:
+        return _build_derivative(orig, chash, w, h, cover)
+    except Exception as e:
+        logger.warning("image mirror: derivative failed for %s: %s", url, e)
+        return None
+
+# ---------- λήψη ----------
+_session_local = threading.local()
+
+def _session() -> requests.Session:
+    s = getattr(_session_local, "session", None)
+    if s is None:
+        s = _session_local.session = requests.Session()
+    return s
+
+def mirror_image(url: str, derivatives=STANDARD_DERIVATIVES) -> Optional[str]:
+    """
+    Κατεβάζει το original αν λείπει ή αν το index είναι stale (conditional GET), και φτιάχνει
+    τα derivatives. Επιστρέφει το local path.
+    """
+    entry = _read_index(url)
+    path = _original_path(entry["hash"]) if entry and entry.get("hash") else None
+    if path is None or is_stale(url):
+        headers = {}
+        if path is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        resp = _session().get(url, timeout=IMAGE_MIRROR_TIMEOUT, stream=True, headers=headers)
+        resp.raise_for_status()
+        if path is not None and resp.status_code == 304:
+            os.utime(_index_path(url))  # ίδιο περιεχόμενο: φρέσκο για άλλο TTL
+        else:
+            data = resp.raw.read(IMAGE_MIRROR_MAX_BYTES + 1, decode_content=True)
+            if len(data) > IMAGE_MIRROR_MAX_BYTES:
+                raise ValueError(f"image too large (> {IMAGE_MIRROR_MAX_BYTES} bytes)")
+            with Image.open(io.BytesIO(data)) as im:
+                ext = _EXT.get(im.format or "", "img")
+                im.verify()
+            chash = _sha256(data)
+            path = _shard("orig", f"{chash}.{ext}")
+            if not os.path.exists(path):
+                _atomic_write(path, data)
+            _write_index(url, chash, resp)
+    chash = os.path.basename(path).split(".")[0]
+    for w, h, cover in derivatives:
+        if not os.path.exists(_derivative_path(chash, w, h, cover)):
+            _build_derivative(path, chash, w, h, cover)
+    return path
+
+class _MirrorQueue:
+    def __init__(self, workers: int, max_pending: int = IMAGE_MIRROR_QUEUE_MAX):
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="img-mirror")
+        self._lock = threading.Lock()
+        self._in_flight: set[str] = set()  # σε αναμονή ή σε λήψη: το μέγεθος της ουράς
+        self.max_pending = max_pending
+        self.dropped = 0
+
+    def schedule(self, urls: Iterable[Optional[str]]) -> int:
+        n = 0
+        for url in urls:
+            if not url or not url.startswith(("http://", "https://")):
+                continue
+            if content_hash_for(url) and not is_stale(url):
+                continue
+            with self._lock:
+                if url in self._in_flight:
+                    continue
+                if len(self._in_flight) >= self.max_pending:
+                    self.dropped += 1
+                    continue
+                self._in_flight.add(url)
+            self._pool.submit(self._run, url)
+            n += 1
+        return n
+
+    def _run(self, url: str):
+        try:
+            mirror_image(url)
+        except Exception as e:
+            logger.info("image mirror: %s failed: %s", url, e)
+        finally:
+            with self._lock:
+                self._in_flight.discard(url)
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+MIRROR_QUEUE = _MirrorQueue(IMAGE_MIRROR_WORKERS)
+
+def schedule_mirror(urls: Iterable[Optional[str]]) -> int:
+    """Βάζει σε ουρά όσα urls δεν είναι τοπικά ή είναι stale. Επιστρέφει πόσα μπήκαν."""
+    return MIRROR_QUEUE.schedule(urls)
+
+def schedule_product_images(items: Iterable[dict]) -> int:
+    """Από το sync: εικόνες των προϊόντων μιας σελίδας/batch (αν IMAGE_MIRROR_ON_SYNC)."""
+    if not IMAGE_MIRROR_ON_SYNC:
+        return 0
+    return schedule_mirror(item.get("image_url") for item in items)
@@ -0,0 +1,57 @@
+# services/post_counts.py
+"""
+Cached πλήθος posts ανά χρήστη για το /me/posts (αντί για COUNT(*) σε κάθε σελίδα).
+
+Invalidation: κάθε insert/delete Post μέσω ORM σε αυτό το process (μετά το commit).
+Για αλλαγές από άλλα processes/raw SQL το TTL (POSTS_COUNT_TTL) βάζει όριο στην καθυστέρηση.
+"""
+import os
+import threading
+import time
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.post import Post
+
+POSTS_COUNT_TTL = float(os.getenv("POSTS_COUNT_TTL", "60"))
+
+_lock = threading.Lock()
+_counts: dict[int, tuple[int, float]] = {}  # owner_id -> (count, expires_at)
+
+def get_post_count(owner_id: int, compute: Callable[[], int]) -> int:
+    now = time.monotonic()
+    with _lock:
+        hit = _counts.get(owner_id)
+        if hit is not None and hit[1] > now:
+            return hit[0]
+    value = compute()
+    with _lock:
+        _counts[owner_id] = (value, now + POSTS_COUNT_TTL)
+    return value
+
+def invalidate_post_count(owner_id: int | None = None) -> None:
+    with _lock:
+        if owner_id is None:
+            _counts.clear()
+        else:
+            _counts.pop(owner_id, None)
+
+@event.listens_for(Post, "after_insert")
+@event.listens_for(Post, "after_delete")
+def _post_changed(mapper, connection, target: Post):
+    invalidate_post_count(target.owner_id)
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("_post_count_owners", set()).add(target.owner_id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    # ξανά μετά το commit: ένα read στο μεταξύ μπορεί να έβαλε στο cache την παλιά τιμή
+    for owner_id in session.info.pop("_post_count_owners", ()):
+        invalidate_post_count(owner_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("_post_count_owners", None)
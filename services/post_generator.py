@@ -1,32 +1,51 @@
+import hashlib
+import json
 import os
 from PIL import Image, ImageDraw, ImageFont
-from moviepy.video.VideoClip import TextClip
 from models.product import Product  # ΣΩΣΤΟ import
+from services.image_generation import publish_slide_dir, render_slides
+from production_engine.services.greek_text_renderer import load_font, render_text_block
+from production_engine.services.video_renderer import cached_video, encode_still, video_cache_key
 
 STATIC_DIR = "backend/static/ads"
+VIDEO_AD_SECONDS = 5
 
-def _create_image(product: Product, filename: str, suffix: str = "") -> str:
-    os.makedirs(STATIC_DIR, exist_ok=True)
-    img = Image.new('RGB', (600, 600), color=(255, 255, 255))
-    draw = ImageDraw.Draw(img)
-
+def _ad_font() -> ImageFont.ImageFont:
     try:
-        font = ImageFont.truetype("arial.ttf", 28)
+        return ImageFont.truetype("arial.ttf", 28)
     except Exception:
-        font = ImageFont.load_default()
+        return ImageFont.load_default()
+
+def _price_text(product: Product) -> str:
+    # Product.price είναι String (όπως έρχεται από το WooCommerce): "12.5" -> "12.50 €", αλλιώς ως έχει
+    price = getattr(product, "price", None)
+    if price in (None, ""):
+        return ""
+    try:
+        return f"{float(price):.2f} €"
+    except (TypeError, ValueError):
+        return f"{price} €"
 
-    lines = [
+def _ad_lines(product: Product) -> list[str]:
+    return [
         product.name or "Product",
-        f"{product.price:.2f} €" if getattr(product, "price", None) else "",
+        _price_text(product),
         product.description or "",
-        suffix
     ]
+
+def _draw_ad(lines: list[str], font: ImageFont.ImageFont) -> Image.Image:
+    img = Image.new('RGB', (600, 600), color=(255, 255, 255))
+    draw = ImageDraw.Draw(img)
     y = 50
     for line in lines:
         if line:
             draw.text((30, y), line, font=font, fill=(0, 0, 0))
             y += 50
+    return img
 
+def _create_image(product: Product, filename: str, suffix: str = "") -> str:
+    os.makedirs(STATIC_DIR, exist_ok=True)
+    img = _draw_ad(_ad_lines(product) + [suffix], _ad_font())
     filepath = os.path.join(STATIC_DIR, filename)
     img.save(filepath)
     return f"/static/ads/{filename}"
@@ -38,32 +57,40 @@ def generate_ad_content(product: Product, post_type: str) -> str:
     return _create_image(product, filename)
 
 def generate_carousel_images(product: Product, count: int = 3) -> list[str]:
-    urls = []
-    for i in range(1, count + 1):
-        filename = f"ad_{product.id}_{i}.png"
-        suffix = f"Slide {i}"
-        url = _create_image(product, filename, suffix=suffix)
-        urls.append(url)
-    return urls
+    """
+    Όλα τα slides μαζί: μία γραμματοσειρά, παράλληλο render, και ένα directory ανά carousel
+    (carousels/<hash περιεχομένου>/) που εμφανίζεται ολόκληρο με ένα rename.
+    """
+    lines = _ad_lines(product)
+    font = _ad_font()
+    key = hashlib.sha256(json.dumps(["white_600", lines, count], ensure_ascii=False).encode("utf-8")).hexdigest()
+    final_dir = os.path.join(STATIC_DIR, "carousels", key)
+    names = [f"slide_{i}.png" for i in range(1, count + 1)]
+    if not os.path.isdir(final_dir):
+        slides = render_slides(lambda i: _draw_ad(lines + [f"Slide {i + 1}"], font), count)
+        publish_slide_dir(final_dir, dict(zip(names, slides)))
+    return [f"/static/ads/carousels/{key}/{name}" for name in names]
 
 def generate_video_ad(product: Product) -> str:
-    os.makedirs(STATIC_DIR, exist_ok=True)
-
     text = f"{product.name or 'Product'}\n"
-    if getattr(product, "price", None):
-        text += f"{product.price:.2f} €\n"
+    if _price_text(product):
+        text += f"{_price_text(product)}\n"
     if getattr(product, "description", None):
         text += product.description
 
-    clip = TextClip(text, fontsize=24, color='white', size=(600, 400), method='caption')
-    clip = clip.set_duration(5).set_position('center').on_color(color=(0, 0, 0), col_opacity=1)
-
-    video_filename = f"ad_{product.id}.mp4"
-    video_path = os.path.join(STATIC_DIR, video_filename)
-    clip.write_videofile(video_path, fps=24, codec="libx264", audio=False, logger=None)
-    clip.close()
+    def render(path: str):
+        # Ένα frame (λευκό κείμενο σε μαύρο) -> ffmpeg loop για 5s
+        frame = Image.new('RGB', (600, 400), color=(0, 0, 0))
+        render_text_block(ImageDraw.Draw(frame), (20, 20), text, load_font(24), fill=(255, 255, 255),
+                          max_width=560, align="center", stroke_width=0)
+        encode_still(frame, path, duration=VIDEO_AD_SECONDS, fps=24)
 
-    return f"/static/ads/{video_filename}"
+    # Όνομα = hash των inputs: ίδιο προϊόν/κείμενο -> ίδιο αρχείο χωρίς re-encode,
+    # και δύο ταυτόχρονα renders δεν γράφουν ποτέ το ίδιο path
+    key = video_cache_key("video_ad", template="text_600x400", text=text,
+                          duration=VIDEO_AD_SECONDS, fps=24)
+    path, _ = cached_video(key, render, cache_dir=os.path.join(STATIC_DIR, "videos"))
+    return f"/static/ads/videos/{os.path.basename(path)}"
 
 def generate_mock_post(product_name: str, post_type: str) -> list[str]:
     if post_type == "image":
@@ -0,0 +1,150 @@
+# services/product_sync.py
+import time
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import select, insert, update
+from sqlalchemy.orm import Session
+
+from models.product import Product, FINGERPRINT_FIELDS, product_fingerprint
+
+BATCH_SIZE = 1000
+
+
+def _chunks(rows: list, size: int):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+class ProductUpserter:
+    """
+    Bulk upsert προϊόντων ενός χρήστη με κλειδί το `key` ("name" ή "external_id").
+    - Φορτώνει ΜΙΑ φορά τα υπάρχοντα, μόνο (id, key, fingerprint, available)· όχι περιγραφές
+    - Σύγκριση με fingerprint: γράφονται μόνο rows που άλλαξαν (changed_ids στο summary)
+    - apply() μπορεί να κληθεί πολλές φορές (π.χ. ανά σελίδα του eShop)· κάθε κλήση γράφει
+      με batched statements μέσα στο transaction του caller (δεν κάνει commit)
+    Κάθε item είναι πλήρης εγγραφή: τα FINGERPRINT_FIELDS που λείπουν γράφονται ως None.
+    Με key="external_id", παλιά rows χωρίς external_id (sync με βάση το όνομα) υιοθετούνται
+    με βάση το name αντί να διπλασιαστούν.
+    """
+
+    def __init__(self, db: Session, owner_id: int, key: str = "name"):
+        assert key in ("name", "external_id")
+        self.db = db
+        self.owner_id = owner_id
+        self.key = key
+        self.t0 = time.perf_counter()
+        self.existing: dict[str, dict] = {}
+        self.legacy_by_name: dict[str, dict] = {}
+        cols = (Product.id, Product.name, Product.external_id, Product.fingerprint, Product.available)
+        for row in db.execute(select(*cols).where(Product.owner_id == owner_id)):
+            row = row._asdict()
+            if row[key] is not None:
+                self.existing[row[key]] = row
+            elif key == "external_id":
+                self.legacy_by_name.setdefault(row["name"], row)
+        self.seen: set[str] = set()
+        self.changed_ids: list[int] = []
+        self._unstamped: list[int] = []  # changed_ids που δεν έχουν περάσει από stamp_changed()
+        self.counts = {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+
+    def apply(self, items: Iterable[dict]) -> None:
+        now = datetime.utcnow()
+        inserts: dict[str, dict] = {}
+        updates: dict[int, dict] = {}
+        for item in items:
+            k = item.get(self.key)
+            if not k or not item.get("name"):
+                self.counts["skipped"] += 1  # αγνοούμε προϊόν χωρίς κλειδί/όνομα
+                continue
+            values = {f: item.get(f) for f in FINGERPRINT_FIELDS}
+            values["fingerprint"] = product_fingerprint(values)
+            if item.get("external_id") is not None:
+                values["external_id"] = item["external_id"]
+
+            row = self.existing.get(k)
+            if row is None and self.legacy_by_name:
+                row = self.legacy_by_name.pop(values["name"], None)
+                if row is not None:
+                    self.existing[k] = row
+            if row is None:
+                # διπλότυπο κλειδί μέσα στο ίδιο batch: κερδίζει το τελευταίο
+                inserts[k] = {"owner_id": self.owner_id, "available": item.get("available", True),
+                              "updated_at": now, **values}
+                continue
+
+            diff = {}
+            content_changed = row["fingerprint"] != values["fingerprint"]
+            if content_changed:
+                diff = {**values, "updated_at": now}
+            elif values.get("external_id") is not None and row["external_id"] != values["external_id"]:
+                diff["external_id"] = values["external_id"]
+            if "available" in item and row["available"] != item["available"]:
+                diff["available"] = item["available"]
+            if diff:
+                updates.setdefault(row["id"], {"id": row["id"]}).update(diff)
+                row.update({f: diff[f] for f in ("fingerprint", "available", "external_id") if f in diff})
+            if k not in self.seen:
+                self.seen.add(k)
+                self.counts["updated" if diff else "unchanged"] += 1
+                if content_changed:
+                    self.changed_ids.append(row["id"])
+                    self._unstamped.append(row["id"])
+
+        stmt = insert(Product).returning(Product.id, getattr(Product, self.key))
+        for batch in _chunks(list(inserts.values()), BATCH_SIZE):
+            for rid, k in self.db.execute(stmt, batch):
+                new = inserts[k]
+                self.existing[k] = {"id": rid, "name": new["name"], "external_id": new.get("external_id"),
+                                    "fingerprint": new["fingerprint"], "available": new["available"]}
+                self.seen.add(k)
+                self.changed_ids.append(rid)
+                self._unstamped.append(rid)
+        self.counts["inserted"] += len(inserts)
+        self._update_rows(list(updates.values()))
+
+    def _update_rows(self, rows: list[dict]) -> None:
+        # ORM bulk UPDATE by primary key (executemany). Ομαδοποίηση ανά σύνολο στηλών.
+        by_cols: dict[tuple, list] = {}
+        for row in rows:
+            by_cols.setdefault(tuple(sorted(row)), []).append(row)
+        for group in by_cols.values():
+            for batch in _chunks(group, BATCH_SIZE):
+                self.db.execute(update(Product), batch)
+
+    def stamp_changed(self) -> None:
+        """
+        Καλείται ακριβώς πριν το commit: το updated_at των rows που άλλαξαν γίνεται ~ η ώρα του
+        commit, όχι η ώρα του apply(). Έτσι το cursor του /me/products/changed (σειρά updated_at)
+        δεν προσπερνά rows ενός μεγάλου transaction που έγιναν ορατά αργότερα.
+        """
+        now = datetime.utcnow()
+        self._update_rows([{"id": rid, "updated_at": now} for rid in self._unstamped])
+        self._unstamped = []
+
+    def mark_missing_unavailable(self, present: set | None = None) -> int:
+        """
+        Ό,τι δεν υπάρχει στο `present` (default: ό,τι είδε το apply, δηλ. μετά από ΠΛΗΡΗ κατάλογο)
+        γίνεται available=False (όχι delete, γιατί τα posts κρατάνε αναφορά στο product).
+        """
+        present = self.seen if present is None else present
+        gone = [row for k, row in self.existing.items() if k not in present and row["available"] is not False]
+        self._update_rows([{"id": row["id"], "available": False} for row in gone])
+        for row in gone:
+            row["available"] = False
+        self.counts["unavailable"] = self.counts.get("unavailable", 0) + len(gone)
+        return len(gone)
+
+    def summary(self) -> dict:
+        return {
+            **self.counts,
+            "changed_ids": list(self.changed_ids),
+            "elapsed_ms": round((time.perf_counter() - self.t0) * 1000, 1),
+        }
+
+
+def upsert_products(db: Session, owner_id: int, items: Iterable[dict], key: str = "name") -> dict:
+    """Ένα batch από items -> summary (inserted/updated/unchanged/skipped/changed_ids/elapsed_ms)."""
+    upserter = ProductUpserter(db, owner_id, key=key)
+    upserter.apply(items)
+    return upserter.summary()
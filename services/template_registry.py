@@ -5,6 +5,8 @@ from typing import Any, Dict, List, Optional, Tuple, Literal
 from pydantic import BaseModel, validator
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 
+from production_engine.tracing import traced
+
 # Πού βρίσκονται τα templates
 TEMPLATES_DIR = Path("assets/templates")
 STATIC_ROOT   = Path("production_engine/static")
@@ -189,6 +191,7 @@ class TemplateRegistry:
             )
         return self._env_cache[rec_dir]
 
+    @traced("validate")
     def validate_and_merge(self, rec: TemplateRecord, payload: Dict[str, Any], ratio: Optional[str]) -> Tuple[Dict[str, Any], List[str]]:
         warnings: List[str] = []
         if ratio and ratio not in rec.meta.ratios:
@@ -231,6 +234,7 @@ class TemplateRegistry:
         if ratio: ctx["ratio"] = ratio
         return ctx, warnings
 
+    @traced("svg_template")
     def render_svg(self, rec: TemplateRecord, context: Dict[str, Any]) -> str:
         env = self._env_for(rec.dir)
         tpl = env.get_template("template.svg.j2")
@@ -1,52 +1,199 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from models import Product, User
+from models import User
+from services.image_mirror import schedule_product_images
+from services.product_sync import ProductUpserter
+
+logger = logging.getLogger(__name__)
+
+WOO_PER_PAGE = int(os.getenv("WOO_PER_PAGE", "100"))          # max του WooCommerce REST API
+WOO_FETCH_WORKERS = int(os.getenv("WOO_FETCH_WORKERS", "4"))  # σελίδες σε παράλληλη λήψη
+WOO_TIMEOUT = float(os.getenv("WOO_TIMEOUT", "20"))
+WOO_RETRIES = int(os.getenv("WOO_RETRIES", "4"))
+WOO_BACKOFF = float(os.getenv("WOO_BACKOFF", "0.5"))          # 0.5, 1, 2, 4s ...
+WOO_FULL_CHECK_HOURS = float(os.getenv("WOO_FULL_CHECK_HOURS", "24"))  # ID-only πέρασμα για διαγραφές
+WOO_MODIFIED_OVERLAP = timedelta(seconds=1)  # το upsert είναι idempotent, καλύπτουμε το όριο
 
 def clean_consumer_secret(secret: str) -> str:
     # Αφαιρεί τη λέξη 'secret' και κενά από το consumer_secret
     return secret.replace('secret', '').strip()
 
-def fetch_and_store_products_from_woocommerce(db: Session, user: User):
+def make_session(pool_size: int = WOO_FETCH_WORKERS) -> requests.Session:
+    """Session με connection pool (keep-alive) και retries με exponential backoff σε 429/5xx."""
+    retry = Retry(
+        total=WOO_RETRIES,
+        connect=WOO_RETRIES,
+        read=WOO_RETRIES,
+        status=WOO_RETRIES,
+        backoff_factor=WOO_BACKOFF,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size), max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def iter_product_pages(
+    base_url: str,
+    consumer_key: Optional[str],
+    consumer_secret: Optional[str],
+    *,
+    per_page: int = WOO_PER_PAGE,
+    workers: int = WOO_FETCH_WORKERS,
+    params: Optional[dict] = None,
+    session: Optional[requests.Session] = None,
+) -> Iterator[tuple[int, list]]:
+    """
+    Yields (page, products) καθώς φτάνουν οι σελίδες (όχι απαραίτητα με τη σειρά).
+    Η 1η σελίδα δίνει το X-WP-TotalPages· οι υπόλοιπες κατεβαίνουν παράλληλα με το πολύ
+    `workers` αιτήματα σε πτήση, ώστε στη μνήμη να υπάρχουν λίγες σελίδες κάθε φορά.
+    """
+    api_url = f"{base_url.rstrip('/')}/wp-json/wc/v3/products"
+    own_session = session is None
+    session = session or make_session(workers)
+    base_params = {**(params or {}), "per_page": per_page}
+    if consumer_key:
+        # αλλιώς ο caller έχει βάλει session.auth (Basic auth)
+        base_params.update(consumer_key=consumer_key, consumer_secret=consumer_secret)
+
+    def fetch(page: int) -> tuple[int, list, requests.Response]:
+        resp = session.get(api_url, params={**base_params, "page": page}, timeout=WOO_TIMEOUT)
+        resp.raise_for_status()
+        return page, resp.json(), resp
+
+    try:
+        _, first, resp = fetch(1)
+        total_pages = int(resp.headers.get("X-WP-TotalPages") or 1)
+        logger.info("woocommerce fetch %s total=%s pages=%s", api_url,
+                    resp.headers.get("X-WP-Total"), total_pages)
+        yield 1, first
+        del first
+
+        pending_pages = iter(range(2, total_pages + 1))
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="woo-fetch") as pool:
+            in_flight = set()
+            for page in pending_pages:
+                in_flight.add(pool.submit(fetch, page))
+                if len(in_flight) >= workers:
+                    break
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    page, products, _ = fut.result()  # σφάλμα μετά τα retries -> ακυρώνει όλο το sync
+                    for nxt in pending_pages:
+                        in_flight.add(pool.submit(fetch, nxt))
+                        break
+                    yield page, products
+    finally:
+        if own_session:
+            session.close()
+
+def map_woo_product(p: dict) -> dict:
+    images = p.get('images') or []
+    return {
+        "external_id": str(p['id']) if p.get('id') is not None else None,
+        "name": p.get('name'),
+        "description": p.get('description'),
+        "image_url": images[0].get('src', '') if images else '',
+        "available": p.get('status', 'publish') == 'publish',
+        "categories": ', '.join(cat['name'] for cat in p.get('categories', [])),
+        "price": p.get('price', '0'),
+    }
+
+def _parse_gmt(value: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value.rstrip("Z")) if value else None
+    except ValueError:
+        return None
+
+def fetch_product_ids(base_url: str, consumer_key: str, consumer_secret: str, *,
+                      workers: int = WOO_FETCH_WORKERS) -> set[str]:
+    """Φθηνό πέρασμα μόνο με ids (_fields=id) για εντοπισμό διαγραμμένων προϊόντων."""
+    ids: set[str] = set()
+    for _, rows in iter_product_pages(base_url, consumer_key, consumer_secret,
+                                      workers=workers, params={"_fields": "id"}):
+        ids.update(str(r["id"]) for r in rows if r.get("id") is not None)
+    return ids
+
+def fetch_and_store_products_from_woocommerce(db: Session, user: User, *, full: bool = False,
+                                              workers: int = WOO_FETCH_WORKERS, on_page=None) -> dict:
+    """
+    Incremental sync: με high-water mark (users.woocommerce_synced_at) ζητάμε μόνο ό,τι άλλαξε
+    μετά από αυτό (modified_after)· χωρίς mark, ή με full=True, κατεβαίνει όλος ο κατάλογος.
+    Κάθε σελίδα γράφεται μόλις φτάσει (commit ανά σελίδα, upsert με κλειδί το id του eShop).
+    Διαγραφές: στο πλήρες sync, ή κάθε WOO_FULL_CHECK_HOURS με ID-only πέρασμα, ό,τι λείπει
+    γίνεται available=False.
+    """
     base_url = user.woocommerce_url
     consumer_key = user.consumer_key.strip()
-    consumer_secret = user.consumer_secret.strip()
-
     # Καθαρίζουμε το consumer_secret
-    consumer_secret = clean_consumer_secret(consumer_secret)
+    consumer_secret = clean_consumer_secret(user.consumer_secret.strip())
 
-    api_url = f"{base_url}/wp-json/wc/v3/products"
-    params = {
-        "per_page": 100,
-        "consumer_key": consumer_key,
-        "consumer_secret": consumer_secret,
-    }
+    now = datetime.utcnow()
+    since = None if full else user.woocommerce_synced_at
+    checked_at = user.woocommerce_checked_at
+    params = {}
+    if since is not None:
+        params = {
+            "modified_after": (since - WOO_MODIFIED_OVERLAP).isoformat(timespec="seconds"),
+            "dates_are_gmt": "true",
+        }
 
+    upserter = ProductUpserter(db, user.id, key="external_id")
+    pages = 0
+    high_water = since
+    id_check = False
     try:
-        response = requests.get(api_url, params=params)
-        response.raise_for_status()
-    except requests.HTTPError as e:
-        # Αν θες, μπορείς να κάνεις πιο λεπτομερή logging ή raise για να το δεις από έξω
-        print(f"Error fetching products from WooCommerce: {e}")
+        for page, products in iter_product_pages(base_url, consumer_key, consumer_secret,
+                                                 workers=workers, params=params):
+            mapped = [map_woo_product(p) for p in products]
+            upserter.apply(mapped)
+            upserter.stamp_changed()
+            db.commit()
+            schedule_product_images(mapped)
+            pages += 1
+            for p in products:
+                modified = _parse_gmt(p.get('date_modified_gmt'))
+                if modified is not None and (high_water is None or modified > high_water):
+                    high_water = modified
+            if on_page is not None:
+                on_page(page, len(products))
+
+        # Το mark γράφεται μόνο αφού ήρθαν ΟΛΕΣ οι σελίδες (έρχονται εκτός σειράς)
+        values = {"woocommerce_synced_at": high_water}
+        if since is None:
+            upserter.mark_missing_unavailable()
+            values["woocommerce_checked_at"] = now
+            id_check = True
+        elif checked_at is None or now - checked_at >= timedelta(hours=WOO_FULL_CHECK_HOURS):
+            ids = fetch_product_ids(base_url, consumer_key, consumer_secret, workers=workers)
+            upserter.mark_missing_unavailable(ids)
+            values["woocommerce_checked_at"] = now
+            id_check = True
+        db.execute(update(User).where(User.id == user.id).values(**values))
+        db.commit()
+    except requests.RequestException as e:
+        db.rollback()
+        logger.error("Error fetching products from WooCommerce (user_id=%s): %s", user.id, e)
+        raise
+    except Exception:
+        db.rollback()
         raise
 
-    products_data = response.json()
-
-    # Διαγραφή προηγούμενων προϊόντων του χρήστη
-    db.query(Product).filter(Product.owner_id == user.id).delete()
-    db.commit()
-
-    # Αποθήκευση νέων προϊόντων
-    for p in products_data:
-        # Πάρε βασικά πεδία, προσαρμόζεις ανάλογα με API response
-        product = Product(
-            id=p.get('id'),
-            name=p.get('name'),
-            description=p.get('description'),
-            image_url=(p.get('images')[0]['src'] if p.get('images') else ''),
-            available=p.get('status') == 'publish',
-            categories=', '.join([cat['name'] for cat in p.get('categories', [])]),
-            owner_id=user.id,
-            price=p.get('price', '0')
-        )
-        db.merge(product)  # merge για update ή insert
-    db.commit()
+    summary = upserter.summary()
+    summary.update(mode="delta" if since is not None else "full", pages=pages, id_check=id_check)
+    logger.info("woocommerce sync user_id=%s %s", user.id, summary)
+    return summary
@@ -0,0 +1,69 @@
+"""
+Κοινά fixtures. Τα tests τρέχουν πάντα σε προσωρινές SQLite βάσεις (ποτέ στο database.db /
+engine.db του repo): τα env vars μπαίνουν εδώ, πριν γίνει import το database/engine_database.
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+import tempfile
+import uuid
+from datetime import timedelta
+
+_TMP = tempfile.mkdtemp(prefix="autoposter-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP, 'app.db')}"
+os.environ.pop("DATABASE_READ_URL", None)
+os.environ["ENGINE_DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP, 'engine.db')}"
+os.environ["IMAGE_MIRROR_DIR"] = os.path.join(_TMP, "images")
+os.environ["TTS_CACHE_DIR"] = os.path.join(_TMP, "tts")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+import database  # noqa: E402
+import models  # noqa: E402,F401  (όλα τα models στο Base.metadata)
+from models.credit_transaction import CreditTransaction  # noqa: E402,F401
+from production_engine import engine_database  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    database.Base.metadata.create_all(database.engine)
+    engine_database.init_schema()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def clean_tables():
+    """Κάθε test ξεκινά με άδειους πίνακες."""
+    yield
+    for eng, meta in ((database.engine, database.Base.metadata), (engine_database.engine, engine_database.metadata)):
+        with eng.begin() as conn:
+            for table in reversed(meta.sorted_tables):
+                conn.execute(table.delete())
+
+
+@pytest.fixture
+def db():
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    """make_user(credits=...) -> (User, Authorization headers)."""
+    import token_module
+
+    def make(credits: int = 10, email: str | None = None):
+        email = email or f"{uuid.uuid4().hex[:10]}@test.local"
+        user = models.User(email=email, username=email, hashed_password="x", credits=credits)
+        db.add(user)
+        db.commit()
+        token = token_module.create_access_token({"sub": email}, timedelta(minutes=5))
+        return user, {"Authorization": f"Bearer {token}"}
+
+    return make
@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+
+import token_module
+from database import SessionLocal
+from models import User
+
+
+@pytest.fixture
+def auth_cache(monkeypatch):
+    monkeypatch.setattr(token_module.AUTH_CACHE, "ttl", 60.0)
+    token_module.AUTH_CACHE.clear()
+    yield token_module.AUTH_CACHE
+    token_module.AUTH_CACHE.clear()
+
+
+def _load(headers):
+    token = headers["Authorization"].split()[1]
+    session = SessionLocal()
+    try:
+        user = token_module._user_from_token(token, session)
+        return user.id, user.email, user.credits
+    finally:
+        session.close()
+
+
+def test_cached_token_still_reads_fresh_row(auth_cache, make_user, db):
+    user, headers = make_user(credits=3)
+    assert _load(headers) == (user.id, user.email, 3)
+    assert auth_cache.get_email(headers["Authorization"].split()[1]) == user.email
+
+    # Core UPDATE (όπως το /me/use-credit): χωρίς invalidation, ο user διαβάζεται φρέσκος
+    db.execute(update(User).where(User.id == user.id).values(credits=1))
+    db.commit()
+    assert _load(headers)[2] == 1
+
+
+def test_changed_email_is_rejected(auth_cache, make_user, db):
+    user, headers = make_user()
+    _load(headers)
+    db.execute(update(User).where(User.id == user.id).values(email="other@test.local"))
+    db.commit()
+    with pytest.raises(HTTPException) as exc:
+        _load(headers)
+    assert exc.value.status_code == 401
+
+
+def test_cache_entry_never_outlives_the_token(auth_cache):
+    token = token_module.create_access_token({"sub": "a@test.local"}, timedelta(seconds=-1))
+    auth_cache.put_email(token, "a@test.local", jwt_exp=0)
+    assert auth_cache.get_email(token) is None
@@ -0,0 +1,32 @@
+import importlib.util
+import os
+from datetime import datetime
+
+from sqlalchemy import insert, select
+
+from production_engine.data_migrations import run_migration
+from production_engine.engine_database import committed_posts_table, engine
+
+TOOL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools", "backfill_committed_owner.py")
+
+
+def _tool():
+    spec = importlib.util.spec_from_file_location("backfill_committed_owner", TOOL)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def test_assigns_only_ownerless_rows_before_cutoff():
+    t = committed_posts_table
+    with engine.begin() as conn:
+        ids = [
+            conn.execute(insert(t).values(preview_id=f"p{i}", urls_json="[]", created_at=datetime.utcnow(),
+                                          owner_id=owner)).inserted_primary_key[0]
+            for i, owner in enumerate((None, 7, None, None))
+        ]
+    stats = run_migration(_tool().AssignOwnerMigration(owner_id=42, before_id=ids[3]))
+    assert stats["changed"] == 2
+    with engine.connect() as conn:
+        owners = dict(conn.execute(select(t.c.id, t.c.owner_id)).all())
+    assert [owners[i] for i in ids] == [42, 7, 42, None]
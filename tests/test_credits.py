@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from models import User
+from models.credit_transaction import CreditTransaction
+from routers import me
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(me.router)
+    with TestClient(app) as c:
+        yield c
+
+
+def test_use_credit_debits_until_zero(client, make_user, db):
+    user, headers = make_user(credits=2)
+    assert client.post("/me/use-credit", headers=headers).json() == {"ok": True, "credits": 1}
+    assert client.post("/me/use-credit", headers=headers).json() == {"ok": True, "credits": 0}
+    assert client.post("/me/use-credit", headers=headers).status_code == 402
+    db.expire_all()
+    assert db.get(User, user.id).credits == 0
+    assert db.query(CreditTransaction).filter_by(user_id=user.id).count() == 2
+
+
+def test_concurrent_debits_never_overdraw(client, make_user, db):
+    user, headers = make_user(credits=5)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        codes = list(pool.map(lambda _: client.post("/me/use-credit", headers=headers).status_code, range(12)))
+    assert codes.count(200) == 5 and codes.count(402) == 7
+    db.expire_all()
+    assert db.get(User, user.id).credits == 0
+    assert db.query(CreditTransaction).filter_by(user_id=user.id).count() == 5
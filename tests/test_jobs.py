@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from production_engine import jobs, worker
+from production_engine.engine_database import engine, pe_jobs_table
+
+
+def _expire_lease(job_id: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(update(pe_jobs_table).where(pe_jobs_table.c.id == job_id)
+                     .values(locked_until=datetime.utcnow() - timedelta(seconds=1)))
+
+
+def _make_ready(job_id: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(update(pe_jobs_table).where(pe_jobs_table.c.id == job_id)
+                     .values(run_after=datetime.utcnow() - timedelta(seconds=1)))
+
+
+def test_claim_by_priority_and_only_once():
+    bulk = jobs.enqueue("t.kind", {"n": 1}, priority=jobs.PRIORITIES["bulk"])
+    interactive = jobs.enqueue("t.kind", {"n": 2}, priority=jobs.PRIORITIES["interactive"])
+
+    first = jobs.claim("w1")
+    second = jobs.claim("w2")
+    assert first["id"] == interactive and first["payload"] == {"n": 2} and first["attempts"] == 1
+    assert second["id"] == bulk
+    assert jobs.claim("w3") is None
+    assert jobs.get_job(interactive)["status"] == jobs.RUNNING
+
+
+def test_claim_filters_kinds():
+    jobs.enqueue("t.other", {})
+    assert jobs.claim("w1", kinds=["t.kind"]) is None
+    assert jobs.claim("w1", kinds=["t.other"]) is not None
+
+
+def test_only_owner_can_complete():
+    job_id = jobs.enqueue("t.kind", {})
+    jobs.claim("w1")
+    assert jobs.complete(job_id, "w2", {"ok": True}) is False
+    assert jobs.complete(job_id, "w1", {"ok": True}) is True
+    assert jobs.get_job(job_id)["result"] == {"ok": True}
+
+
+def test_fail_retries_with_backoff_then_fails():
+    job_id = jobs.enqueue("t.kind", {}, max_attempts=2)
+    jobs.claim("w1")
+    assert jobs.fail(job_id, "w1", "boom") == jobs.QUEUED
+    assert jobs.claim("w1") is None  # run_after στο μέλλον (backoff)
+
+    _make_ready(job_id)
+    again = jobs.claim("w2")
+    assert again["id"] == job_id and again["attempts"] == 2
+    assert jobs.fail(job_id, "w2", "boom") == jobs.FAILED
+    assert jobs.get_job(job_id)["status"] == jobs.FAILED
+
+
+def test_expired_lease_is_reclaimed_until_max_attempts():
+    job_id = jobs.enqueue("t.kind", {}, max_attempts=2)
+    jobs.claim("w1")
+    _expire_lease(job_id)
+    assert jobs.claim("w2")["attempts"] == 2
+    assert jobs.heartbeat(job_id, "w1") is False  # ο παλιός worker έχασε το lease
+
+    _expire_lease(job_id)
+    assert jobs.claim("w3") is None
+    job = jobs.get_job(job_id)
+    assert job["status"] == jobs.FAILED and job["error"] == "visibility timeout exceeded"
+
+
+def test_job_error_is_not_retried():
+    @jobs.handler("t.reject")
+    def reject(payload):
+        raise jobs.JobError("bad payload")
+
+    job_id = jobs.enqueue("t.reject", {}, max_attempts=3)
+    worker._run_one(jobs.claim("w1"), "w1", visibility=30)
+    job = jobs.get_job(job_id)
+    assert job["status"] == jobs.FAILED and job["attempts"] == 1 and job["error"] == "bad payload"
+
+
+def test_count_active_per_owner():
+    jobs.enqueue("t.kind", {}, owner_id=7)
+    done = jobs.enqueue("t.kind", {}, owner_id=7)
+    jobs.enqueue("t.kind", {}, owner_id=8)
+    with engine.begin() as conn:
+        conn.execute(update(pe_jobs_table).where(pe_jobs_table.c.id == done).values(status=jobs.DONE))
+    assert jobs.count_active(7) == 1
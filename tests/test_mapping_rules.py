@@ -0,0 +1,86 @@
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, select
+
+from production_engine import engine_database
+from production_engine.engine_database import engine, pe_mapping_rules_table, pe_templates_table
+from production_engine.routers import templates_engine
+
+
+@pytest.fixture
+def client():
+    templates_engine.invalidate_rules_cache()
+    app = FastAPI()
+    app.include_router(templates_engine.router)
+    with TestClient(app) as c:
+        yield c
+    templates_engine.invalidate_rules_cache()
+
+
+def _template() -> int:
+    with engine.begin() as conn:
+        return conn.execute(insert(pe_templates_table).values(
+            name="t", type="image", spec_json="{}", created_at=datetime.utcnow())).inserted_primary_key[0]
+
+
+def _rules():
+    t = pe_mapping_rules_table
+    with engine.connect() as conn:
+        return conn.execute(select(t.c.id, t.c.category, t.c.mode, t.c.template_id).order_by(t.c.id)).all()
+
+
+def test_rule_inserted_concurrently_is_updated_not_500(client):
+    old, new = _template(), _template()
+    raced = []
+
+    def before_insert(conn, cursor, statement, parameters, context, executemany):
+        # ανάμεσα στο select και στο insert του add_rule, άλλο request βάζει τον ίδιο κανόνα
+        if statement.startswith("INSERT INTO pe_mapping_rules") and not raced:
+            raced.append(True)
+            with engine.begin() as other:
+                other.execute(insert(pe_mapping_rules_table).values(
+                    category="Shoes", post_type="image", mode="Κανονικό", template_id=old))
+
+    event.listen(engine, "before_cursor_execute", before_insert)
+    try:
+        body = {"category": " Shoes ", "post_type": "image", "mode": "Κανονικό", "template_id": new}
+        res = client.post("/tengine/mapping/rules", json=body)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_insert)
+    assert raced and res.status_code == 200 and res.json()["updated"] is True
+    assert [(r.category, r.mode, r.template_id) for r in _rules()] == [("Shoes", "Κανονικό", new)]
+
+
+def test_rules_written_by_another_worker_show_up_after_ttl(client, monkeypatch):
+    tid = _template()
+    resolve = {"category": "Shoes", "post_type": "image", "mode": "Κανονικό"}
+    assert client.post("/tengine/mapping/resolve", json=resolve).status_code == 404
+
+    # άλλος worker: γράφει απευθείας, χωρίς invalidate_rules_cache() σε αυτό το process
+    with engine.begin() as conn:
+        conn.execute(insert(pe_mapping_rules_table).values(
+            category="Shoes", post_type="image", mode="Κανονικό", template_id=tid))
+    assert client.post("/tengine/mapping/resolve", json=resolve).status_code == 404  # cached
+
+    monkeypatch.setattr(templates_engine, "_rules_table", (templates_engine._rules_table[0], 0.0))
+    assert client.post("/tengine/mapping/resolve", json=resolve).json()["template_id"] == tid
+
+
+def test_normalize_trims_then_keeps_newest_once():
+    with engine.begin() as conn:
+        for category, mode, template_id in ((" Shoes", "Κανονικό ", 1), ("Shoes ", "Κανονικό", 2), ("Bags", "*", 3)):
+            conn.execute(insert(pe_mapping_rules_table).values(
+                category=category, post_type="image", mode=mode, template_id=template_id))
+        engine_database._normalize_mapping_rules(conn)
+    rules = _rules()
+    assert [(r.category, r.mode, r.template_id) for r in rules] == [("Shoes", "Κανονικό", 2), ("Bags", "*", 3)]
+
+    # δεύτερη φορά: no-op (σημειωμένο στο pe_data_migrations), ακόμα και με νέα "βρώμικα" rows
+    with engine.begin() as conn:
+        conn.execute(insert(pe_mapping_rules_table).values(
+            category=" Bags", post_type="image", mode="*", template_id=4))
+        engine_database._normalize_mapping_rules(conn)
+    assert len(_rules()) == 3
@@ -0,0 +1,58 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(*args, url, engine_url=None):
+    engine_url = engine_url or url.replace(".db", "_engine.db")
+    env = {**os.environ, "DATABASE_URL": url, "ENGINE_DATABASE_URL": engine_url}
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True)
+
+
+def test_fresh_database_is_created_and_stamped_then_upgrades(tmp_path):
+    path = tmp_path / "fresh.db"
+    url = f"sqlite:///{path}"
+    first = _run("tools/migrate.py", url=url)
+    assert first.returncode == 0, first.stderr
+    assert "created" in first.stdout
+    with sqlite3.connect(path) as conn:
+        head = conn.execute("SELECT version_num FROM alembic_version").fetchone()[0]
+        users = {r[1] for r in conn.execute("PRAGMA table_info(users)")}
+    script = ScriptDirectory.from_config(Config(os.path.join(ROOT, "alembic.ini")))
+    assert head == script.get_current_head() and "sync_url" in users
+
+    again = _run("tools/migrate.py", url=url)
+    assert again.returncode == 0 and "upgraded" in again.stdout
+
+
+def test_engine_schema_is_created_by_migrate_not_on_import(tmp_path):
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    engine_path = tmp_path / "engine.db"
+    engine_url = f"sqlite:///{engine_path}"
+    check = ("from production_engine import engine_database as e; "
+             "print(e.schema_missing() == []); e.require_schema()")
+
+    before = _run("-c", check, url=url, engine_url=engine_url)
+    assert before.returncode != 0
+    assert before.stdout.strip() == "False" and "tools/migrate.py" in before.stderr
+    with sqlite3.connect(engine_path) as conn:
+        assert conn.execute("SELECT count(*) FROM sqlite_master WHERE type = 'table'").fetchone()[0] == 0
+
+    res = _run("tools/migrate.py", url=url, engine_url=engine_url)
+    assert res.returncode == 0 and "engine.db: ok" in res.stdout, res.stderr
+    after = _run("-c", check, url=url, engine_url=engine_url)
+    assert after.returncode == 0 and after.stdout.strip() == "True", after.stderr
+
+
+def test_unmanaged_database_is_refused(tmp_path):
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY)")
+    res = _run("tools/migrate.py", url=f"sqlite:///{path}")
+    assert res.returncode != 0 and "alembic stamp" in res.stderr
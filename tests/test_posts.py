@@ -0,0 +1,71 @@
+import importlib.util
+import os
+
+import pytest
+from alembic.operations import Operations
+from alembic.runtime.migration import MigrationContext
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+import database
+from production_engine.routers import posts
+
+MIGRATION = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "migrations", "versions", "a8d35f1e7c62_posts_created_at_format.py",
+)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(posts.router)
+    with TestClient(app) as c:
+        yield c
+
+
+def _run_migration():
+    spec = importlib.util.spec_from_file_location("posts_created_at_format", MIGRATION)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    with database.engine.begin() as conn:
+        with Operations.context(MigrationContext.configure(conn)):
+            mod.upgrade()
+
+
+def _pages(client, headers, limit):
+    seen, cursor = [], None
+    for _ in range(20):  # σελίδα που επαναλαμβάνεται δεν πρέπει να κρεμάσει το test
+        url = f"/me/posts?limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        body = client.get(url, headers=headers).json()
+        seen += [p["id"] for p in body["items"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    return seen
+
+
+def test_pages_cover_backfilled_and_equal_timestamps(client, make_user):
+    user, headers = make_user()
+    # 4 rows με το ίδιο backfilled (χωρίς μικροδευτερόλεπτα) timestamp, 2 γραμμένα από το ORM
+    stamps = ["2026-01-01 10:00:00"] * 4 + ["2026-01-02 09:00:00.250000", "2025-12-31 23:59:59.999999"]
+    with database.engine.begin() as conn:
+        for i, ts in enumerate(stamps):
+            conn.execute(
+                text("INSERT INTO posts (content, owner_id, type, created_at) VALUES (:c, :o, 'image', :ts)"),
+                {"c": f"p{i}", "o": user.id, "ts": ts},
+            )
+        ids = [r[0] for r in conn.execute(text("SELECT id FROM posts ORDER BY id"))]
+    _run_migration()
+    _run_migration()  # idempotent
+
+    seen = _pages(client, headers, limit=2)
+    assert len(seen) == len(set(seen)) == 6
+    # νεότερο πρώτα, και στα ίσα timestamps φθίνον id
+    assert seen == [ids[4], ids[3], ids[2], ids[1], ids[0], ids[5]]
+
+
+def test_bad_cursor_is_400(client, make_user):
+    _, headers = make_user()
+    assert client.get("/me/posts?cursor=%%%", headers=headers).status_code == 400
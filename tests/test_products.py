@@ -0,0 +1,84 @@
+import time
+from datetime import datetime, timedelta
+
+from models.product import Product, product_fingerprint
+from services.product_sync import ProductUpserter, upsert_products
+
+
+def test_fingerprint_treats_none_as_empty_and_tracks_content():
+    base = {"name": "Μπλούζα", "description": None, "price": "19.90", "image_url": "", "categories": "A"}
+    assert product_fingerprint(base) == product_fingerprint({**base, "description": ""})
+    assert product_fingerprint(base) != product_fingerprint({**base, "price": "21.00"})
+    assert product_fingerprint(base) == product_fingerprint(Product(**base))
+
+
+def test_upsert_only_touches_changed_rows(db, make_user):
+    user, _ = make_user()
+    items = [{"name": f"P{i}", "price": "1.00"} for i in range(3)]
+    assert upsert_products(db, user.id, items)["inserted"] == 3
+    db.commit()
+
+    items[1]["price"] = "2.00"
+    summary = upsert_products(db, user.id, items)
+    db.commit()
+    assert (summary["updated"], summary["unchanged"]) == (1, 2)
+    changed = db.get(Product, summary["changed_ids"][0])
+    assert changed.name == "P1" and changed.price == "2.00"
+
+
+def _changed(db, user, cursor=None, limit=1000):
+    from routers import sync
+    return sync.changed_products(cursor=cursor, limit=limit, db=db, current_user=user)
+
+
+def test_changed_products_cursor_pages_and_returns_each_change_once(db, make_user, monkeypatch):
+    from routers import sync
+    monkeypatch.setattr(sync, "CHANGED_SKEW", timedelta(0))
+    user, _ = make_user()
+    upserter = ProductUpserter(db, user.id)
+    upserter.apply([{"name": f"P{i}", "price": "1.00"} for i in range(5)])
+    upserter.stamp_changed()
+    db.commit()
+
+    seen, cursor = [], None
+    while True:
+        page = _changed(db, user, cursor, limit=2)
+        seen += page["ids"]
+        cursor = page["cursor"]
+        if not page["has_more"]:
+            break
+    assert sorted(seen) == sorted(set(seen)) and len(seen) == 5
+    assert _changed(db, user, cursor)["ids"] == []
+
+    upserter = ProductUpserter(db, user.id)
+    upserter.apply([{"name": "P3", "price": "9.00"}])
+    upserter.stamp_changed()
+    db.commit()
+    again = _changed(db, user, cursor)
+    assert again["ids"] == [db.query(Product).filter_by(owner_id=user.id, name="P3").one().id]
+
+
+def test_changed_products_sees_rows_of_a_transaction_that_commits_late(db, make_user, monkeypatch):
+    from routers import sync
+    monkeypatch.setattr(sync, "CHANGED_SKEW", timedelta(0))
+    user, _ = make_user()
+    upserter = ProductUpserter(db, user.id)
+    upserter.apply([{"name": "late", "price": "1.00"}])  # ανοιχτό transaction, updated_at = τώρα
+
+    # στο μεταξύ ένας reader έχει ήδη προχωρήσει το cursor πέρα από αυτό το updated_at
+    reader_cursor = sync._encode_cursor(datetime.utcnow() + timedelta(milliseconds=1), 10**9)
+    time.sleep(0.01)
+    upserter.stamp_changed()
+    db.commit()
+    assert _changed(db, user, reader_cursor)["ids"] == upserter.changed_ids
+
+
+def test_changed_products_is_scoped_to_owner(db, make_user, monkeypatch):
+    from routers import sync
+    monkeypatch.setattr(sync, "CHANGED_SKEW", timedelta(0))
+    alice, _ = make_user()
+    bob, _ = make_user()
+    mine = upsert_products(db, alice.id, [{"name": "A"}])["changed_ids"][0]
+    upsert_products(db, bob.id, [{"name": "B"}])
+    db.commit()
+    assert _changed(db, alice)["ids"] == [mine]
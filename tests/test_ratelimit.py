@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from production_engine import ratelimit
+from production_engine.ratelimit import DbBackend, MemoryBackend, RateLimiter, gcra
+
+
+def test_gcra_burst_then_one_per_interval():
+    tat, now = None, 1000.0
+    for i in range(5):
+        decision, tat = gcra(tat, now, limit=5, period=10)
+        assert decision.allowed and decision.remaining == 4 - i
+    decision, new_tat = gcra(tat, now, limit=5, period=10)
+    assert not decision.allowed and new_tat is None
+    assert decision.retry_after == pytest.approx(2.0)  # period/limit
+
+    decision, _ = gcra(tat, now + 2.0, limit=5, period=10)
+    assert decision.allowed
+
+
+def test_gcra_cost_and_headers():
+    decision, _ = gcra(None, 0.0, limit=10, period=60, cost=4)
+    assert decision.remaining == 6
+    headers = gcra(None, 0.0, limit=1, period=60, cost=2)[0].headers()
+    assert headers["Retry-After"] and headers["RateLimit-Remaining"] == "0"
+
+
+def test_memory_backend_sweeps_idle_keys_and_caps_size():
+    now = [0.0]
+    limiter = RateLimiter(MemoryBackend(max_keys=3, sweep_interval=1.0), clock=lambda: now[0])
+    for k in "abcd":
+        limiter.hit(k, limit=2, period=10)
+    assert len(limiter.backend) == 3  # LRU: το "a" βγήκε
+    now[0] = 100.0
+    limiter.hit("e", limit=2, period=10)
+    assert len(limiter.backend) == 1  # τα υπόλοιπα είχαν γεμάτο bucket
+
+
+def test_db_backend_is_shared_and_exact_under_concurrency():
+    now = 5000.0
+    limiters = [RateLimiter(DbBackend(), clock=lambda: now) for _ in range(4)]
+    allowed = []
+    lock = threading.Lock()
+
+    def hammer(limiter):
+        for _ in range(10):
+            ok = limiter.hit("bucket:1", limit=12, period=60).allowed
+            with lock:
+                allowed.append(ok)
+
+    threads = [threading.Thread(target=hammer, args=(lim,)) for lim in limiters]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert allowed.count(True) == 12
+
+
+def test_db_backend_compare_and_set_retries_on_conflict():
+    backend = DbBackend()
+    now = 7000.0
+    backend.apply("k", now, lambda tat: gcra(tat, now, 10, 10))  # row υπάρχει
+
+    calls = []
+
+    def step(tat):
+        calls.append(tat)
+        if len(calls) == 1:  # άλλος worker γράφει ανάμεσα στο SELECT και το UPDATE
+            backend.apply("k", now, lambda t: gcra(t, now, 10, 10))
+        return gcra(tat, now, 10, 10)
+
+    backend.apply("k", now, step)
+    assert len(calls) == 2 and calls[1] > calls[0]
+    decision = backend.apply("k", now, lambda tat: gcra(tat, now, 10, 10))
+    assert decision.remaining == 6  # 4 hits συνολικά, κανένα δεν χάθηκε
+
+
+def test_enforce_raises_429_with_retry_after(monkeypatch):
+    monkeypatch.setattr(ratelimit, "LIMITER", RateLimiter(MemoryBackend(), clock=lambda: 0.0))
+    ratelimit.enforce("preview", 1, limit=1, period=60)
+    with pytest.raises(HTTPException) as exc:
+        ratelimit.enforce("preview", 1, limit=1, period=60)
+    assert exc.value.status_code == 429 and exc.value.headers["Retry-After"] == "60"
@@ -0,0 +1,73 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from models import Product
+from production_engine import jobs, worker
+from routers import sync
+
+
+class _Response:
+    def __init__(self, data):
+        self._data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._data
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(sync.router)
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def sync_user(make_user, db):
+    user, headers = make_user()
+    user.sync_url = "https://shop.test/products.json"
+    user.woocommerce_url, user.consumer_key, user.consumer_secret = "https://shop.test", "ck", "cs"
+    db.commit()
+    return user, headers
+
+
+def test_one_active_sync_per_user_shared_through_the_queue(client, sync_user):
+    _, headers = sync_user
+    first = client.post("/me/products/sync", headers=headers)
+    assert first.status_code == 202 and first.json()["deduplicated"] is False
+    # ίδιο kind: το ίδιο job (η κατάσταση είναι στο pe_jobs, όχι στη μνήμη του process)
+    again = client.post("/me/products/sync", headers=headers).json()
+    assert again["job_id"] == first.json()["job_id"] and again["deduplicated"] is True
+    # άλλο kind όσο τρέχει το πρώτο: 409
+    busy = client.post("/me/woocommerce/sync", headers=headers)
+    assert busy.status_code == 409 and busy.json()["detail"]["job"]["job_id"] == first.json()["job_id"]
+
+
+def test_worker_runs_sync_and_frees_the_slot(client, sync_user, db, monkeypatch):
+    user, headers = sync_user
+    catalog = [{"name": f"p{i}", "price": 10 + i, "categories": [{"name": "A"}]} for i in range(3)]
+    monkeypatch.setattr(sync.requests, "get", lambda url, timeout: _Response(catalog))
+    monkeypatch.setattr(sync, "schedule_product_images", lambda items: None)
+    job_id = client.post("/me/products/sync", headers=headers).json()["job_id"]
+
+    assert worker.run_worker("test-worker", kinds=list(sync.SYNC_KINDS), once=True) == 1
+
+    job = client.get(f"/me/sync/jobs/{job_id}", headers=headers).json()
+    assert job["status"] == jobs.DONE and job["kind"] == "sync_url"
+    assert job["rows_written"] == 3 and job["pages_fetched"] == 1
+    assert job["summary"]["inserted"] == 3
+    assert db.query(Product).filter_by(owner_id=user.id).count() == 3
+    assert [j["job_id"] for j in client.get("/me/sync/jobs", headers=headers).json()] == [job_id]
+    # το singleton_key ελευθερώθηκε: νέο sync = νέο job
+    assert client.post("/me/woocommerce/sync", headers=headers).json()["deduplicated"] is False
+
+
+def test_sync_jobs_are_private(client, sync_user, make_user):
+    _, headers = sync_user
+    _, other = make_user()
+    job_id = client.post("/me/products/sync", headers=headers).json()["job_id"]
+    assert client.get(f"/me/sync/jobs/{job_id}", headers=other).status_code == 404
@@ -1,18 +1,29 @@
 from datetime import datetime, timedelta
 from typing import Optional
+import logging, os, threading, time
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
-from database import get_db
+from database import get_db, get_read_db
 from models import User
 
+logger = logging.getLogger(__name__)
+
 SECRET_KEY = "your-secret-key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
 
+# Προαιρετικό in-process cache των verified JWT (γλιτώνει το HMAC/claims decode).
+# 0 = απενεργοποιημένο. Ο user φορτώνεται πάντα από τη βάση (ένα query στο unique index του
+# email), οπότε credits/credentials δεν είναι ποτέ stale, σε κανέναν worker.
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "0"))
+AUTH_CACHE_MAX = int(os.getenv("AUTH_CACHE_MAX", "10000"))
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+# Για endpoints που δουλεύουν και ανώνυμα (χωρίς 401 όταν λείπει το token)
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -20,12 +31,53 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+# ---------- Auth cache ----------
+class _AuthCache:
+    """verified JWT -> email. Δεν κρατά τίποτα από τον user, άρα δεν χρειάζεται invalidation."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._tokens: dict[str, tuple[str, float]] = {}   # token -> (email, expires_at)
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get_email(self, token: str) -> Optional[str]:
+        with self._lock:
+            hit = self._tokens.get(token)
+            if hit is None:
+                return None
+            if hit[1] < time.monotonic():
+                self._tokens.pop(token, None)
+                return None
+            return hit[0]
+
+    def put_email(self, token: str, email: str, jwt_exp: Optional[float]):
+        expires = time.monotonic() + self.ttl
+        if jwt_exp is not None:
+            # ποτέ πέρα από το exp του ίδιου του token
+            expires = min(expires, time.monotonic() + (jwt_exp - time.time()))
+        with self._lock:
+            self._tokens.pop(token, None)
+            self._tokens[token] = (email, expires)
+            while len(self._tokens) > self.max_entries:
+                self._tokens.pop(next(iter(self._tokens)))  # παλαιότερο entry
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+
+AUTH_CACHE = _AuthCache(AUTH_CACHE_TTL, AUTH_CACHE_MAX)
+
+# ---------- Dependencies ----------
+def _email_from_token(token: str, credentials_exception: HTTPException) -> str:
+    if AUTH_CACHE.enabled:
+        email = AUTH_CACHE.get_email(token)
+        if email is not None:
+            return email
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -33,14 +85,36 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+    if AUTH_CACHE.enabled:
+        AUTH_CACHE.put_email(token, email, payload.get("exp"))
+    return email
+
+def _user_from_token(token: str, db: Session) -> User:
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    email = _email_from_token(token, credentials_exception)
 
+    # ένα query, στο unique index του email
     user = db.query(User).filter(User.email == email).first()
     if user is None:
         raise credentials_exception
 
-    db.expire_all()
-    db.refresh(user)
+    logger.debug("auth user_id=%s email=%s", user.id, email)
+    return user
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+    return _user_from_token(token, db)
 
-    print("DEBUG user fields:", vars(user))
+def get_current_user_readonly(token: str = Depends(oauth2_scheme), db: Session = Depends(get_read_db)) -> User:
+    """Για GET endpoints: ο user φορτώνεται από το read-only pool (όχι για αλλαγές/commit)."""
+    return _user_from_token(token, db)
 
-    return user
+def get_current_user_optional(token: Optional[str] = Depends(oauth2_scheme_optional),
+                              db: Session = Depends(get_read_db)) -> Optional[User]:
+    """None χωρίς token· με token, ίδιος έλεγχος με το get_current_user (άκυρο token -> 401)."""
+    if not token:
+        return None
+    return _user_from_token(token, db)
@@ -0,0 +1,62 @@
+"""
+Data migration: committed_posts χωρίς owner_id -> ένας συγκεκριμένος χρήστης.
+
+Commits που έγιναν πριν μπει η στήλη owner_id (ή ανώνυμα) έχουν owner_id NULL και το
+/previews/committed δεν τα δείχνει σε κανέναν. Δεν υπάρχει τρόπος να βρεθεί αυτόματα ποιος τα
+έκανε, οπότε ο operator τα αναθέτει ρητά (π.χ. στον λογαριασμό ενός single-tenant deployment).
+Τρέχει με το production_engine.data_migrations (chunks, checkpoint, throttling).
+
+    python tools/backfill_committed_owner.py --email admin@example.com [--before-id 1200] [--dry-run]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from production_engine.data_migrations import DataMigration, add_cli_args, run_from_args  # noqa: E402
+from production_engine.engine_database import committed_posts_table  # noqa: E402
+
+
+class AssignOwnerMigration(DataMigration):
+    name = "committed_posts_assign_owner"
+    table = committed_posts_table
+    columns = ("owner_id",)
+
+    def __init__(self, owner_id: int, before_id: int | None = None):
+        self.owner_id = owner_id
+        self.before_id = before_id
+
+    def transform(self, row):
+        if row.owner_id is not None:
+            return None
+        if self.before_id is not None and row.id >= self.before_id:
+            return None  # μόνο τα παλιά rows, όχι νεότερα ανώνυμα commits
+        return {"owner_id": self.owner_id}
+
+
+def _user_id(email: str) -> int:
+    from database import SessionLocal
+    from models import User
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == email).first()
+    finally:
+        db.close()
+    if user is None:
+        sys.exit(f"no user with email {email!r}")
+    return user.id
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--email", required=True, help="ο χρήστης που θα πάρει τα commits")
+    p.add_argument("--before-id", type=int, default=None, help="μόνο rows με id < N")
+    add_cli_args(p)
+    args = p.parse_args()
+    run_from_args(AssignOwnerMigration(_user_id(args.email), args.before_id), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: carousel 10 slides με services/image_generation.
+
+    python tools/bench_carousel.py [--slides 10] [--runs 5] [--workers 1,2,4,8] [--size 1080x1350]
+
+Variants:
+  legacy    σειριακά, template + font από τον δίσκο σε κάθε slide, img.save ανά slide (παλιός κώδικας)
+  shared    ένα template/font για όλο το carousel, 1 worker
+  parallel  create_carousel_post (shared + παράλληλα + atomic publish) για κάθε --workers
+Template: συνθετικό PNG στο --size (ή --template <αρχείο στο templates_images/>).
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PIL import Image, ImageDraw, ImageFont  # noqa: E402
+
+from services import image_generation as ig  # noqa: E402
+
+FONT = os.path.join(ROOT, "production_engine", "assets", "fonts", "DejaVuSans-Bold.ttf")
+
+
+def legacy(template_names, captions, output_dir, font_path, font_size):
+    # ο κώδικας πριν από το shared/parallel render
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for i, (template_name, caption) in enumerate(zip(template_names, captions)):
+        img = Image.open(os.path.join(ig.TEMPLATES_DIR, template_name)).convert("RGBA")
+        font = ImageFont.truetype(font_path, font_size)
+        img = ig.add_caption(img, caption, position=(20, 20), font=font)
+        path = os.path.join(output_dir, f"carousel_{i+1}.png")
+        img.save(path)
+        paths.append(path)
+    return paths
+
+
+def _time(fn, runs: int) -> list[float]:
+    out = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--slides", type=int, default=10)
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--workers", default="1,2,4,8")
+    p.add_argument("--size", default="1080x1350")
+    p.add_argument("--template", help="όνομα αρχείου στο templates_images/ (default: συνθετικό)")
+    a = p.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_carousel_") as tmp:
+        if a.template:
+            ig.TEMPLATES_DIR = os.path.join(ROOT, "templates_images")
+            name = a.template
+        else:
+            w, h = (int(x) for x in a.size.lower().split("x"))
+            im = Image.new("RGBA", (w, h), (30, 40, 60, 255))
+            d = ImageDraw.Draw(im)
+            for y in range(0, h, 6):  # θόρυβος ώστε το PNG encode να μην είναι τετριμμένο
+                d.line((0, y, w, (y * 7) % h), fill=((y * 3) % 255, (y * 5) % 255, 120, 255), width=3)
+            ig.TEMPLATES_DIR = tmp
+            name = "template.png"
+            im.save(os.path.join(tmp, name))
+
+        names = [name] * a.slides
+        captions = [f"Slide {i + 1} — Μπλούζα Ανδρική 19.90€" for i in range(a.slides)]
+        out = os.path.join(tmp, "out")
+        print(f"slides={a.slides} runs={a.runs} template={name} cpu={os.cpu_count()}")
+        print(f"{'variant':<14}{'median ms':>11}{'min ms':>9}{'ms/slide':>10}")
+
+        def row(label, times):
+            med = statistics.median(times)
+            print(f"{label:<14}{med:>11.1f}{min(times):>9.1f}{med / a.slides:>10.1f}")
+
+        row("legacy", _time(lambda: legacy(names, captions, out, FONT, 48), a.runs))
+        for workers in [int(x) for x in a.workers.split(",") if x.strip()]:
+            ig._pool = ThreadPoolExecutor(max_workers=workers)
+            label = "shared" if workers == 1 else f"parallel x{workers}"
+            row(label, _time(lambda: ig.create_carousel_post(names, captions, out, FONT, 48), a.runs))
+            ig._pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
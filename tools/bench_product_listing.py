@@ -0,0 +1,131 @@
+"""
+Benchmark του product listing σε μεγάλο πίνακα (default 1M products, 1000 χρήστες).
+
+    python tools/bench_product_listing.py --products 1000000
+    python tools/bench_product_listing.py --products 200000 --legacy   # + το παλιό GET / (όλα τα rows)
+
+Συγκρίνει ανά σελίδα (limit 50) για έναν χρήστη με πολλά προϊόντα:
+  - keyset (WHERE owner_id=? AND id>? ORDER BY id LIMIT) με/χωρίς ix_products_owner_id_id
+  - OFFSET pagination σε βαθιά σελίδα
+Τρέχει σε προσωρινό αρχείο SQLite με τα ίδια pragmas με τη database.db.
+"""
+import argparse, json, os, random, statistics, sys, tempfile, time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import select, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, make_engine
+from models import User, Product
+from schemas import ProductOut
+
+PAGE = 50
+PAGE_COLS = (Product.id, Product.name, Product.price, Product.image_url, Product.categories, Product.available)
+
+
+def seed(S, n_products: int, n_users: int, big_user_share: float):
+    with S() as db:
+        db.execute(insert(User), [
+            {"email": f"u{i}@example.com", "username": f"u{i}", "hashed_password": "x"} for i in range(n_users)
+        ])
+        db.commit()
+    rnd = random.Random(1)
+    batch = []
+    with S() as db:
+        for i in range(n_products):
+            # ο χρήστης 1 έχει big_user_share των προϊόντων, τα υπόλοιπα μοιράζονται τυχαία
+            owner = 1 if rnd.random() < big_user_share else rnd.randint(2, n_users)
+            batch.append({
+                "owner_id": owner, "name": f"Προϊόν {i}", "description": "x" * 200,
+                "price": f"{i % 100}.90", "image_url": f"https://shop.example/img/{i}.jpg",
+                "categories": f"Κατηγορία {i % 20}, Όλα", "available": i % 10 != 0,
+            })
+            if len(batch) == 10000:
+                db.execute(insert(Product), batch)
+                batch.clear()
+        if batch:
+            db.execute(insert(Product), batch)
+        db.commit()
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return {"p50_ms": round(statistics.median(samples), 2), "max_ms": round(max(samples), 2)}
+
+
+def bench_pages(S, owner_id: int, repeat: int) -> dict:
+    with S() as db:
+        ids = db.execute(select(Product.id).where(Product.owner_id == owner_id).order_by(Product.id)).scalars().all()
+    deep_cursor = ids[len(ids) * 9 // 10]
+    deep_offset = len(ids) * 9 // 10
+
+    def keyset(cursor):
+        def run():
+            with S() as db:
+                q = select(*PAGE_COLS).where(Product.owner_id == owner_id)
+                if cursor is not None:
+                    q = q.where(Product.id > cursor)
+                db.execute(q.order_by(Product.id).limit(PAGE + 1)).all()
+        return run
+
+    def offset_page():
+        with S() as db:
+            db.execute(select(*PAGE_COLS).where(Product.owner_id == owner_id)
+                       .order_by(Product.id).offset(deep_offset).limit(PAGE)).all()
+
+    def category_page():
+        with S() as db:
+            padded = Product.categories + ","
+            db.execute(select(*PAGE_COLS).where(Product.owner_id == owner_id, Product.available == True,
+                                                (", " + padded).like("%, Κατηγορία 7,%"))
+                       .order_by(Product.id).limit(PAGE + 1)).all()
+
+    return {
+        "owner_products": len(ids),
+        "keyset_first_page": timed(keyset(None), repeat),
+        "keyset_deep_page": timed(keyset(deep_cursor), repeat),
+        "offset_deep_page": timed(offset_page, max(1, repeat // 5)),
+        "keyset_category_available": timed(category_page, repeat),
+    }
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--products", type=int, default=1_000_000)
+    p.add_argument("--users", type=int, default=1000)
+    p.add_argument("--big-user-share", type=float, default=0.2, help="ποσοστό προϊόντων του χρήστη 1")
+    p.add_argument("--repeat", type=int, default=50)
+    p.add_argument("--legacy", action="store_true", help="μέτρα και το παλιό GET / (όλα τα products + ProductOut)")
+    a = p.parse_args()
+
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='autoposter_list_'), 'bench.db')}"
+    eng = make_engine(url)
+    Base.metadata.create_all(eng)
+    S = sessionmaker(bind=eng, autoflush=False)
+
+    t0 = time.perf_counter()
+    seed(S, a.products, a.users, a.big_user_share)
+    out = {"products": a.products, "users": a.users, "seed_s": round(time.perf_counter() - t0, 1)}
+
+    out["with_index"] = bench_pages(S, 1, a.repeat)
+    with eng.begin() as conn:
+        conn.execute(text("DROP INDEX ix_products_owner_id_id"))
+    out["without_composite_index"] = bench_pages(S, 1, a.repeat)
+
+    if a.legacy:
+        def legacy():
+            with S() as db:
+                # permalink δεν υπάρχει στο model (pydantic v2 τον θέλει ρητά)
+                [ProductOut.model_validate({**vars(p), "permalink": None}) for p in db.query(Product).all()]
+        out["legacy_all_rows"] = timed(legacy, 1)
+
+    print(json.dumps(out, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark του product sync: παλιό per-row (SELECT + commit + refresh ανά προϊόν)
+έναντι του bulk upsert (services/product_sync.py).
+
+    python tools/bench_product_sync.py --products 10000
+    python tools/bench_product_sync.py --products 10000 --skip-legacy
+
+Τρέχει σε προσωρινό αρχείο SQLite με τα ίδια pragmas με τη database.db.
+Μετράει 1ο sync (όλα inserts) και 2ο sync με ~10% αλλαγμένα προϊόντα.
+"""
+import argparse, json, os, sys, tempfile, time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, make_engine
+from models import User, Product
+from services.product_sync import upsert_products
+
+
+def feed(n: int, changed_every: int = 0):
+    for i in range(n):
+        desc = f"Περιγραφή {i}"
+        if changed_every and i % changed_every == 0:
+            desc += " (νέα)"
+        yield {"name": f"Προϊόν {i}", "description": desc, "image_url": f"https://shop.example/img/{i}.jpg"}
+
+
+def legacy_sync(db, owner_id, items):
+    # αντίγραφο της παλιάς λογικής του routers/sync.py
+    for p in items:
+        existing = db.query(Product).filter(Product.name == p["name"], Product.owner_id == owner_id).first()
+        if existing:
+            existing.description = p["description"]
+            existing.image_url = p["image_url"]
+            db.commit()
+            db.refresh(existing)
+        else:
+            row = Product(available=True, owner_id=owner_id, **p)
+            db.add(row)
+            db.commit()
+            db.refresh(row)
+
+
+def bulk_sync(db, owner_id, items):
+    summary = upsert_products(db, owner_id, items)
+    db.commit()
+    return summary
+
+
+def run_one(name, fn, n):
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='autoposter_sync_'), 'bench.db')}"
+    eng = make_engine(url)
+    Base.metadata.create_all(eng)
+    S = sessionmaker(bind=eng, autoflush=False)
+    with S() as db:
+        user = User(email="bench@example.com", username="bench", hashed_password="x")
+        db.add(user)
+        db.commit()
+        uid = user.id
+
+    out = {"mode": name, "products": n}
+    for label, changed_every in (("first_sync", 0), ("resync_10pct_changed", 10)):
+        with S() as db:
+            t0 = time.perf_counter()
+            res = fn(db, uid, feed(n, changed_every))
+            out[label + "_s"] = round(time.perf_counter() - t0, 3)
+            if res:
+                out[label + "_summary"] = res
+    with S() as db:
+        out["rows"] = db.query(Product).filter(Product.owner_id == uid).count()
+    eng.dispose()
+    return out
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--products", type=int, default=10000)
+    p.add_argument("--skip-legacy", action="store_true", help="μόνο το bulk (το legacy είναι αργό)")
+    a = p.parse_args()
+
+    results = [run_one("bulk", bulk_sync, a.products)]
+    if not a.skip_legacy:
+        results.append(run_one("legacy_per_row", legacy_sync, a.products))
+    print(json.dumps(results, indent=2, ensure_ascii=False))
@@ -0,0 +1,331 @@
+"""
+Benchmark suite για τα render engines, με σταθερά συνθετικά fixtures και fonts.
+
+    python tools/bench_render.py                                  # όλα τα cases
+    python tools/bench_render.py --cases paste_fit,greek -n 100 --json bench.json
+    python tools/bench_render.py --json new.json --compare bench.json [--threshold 10]
+
+Cases:
+  render_image.simple     previews.render_image χωρίς template (compose_image_greek + PNG)
+  render_image.template   previews.render_image με spec από το pe_templates (background, image, logo, 3 text slots)
+  greek                   greek_text_renderer.render_image_greek (title/price/cta + logo)
+  write_svg               tengine._write_svg (fallback renderer: product + logo σε data URIs)
+  registry.render_svg     TemplateRegistry.render_svg (Jinja SVG, template fixture)
+  finals                  tengine._final_from_preview με cairosvg (skipped αν δεν υπάρχει το cairosvg)
+  paste_fit               previews._paste_fit 1600x1200 -> slot 900x900 cover
+
+Κάθε case τρέχει σε δικό του process μέσα σε προσωρινό workdir (δικές του engine.db/database.db,
+static/, fonts), ώστε το peak RSS να είναι καθαρό και το repo να μη λερώνεται.
+Fonts: DejaVuSans του repo, και ως NotoSans-* για το previews (τα system fonts αγνοούνται).
+Αναφέρει ops/s, p50/p95/mean ms και peak RSS. --compare: % διαφορά p50 ανά case και exit 1 όταν
+κάποιο case είναι πιο αργό από --threshold %.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FONTS = os.path.join(ROOT, "production_engine", "assets", "fonts")
+
+TITLE = "Μπλούζα Ανδρική Βαμβακερή με Κέντημα — Νέα Συλλογή"
+PRICE = "19.90€"
+CTA = "Αγόρασε τώρα"
+
+REGISTRY_META = {
+    "id": "bench", "name": "Bench", "version": "1.0.0", "ratios": ["1:1", "4:5"],
+    "fields": {
+        "title": {"type": "text", "required": True, "max_chars": 80},
+        "price": {"type": "price", "required": True, "format": "€{value}"},
+        "image_url": {"type": "image", "required": True},
+        "brand_color": {"type": "color", "default": "#0fbf91"},
+        "cta_text": {"type": "text", "default": "Buy now"},
+    },
+}
+REGISTRY_SVG = """<svg xmlns="http://www.w3.org/2000/svg" width="1080" height="1080">
+  <rect x="0" y="0" width="1080" height="1080" fill="#ffffff"/>
+  <rect x="90" y="90" width="900" height="700" data-slot="image:image_url" data-fit="contain"/>
+  <image href="{{ image_url }}" x="90" y="90" width="900" height="700"/>
+  {% for i in range(3) %}<rect x="{{ 60 + i * 20 }}" y="{{ 820 + i * 4 }}" width="4" height="4" fill="{{ brand_color }}"/>{% endfor %}
+  <text x="540" y="880" text-anchor="middle" data-slot="text:title" data-width="960">{{ title }}</text>
+  <text x="540" y="960" text-anchor="middle" fill="{{ brand_color }}" data-slot="text:price">{{ price }}</text>
+  <text x="540" y="1040" text-anchor="middle">{{ cta_text }}</text>
+</svg>
+"""
+
+TEMPLATE_SPEC = {
+    "canvas_w": 1080, "canvas_h": 1080, "background": "/static/uploads/bench_bg.png",
+    "slots": [
+        {"kind": "image", "source": "extra1", "x": 90, "y": 90, "w": 900, "h": 600, "fit": "cover"},
+        {"kind": "logo", "x": 760, "y": 940, "w": 240, "h": 96},
+        {"kind": "text", "text_key": "title", "x": 60, "y": 720, "w": 960, "h": 140, "font_size": 48, "bold": True},
+        {"kind": "text", "text_key": "price", "x": 60, "y": 870, "w": 400, "h": 70, "font_size": 52, "color": "#48e478"},
+        {"kind": "text", "text_key": "cta", "x": 60, "y": 960, "w": 600, "h": 60, "font_size": 36, "align": "left"},
+    ],
+}
+
+
+# ---------- fixtures ----------
+def make_fixtures(workdir: str) -> None:
+    """Ντετερμινιστικές εικόνες/fonts/templates μέσα στο workdir (ίδια bytes σε κάθε run)."""
+    from PIL import Image, ImageDraw
+
+    static = os.path.join(workdir, "production_engine", "static")
+    uploads = os.path.join(static, "uploads")
+    os.makedirs(uploads, exist_ok=True)
+    os.makedirs(os.path.join(static, "generated", "previews"), exist_ok=True)
+
+    def pattern(w, h, seed):
+        im = Image.new("RGBA", (w, h), (20 + seed, 30, 50, 255))
+        d = ImageDraw.Draw(im)
+        for y in range(0, h, 8):  # θόρυβος ώστε decode/encode να μην είναι τετριμμένα
+            d.line((0, y, w, (y * 7 + seed) % h), fill=((y * 3) % 255, (y * 5 + seed) % 255, 140, 255), width=3)
+        return im
+
+    pattern(1080, 1080, 0).save(os.path.join(uploads, "bench_bg.png"))
+    pattern(1600, 1200, 40).save(os.path.join(uploads, "bench_product.png"))
+    logo = Image.new("RGBA", (400, 160), (0, 0, 0, 0))
+    ImageDraw.Draw(logo).rounded_rectangle((0, 0, 399, 159), radius=24, fill=(15, 191, 145, 255))
+    logo.save(os.path.join(uploads, "bench_logo.png"))
+
+    fonts = os.path.join(workdir, "production_engine", "assets", "fonts")
+    os.makedirs(fonts, exist_ok=True)
+    shutil.copy(os.path.join(FONTS, "DejaVuSans.ttf"), os.path.join(fonts, "NotoSans-Regular.ttf"))
+    shutil.copy(os.path.join(FONTS, "DejaVuSans-Bold.ttf"), os.path.join(fonts, "NotoSans-Bold.ttf"))
+
+    tpl = os.path.join(workdir, "templates", "bench")
+    os.makedirs(tpl, exist_ok=True)
+    with open(os.path.join(tpl, "meta.json"), "w", encoding="utf-8") as fh:
+        json.dump(REGISTRY_META, fh)
+    with open(os.path.join(tpl, "template.svg.j2"), "w", encoding="utf-8") as fh:
+        fh.write(REGISTRY_SVG)
+
+
+# ---------- cases: setup(workdir) -> op ----------
+def _static(workdir):
+    return os.path.join(workdir, "production_engine", "static")
+
+
+def _tengine():
+    # το package production_engine/routers/tengine/ σκιάζει το tengine.py: φόρτωση από το αρχείο
+    import importlib.util
+    path = os.path.join(ROOT, "production_engine", "routers", "tengine.py")
+    spec = importlib.util.spec_from_file_location("bench_tengine", path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def case_render_simple(workdir):
+    from production_engine.routers import previews
+    req = previews.RenderRequest(text_fields={"title": TITLE, "price": PRICE, "cta": CTA},
+                                 brand_logo_url="/static/uploads/bench_logo.png")
+    return lambda: previews.render_image(req)
+
+
+def case_render_template(workdir):
+    from sqlalchemy import insert
+    from production_engine.engine_database import engine, init_schema, pe_templates_table
+    from production_engine.routers import previews
+    init_schema()
+    with engine.begin() as conn:
+        tid = conn.execute(insert(pe_templates_table).values(
+            name="bench", type="image", ratio="1:1", spec_json=json.dumps(TEMPLATE_SPEC))).inserted_primary_key[0]
+    req = previews.RenderRequest(template_id=tid, extra_images=["/static/uploads/bench_product.png"],
+                                 brand_logo_url="/static/uploads/bench_logo.png",
+                                 text_fields={"title": TITLE, "price": PRICE, "cta": CTA})
+    return lambda: previews.render_image(req)
+
+
+def case_greek(workdir):
+    from production_engine.services import greek_text_renderer as g
+    out = os.path.join(workdir, "greek.png")
+    logo = os.path.join(_static(workdir), "uploads", "bench_logo.png")
+    return lambda: g.render_image_greek(out, title=TITLE, price=PRICE, cta=CTA, brand_logo_path=logo)
+
+
+def case_write_svg(workdir):
+    tengine = _tengine()
+    static = _static(workdir)
+    meta = {"ratio": "1:1", "title": TITLE, "price": PRICE, "image_url": "/static/uploads/bench_product.png",
+            "logo_url": "/static/uploads/bench_logo.png", "brand_color": "#0fbf91", "cta_text": CTA,
+            "badge_text": "-20%"}
+    out = os.path.join(static, "generated", "previews", "bench.svg")
+    return lambda: tengine._write_svg(meta, out, is_preview=True, static_dir=static)
+
+
+def case_registry(workdir):
+    from pathlib import Path
+    from services.template_registry import TemplateRegistry
+    reg = TemplateRegistry(Path(workdir) / "templates")
+    rec = reg.get("bench")
+    ctx, _ = reg.validate_and_merge(rec, {"title": TITLE, "price": "19.9",
+                                          "image_url": "/static/uploads/bench_product.png"}, "1:1")
+    return lambda: reg.render_svg(rec, ctx)
+
+
+def case_finals(workdir):
+    tengine = _tengine()
+    if not tengine.HAS_CAIROSVG:
+        raise SkipCase("cairosvg unavailable")
+    op = case_write_svg(workdir)
+    op()  # το preview SVG που θα ραστεροποιείται
+    static = _static(workdir)
+    return lambda: tengine._final_from_preview("/static/generated/previews/bench.svg", static)
+
+
+def case_paste_fit(workdir):
+    from PIL import Image
+    from production_engine.routers import previews
+    img = Image.open(os.path.join(_static(workdir), "uploads", "bench_product.png")).convert("RGBA")
+    slot = {"x": 0, "y": 0, "w": 900, "h": 900, "fit": "cover"}
+    return lambda: previews._paste_fit(img, slot)
+
+
+class SkipCase(Exception):
+    pass
+
+
+CASES = {
+    "render_image.simple": case_render_simple,
+    "render_image.template": case_render_template,
+    "greek": case_greek,
+    "write_svg": case_write_svg,
+    "registry.render_svg": case_registry,
+    "finals": case_finals,
+    "paste_fit": case_paste_fit,
+}
+
+
+# ---------- runner ----------
+def _percentile(sorted_ms: list[float], pct: float) -> float:
+    k = max(0, min(len(sorted_ms) - 1, int(round(pct / 100 * len(sorted_ms) + 0.5)) - 1))  # nearest-rank
+    return sorted_ms[k]
+
+
+def _child(name: str, workdir: str, iterations: int, warmup: int) -> dict:
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+    from production_engine.services import greek_text_renderer
+    greek_text_renderer.SYSTEM_FONT_DIRS = []  # μόνο τα fonts του repo
+    try:
+        op = CASES[name](workdir)
+    except SkipCase as e:
+        return {"skipped": str(e)}
+    for _ in range(warmup):
+        op()
+    samples = []
+    t_all = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        op()
+        samples.append((time.perf_counter() - t0) * 1000)
+    wall = time.perf_counter() - t_all
+    samples.sort()
+    return {
+        "iterations": iterations,
+        "ops_per_s": round(iterations / wall, 2),
+        "p50_ms": round(_percentile(samples, 50), 3),
+        "p95_ms": round(_percentile(samples, 95), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def _meta() -> dict:
+    import PIL
+
+    def git(*args):
+        r = subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True)
+        return r.stdout.strip() if r.returncode == 0 else None
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "date": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "machine": f"{platform.system()} {platform.machine()} cpu={os.cpu_count()}",
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> int:
+    base = baseline.get("results", {})
+    print(f"\nvs {baseline.get('meta', {}).get('commit')} (threshold {threshold:.0f}% p50)")
+    print(f"{'case':<24}{'base p50':>10}{'new p50':>10}{'delta':>9}")
+    regressions = 0
+    for name, r in results.items():
+        b = base.get(name)
+        if not b or "p50_ms" not in b or "p50_ms" not in r:
+            continue
+        delta = (r["p50_ms"] - b["p50_ms"]) / b["p50_ms"] * 100
+        flag = "  REGRESSION" if delta > threshold else ""
+        regressions += bool(flag)
+        print(f"{name:<24}{b['p50_ms']:>10.2f}{r['p50_ms']:>10.2f}{delta:>8.1f}%{flag}")
+    return 1 if regressions else 0
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--cases", default=",".join(CASES), help="comma-separated (default: όλα)")
+    p.add_argument("-n", "--iterations", type=int, default=30)
+    p.add_argument("--warmup", type=int, default=3)
+    p.add_argument("--json", dest="json_out", help="αποθήκευση αποτελεσμάτων")
+    p.add_argument("--compare", help="JSON προηγούμενου run για σύγκριση")
+    p.add_argument("--threshold", type=float, default=10.0, help="%% αύξηση p50 που μετράει ως regression")
+    p.add_argument("--child", help=argparse.SUPPRESS)
+    p.add_argument("--workdir", help=argparse.SUPPRESS)
+    a = p.parse_args()
+
+    if a.child:
+        print(json.dumps(_child(a.child, a.workdir, a.iterations, a.warmup)))
+        return
+
+    names = [n.strip() for n in a.cases.split(",") if n.strip()]
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        raise SystemExit(f"unknown cases: {unknown} (choose from {list(CASES)})")
+
+    results = {}
+    print(f"{'case':<24}{'ops/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}{'RSS MB':>9}")
+    for name in names:
+        with tempfile.TemporaryDirectory(prefix="bench_render_") as workdir:
+            make_fixtures(workdir)
+            env = dict(os.environ,
+                       ENGINE_DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'engine.db')}",
+                       DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'database.db')}",
+                       IMAGE_MIRROR_DIR=os.path.join(workdir, "mirror"),
+                       PYTHONPATH=ROOT)
+            cmd = [sys.executable, os.path.abspath(__file__), "--child", name, "--workdir", workdir,
+                   "-n", str(a.iterations), "--warmup", str(a.warmup)]
+            r = subprocess.run(cmd, capture_output=True, text=True, cwd=workdir, env=env)
+        if r.returncode != 0:
+            print(f"{name:<24}failed\n{r.stderr.strip()[-800:]}")
+            results[name] = {"error": r.stderr.strip().splitlines()[-1] if r.stderr.strip() else "failed"}
+            continue
+        res = results[name] = json.loads(r.stdout.strip().splitlines()[-1])
+        if "skipped" in res:
+            print(f"{name:<24}skipped ({res['skipped']})")
+            continue
+        print(f"{name:<24}{res['ops_per_s']:>9}{res['p50_ms']:>10}{res['p95_ms']:>10}"
+              f"{res['mean_ms']:>10}{res['peak_rss_mb']:>9}")
+
+    out = {"meta": _meta(), "iterations": a.iterations, "warmup": a.warmup, "results": results}
+    if a.json_out:
+        with open(a.json_out, "w", encoding="utf-8") as fh:
+            json.dump(out, fh, indent=2, ensure_ascii=False)
+    if a.compare:
+        with open(a.compare, encoding="utf-8") as fh:
+            sys.exit(compare(results, json.load(fh), a.threshold))
+
+
+if __name__ == "__main__":
+    main()
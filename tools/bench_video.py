@@ -0,0 +1,117 @@
+"""
+Benchmark: video από στατική εικόνα, moviepy (παλιό path) vs ffmpeg pipe.
+
+    python tools/bench_video.py [--size 1080x1080] [--duration 5] [--runs 3]
+        [--variants moviepy,frames,still] [--preset veryfast] [--crf 23] [--json out.json]
+
+Variants:
+  moviepy  temp JPEG + ImageClip.write_videofile(fps=24) (όπως promo_creator / video_generator)
+  frames   ffmpeg pipe με ΟΛΑ τα (ίδια) frames, encode_frames()
+  still    ffmpeg pipe με ΕΝΑ frame + loop filter, encode_still() (το νέο path)
+
+Κάθε run τρέχει σε ξεχωριστό process, ώστε το peak RSS (process + ffmpeg child) να είναι
+καθαρό ανά variant.
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _frame(w: int, h: int):
+    from PIL import Image, ImageDraw
+    from production_engine.services.greek_text_renderer import load_font
+    im = Image.new("RGB", (w, h), (20, 20, 20))
+    d = ImageDraw.Draw(im)
+    d.rectangle((w // 10, h // 8, w - w // 10, h * 2 // 3), fill=(180, 60, 60))
+    d.text((50, h - 200), "Μπλούζα Ανδρική — 19.90€", font=load_font(60, bold=True), fill="white")
+    return im
+
+
+def _child(variant: str, w: int, h: int, duration: float, preset: str, crf: int, out: str) -> dict:
+    from production_engine.services import video_renderer as vr
+    fps = 24
+    t0 = time.perf_counter()
+    im = _frame(w, h)
+    if variant == "moviepy":
+        from moviepy.editor import ImageClip
+        tmp = os.path.join(os.path.dirname(out), "temp_promo_image.jpg")
+        im.save(tmp)
+        clip = ImageClip(tmp).set_duration(duration)
+        clip.write_videofile(out, fps=fps, logger=None)
+        clip.close()
+        os.remove(tmp)
+    elif variant == "frames":
+        n = int(round(duration * fps))
+        vr.encode_frames((im for _ in range(n)), out, size=im.size, fps=fps, preset=preset, crf=crf)
+    elif variant == "still":
+        vr.encode_still(im, out, duration=duration, fps=fps, preset=preset, crf=crf)
+    else:
+        raise SystemExit(f"unknown variant {variant}")
+    wall = time.perf_counter() - t0
+    rss_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                 resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return {"wall_s": wall, "peak_rss_mb": rss_kb / 1024, "bytes": os.path.getsize(out)}
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--size", default="1080x1080")
+    p.add_argument("--duration", type=float, default=5.0)
+    p.add_argument("--runs", type=int, default=3)
+    p.add_argument("--variants", default="moviepy,frames,still")
+    p.add_argument("--preset", default=os.getenv("VIDEO_PRESET", "veryfast"))
+    p.add_argument("--crf", type=int, default=int(os.getenv("VIDEO_CRF", "23")))
+    p.add_argument("--json", dest="json_out")
+    p.add_argument("--child", help=argparse.SUPPRESS)
+    p.add_argument("--out", help=argparse.SUPPRESS)
+    a = p.parse_args()
+    w, h = (int(x) for x in a.size.lower().split("x"))
+
+    if a.child:
+        print(json.dumps(_child(a.child, w, h, a.duration, a.preset, a.crf, a.out)))
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench_video_") as tmpdir:
+        for variant in [v.strip() for v in a.variants.split(",") if v.strip()]:
+            runs = []
+            for i in range(a.runs):
+                out = os.path.join(tmpdir, f"{variant}_{i}.mp4")
+                cmd = [sys.executable, os.path.abspath(__file__), "--child", variant, "--out", out,
+                       "--size", a.size, "--duration", str(a.duration), "--preset", a.preset, "--crf", str(a.crf)]
+                r = subprocess.run(cmd, capture_output=True, text=True, cwd=tmpdir)
+                if r.returncode != 0:
+                    print(f"{variant}: failed\n{r.stderr.strip()[-800:]}")
+                    break
+                runs.append(json.loads(r.stdout.strip().splitlines()[-1]))
+            if not runs:
+                continue
+            results[variant] = {
+                "runs": len(runs),
+                "wall_s_median": round(statistics.median(r["wall_s"] for r in runs), 3),
+                "wall_s_min": round(min(r["wall_s"] for r in runs), 3),
+                "peak_rss_mb": round(max(r["peak_rss_mb"] for r in runs), 1),
+                "bytes": runs[-1]["bytes"],
+            }
+
+    print(f"size={a.size} duration={a.duration}s preset={a.preset} crf={a.crf}")
+    print(f"{'variant':<10}{'median s':>10}{'min s':>9}{'peak RSS MB':>13}{'mp4 KB':>9}")
+    for variant, r in results.items():
+        print(f"{variant:<10}{r['wall_s_median']:>10}{r['wall_s_min']:>9}{r['peak_rss_mb']:>13}{r['bytes'] / 1024:>9.0f}")
+    if a.json_out:
+        with open(a.json_out, "w", encoding="utf-8") as fh:
+            json.dump({"size": a.size, "duration": a.duration, "preset": a.preset, "crf": a.crf,
+                       "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Load test για database.db: readers (/me/posts, /me/credits queries) ενώ writers
+κάνουν product sync (bulk insert + commit) και post commits ταυτόχρονα.
+
+    python tools/load_test_db.py --seconds 10 --readers 8 --writers 2
+    python tools/load_test_db.py --journal delete   # baseline χωρίς WAL για σύγκριση
+
+Τρέχει σε προσωρινό αρχείο SQLite, δεν αγγίζει τη database.db.
+"""
+import argparse, json, os, sys, tempfile, threading, time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, SQLITE_PRAGMAS, make_engine
+from models import User, Post, Product
+
+
+def pct(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run(a):
+    tmpdir = tempfile.mkdtemp(prefix="autoposter_load_")
+    url = f"sqlite:///{os.path.join(tmpdir, 'load.db')}"
+    pragmas = dict(SQLITE_PRAGMAS)
+    pragmas["journal_mode"] = a.journal.upper()
+    if a.journal.lower() != "wal":
+        pragmas["synchronous"] = "FULL"
+
+    write_engine = make_engine(url, pool_size=a.writers + 1, pragmas=pragmas)
+    read_engine = write_engine if a.no_split else make_engine(
+        url, read_only=True, pool_size=a.readers + 1, pragmas=pragmas)
+    Base.metadata.create_all(write_engine)
+
+    W = sessionmaker(bind=write_engine, autoflush=False)
+    R = sessionmaker(bind=read_engine, autoflush=False)
+
+    with W() as db:
+        user = User(email="load@example.com", username="load", hashed_password="x", credits=10**9)
+        db.add(user)
+        db.flush()
+        uid = user.id
+        db.add_all(Post(owner_id=uid, content="seed", media_urls=json.dumps([f"/static/p{i}.png"]))
+                   for i in range(a.seed_posts))
+        db.commit()
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    read_lat, write_lat = [], []
+    errors = {"read": 0, "write": 0}
+
+    def reader():
+        local = []
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                with R() as db:
+                    db.execute(select(User.credits).where(User.id == uid)).scalar()
+                    db.execute(
+                        select(Post.id, Post.title, Post.media_urls, Post.created_at)
+                        .where(Post.owner_id == uid).order_by(Post.id.desc()).limit(50)
+                    ).all()
+                local.append(time.perf_counter() - t0)
+            except Exception:
+                with lock:
+                    errors["read"] += 1
+        with lock:
+            read_lat.extend(local)
+
+    def writer(n):
+        local, i = [], 0
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                with W() as db:
+                    if i % 2 == 0:
+                        # "sync": batch από προϊόντα σε ένα commit
+                        db.add_all(Product(name=f"w{n}-{i}-{k}", owner_id=uid) for k in range(a.batch))
+                    else:
+                        # "commit": χρέωση credit + νέο post
+                        u = db.get(User, uid)
+                        u.credits -= 1
+                        db.add(Post(owner_id=uid, content="c", media_urls="[]"))
+                    db.commit()
+                local.append(time.perf_counter() - t0)
+            except Exception:
+                with lock:
+                    errors["write"] += 1
+            i += 1
+        with lock:
+            write_lat.extend(local)
+
+    threads = [threading.Thread(target=reader) for _ in range(a.readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(a.writers)]
+    t_start = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(a.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t_start
+
+    ms = lambda v: round(v * 1000, 2)
+    return {
+        "journal_mode": pragmas["journal_mode"],
+        "read_write_split": not a.no_split,
+        "readers": a.readers,
+        "writers": a.writers,
+        "seconds": round(elapsed, 2),
+        "reads": len(read_lat),
+        "reads_per_sec": round(len(read_lat) / elapsed, 1),
+        "read_p50_ms": ms(pct(read_lat, 50)),
+        "read_p95_ms": ms(pct(read_lat, 95)),
+        "writes": len(write_lat),
+        "writes_per_sec": round(len(write_lat) / elapsed, 1),
+        "write_p95_ms": ms(pct(write_lat, 95)),
+        "errors": errors,
+    }
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--seconds", type=float, default=10)
+    p.add_argument("--readers", type=int, default=8)
+    p.add_argument("--writers", type=int, default=2)
+    p.add_argument("--batch", type=int, default=200, help="products ανά sync commit")
+    p.add_argument("--seed-posts", type=int, default=2000)
+    p.add_argument("--journal", default="wal", help="wal | delete")
+    p.add_argument("--no-split", action="store_true", help="readers στο ίδιο pool με τους writers")
+    print(json.dumps(run(p.parse_args()), indent=2))
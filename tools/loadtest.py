@@ -0,0 +1,362 @@
+"""
+End-to-end HTTP load test: ταυτόχρονα mixes από preview / commit / listing / sync.
+
+    python tools/loadtest.py                                   # in-process server, 8 clients, 20s
+    python tools/loadtest.py -c 32 --duration 60 --mix preview=4,commit=3,list=2,sync=1 --json run.json
+    python tools/loadtest.py --url http://127.0.0.1:8000 --users 2    # απέναντι σε server που τρέχει ήδη
+
+In-process: το main:app σηκώνεται σε uvicorn (thread) μέσα σε προσωρινό workdir, με δικές του
+database.db/engine.db και static/. Το mock WooCommerce router του ίδιου app είναι το upstream
+του sync, και το /previews/commit χρεώνει credits μέσω του /me/use-credit του ίδιου server.
+Ο server μοιράζεται το GIL με τον load generator: για νούμερα παραγωγής, --url σε server με
+κανονικούς workers.
+
+Ops (κάθε client διαλέγει με βάρη από το --mix):
+  preview  POST /previews/render (simple compose, ή --template-id)
+  commit   POST /previews/commit ενός preview του ίδιου χρήστη (αν δεν υπάρχει, πρώτα ένα preview)
+  list     GET  /previews/committed?limit=20
+  sync     POST /me/woocommerce/sync (202· single-flight ανά χρήστη)
+
+Αναφορά: throughput, p50/p95/p99/max ανά op, error rate και status codes (402 στο commit =
+τελείωσαν τα credits, μετράει χωριστά), και έλεγχος credits ανά χρήστη: χρέωση == επιτυχημένα
+commits == νέα committed posts.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict, deque
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+OPS = ("preview", "commit", "list", "sync")
+PASSWORD = "loadtest-pass"
+
+
+# ---------- in-process server ----------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workdir: str, woo_products: int):
+    """main:app σε uvicorn thread μέσα στο workdir. Επιστρέφει (base_url, server)."""
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    os.makedirs(os.path.join(workdir, "production_engine", "static", "generated"), exist_ok=True)
+    os.makedirs(os.path.join(workdir, "production_engine", "static", "uploads"), exist_ok=True)
+    for rel in ("assets", "templates", os.path.join("production_engine", "assets")):
+        os.symlink(os.path.join(ROOT, rel), os.path.join(workdir, rel))
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'database.db')}",
+        "ENGINE_DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'engine.db')}",
+        "CREDITS_DEBIT_URL": f"{base}/me/use-credit",
+        "MOCK_WOO_PRODUCTS": str(woo_products),
+        "IMAGE_MIRROR_DIR": os.path.join(workdir, "mirror"),
+        "IMAGE_MIRROR_ON_SYNC": "0",  # οι εικόνες του mock είναι εξωτερικά URLs
+    })
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+
+    import uvicorn
+    import models  # noqa: F401
+    from database import Base, engine
+    Base.metadata.create_all(bind=engine)
+    from main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="loadtest-server", daemon=True).start()
+    deadline = time.monotonic() + 30
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise SystemExit("server did not start")
+        time.sleep(0.05)
+    return base, server
+
+
+def local_user(email: str, credits: int) -> str:
+    """In-process: χρήστης κατευθείαν στη βάση + JWT (χωρίς /register, /login και το κόστος του bcrypt)."""
+    from database import SessionLocal
+    from models import User
+    from token_module import create_access_token
+    with SessionLocal() as db:
+        db.add(User(email=email, username=email.split("@")[0], hashed_password="!", credits=credits))
+        db.commit()
+    return create_access_token({"sub": email})
+
+
+# ---------- stats ----------
+class OpStats:
+    def __init__(self):
+        self.latencies: list[float] = []  # ms, μόνο για απαντήσεις (όχι exceptions)
+        self.statuses: Counter = Counter()
+        self.ok = 0
+        self.rejected = 0  # αναμενόμενα "όχι" (402 χωρίς credits)
+        self.errors = 0
+
+    def record(self, ms: float, status, ok: bool, rejected: bool = False) -> None:
+        if isinstance(status, int):
+            self.latencies.append(ms)
+        self.statuses[str(status)] += 1
+        if ok:
+            self.ok += 1
+        elif rejected:
+            self.rejected += 1
+        else:
+            self.errors += 1
+
+    def summary(self, wall: float) -> dict:
+        lat = sorted(self.latencies)
+        n = self.ok + self.rejected + self.errors
+
+        def pct(p):
+            return round(lat[max(0, min(len(lat) - 1, int(p / 100 * len(lat) + 0.5) - 1))], 1) if lat else None
+
+        return {
+            "requests": n, "ok": self.ok, "rejected": self.rejected, "errors": self.errors,
+            "error_rate": round(self.errors / n, 4) if n else 0.0,
+            "rps": round(n / wall, 2) if wall else 0.0,
+            "p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99),
+            "max_ms": round(lat[-1], 1) if lat else None,
+            "statuses": dict(self.statuses),
+        }
+
+
+# ---------- clients ----------
+class Account:
+    def __init__(self, email: str, token: str):
+        self.email = email
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.previews: deque = deque()
+        self.preview_ids: Counter = Counter()
+        self.commits_ok = 0
+        self.credits_before = self.credits_after = None
+        self.posts_before = self.posts_after = None
+
+
+async def create_account(client: httpx.AsyncClient, base: str, woo_url: str, credits=None) -> Account:
+    tag = uuid.uuid4().hex[:10]
+    email = f"loadtest-{tag}@example.com"
+    if credits is not None:
+        acc = Account(email, local_user(email, credits))
+    else:
+        r = await client.post(f"{base}/register", json={"email": email, "username": f"lt_{tag}", "password": PASSWORD})
+        r.raise_for_status()
+        r = await client.post(f"{base}/login", data={"username": email, "password": PASSWORD})
+        r.raise_for_status()
+        acc = Account(email, r.json()["access_token"])
+    r = await client.post(f"{base}/me/woocommerce-credentials", headers=acc.headers,
+                          json={"url": woo_url, "ck": "ck_loadtest", "cs": "cs_loadtest"})
+    r.raise_for_status()
+    return acc
+
+
+async def credits_of(client, base, acc) -> int:
+    r = await client.get(f"{base}/me/credits", headers=acc.headers)
+    r.raise_for_status()
+    return int(r.json()["credits"])
+
+
+async def committed_count(client, base, acc) -> int:
+    n, before = 0, None
+    while True:
+        params = {"limit": 100, **({"before_id": before} if before else {})}
+        r = await client.get(f"{base}/previews/committed", headers=acc.headers, params=params)
+        r.raise_for_status()
+        data = r.json()
+        n += data["count"]
+        before = data.get("next_before_id")
+        if not before:
+            return n
+
+
+async def timed(stats: OpStats, coro_fn, ok_codes=(200,), reject_codes=()):
+    t0 = time.perf_counter()
+    try:
+        r = await coro_fn()
+    except httpx.HTTPError as e:
+        stats.record((time.perf_counter() - t0) * 1000, f"exc:{type(e).__name__}", ok=False)
+        return None
+    ms = (time.perf_counter() - t0) * 1000
+    stats.record(ms, r.status_code, ok=r.status_code in ok_codes, rejected=r.status_code in reject_codes)
+    return r
+
+
+async def op_preview(client, base, acc, stats, template_id):
+    body = {"product_id": random.randint(1, 500), "template_id": template_id,
+            "text_fields": {"title": "Μπλούζα Ανδρική Βαμβακερή", "price": "19.90€", "cta": "Αγόρασε τώρα"}}
+    r = await timed(stats["preview"], lambda: client.post(f"{base}/previews/render", headers=acc.headers, json=body))
+    if r is not None and r.status_code == 200:
+        pid = r.json()["preview_id"]
+        acc.preview_ids[pid] += 1
+        acc.previews.append(pid)
+
+
+async def op_commit(client, base, acc, stats, template_id):
+    if not acc.previews:
+        await op_preview(client, base, acc, stats, template_id)
+        if not acc.previews:
+            return
+    pid = acc.previews.popleft()
+    r = await timed(stats["commit"], lambda: client.post(f"{base}/previews/commit", headers=acc.headers,
+                                                          json={"preview_id": pid}), reject_codes=(402,))
+    if r is not None and r.status_code == 200:
+        acc.commits_ok += 1
+
+
+async def op_list(client, base, acc, stats, template_id):
+    await timed(stats["list"], lambda: client.get(f"{base}/previews/committed", headers=acc.headers,
+                                                  params={"limit": 20}))
+
+
+async def op_sync(client, base, acc, stats, template_id):
+    await timed(stats["sync"], lambda: client.post(f"{base}/me/woocommerce/sync", headers=acc.headers),
+                ok_codes=(202,))
+
+
+OP_FNS = {"preview": op_preview, "commit": op_commit, "list": op_list, "sync": op_sync}
+
+
+def parse_mix(spec: str) -> dict:
+    mix = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPS:
+            raise SystemExit(f"unknown op {name!r} (choose from {OPS})")
+        mix[name] = float(weight or 1)
+    return {k: v for k, v in mix.items() if v > 0}
+
+
+async def run(a, base: str) -> dict:
+    mix = parse_mix(a.mix)
+    names, weights = list(mix), list(mix.values())
+    stats = defaultdict(OpStats)
+    limits = httpx.Limits(max_connections=a.concurrency + 4)
+    async with httpx.AsyncClient(timeout=a.timeout, limits=limits) as client:
+        local_credits = None if a.url else a.credits
+        accounts = [await create_account(client, base, a.woo_url or base, local_credits) for _ in range(a.users)]
+        for acc in accounts:
+            acc.credits_before = await credits_of(client, base, acc)
+            acc.posts_before = await committed_count(client, base, acc)
+
+        deadline = time.monotonic() + a.duration
+        budget = [a.requests] if a.requests else None
+        rng = random.Random(a.seed)
+
+        async def client_loop(i: int):
+            acc = accounts[i % len(accounts)]
+            while time.monotonic() < deadline:
+                if budget is not None:
+                    if budget[0] <= 0:
+                        return
+                    budget[0] -= 1
+                op = rng.choices(names, weights)[0]
+                await OP_FNS[op](client, base, acc, stats, a.template_id)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(client_loop(i) for i in range(a.concurrency)))
+        wall = time.perf_counter() - t0
+
+        users = []
+        for acc in accounts:
+            acc.credits_after = await credits_of(client, base, acc)
+            acc.posts_after = await committed_count(client, base, acc)
+            r = await client.get(f"{base}/me/sync/jobs", headers=acc.headers)
+            sync_jobs = Counter(j.get("status") for j in r.json()) if r.status_code == 200 else {}
+            debited = acc.credits_before - acc.credits_after
+            new_posts = acc.posts_after - acc.posts_before
+            users.append({
+                "email": acc.email,
+                "credits_before": acc.credits_before, "credits_after": acc.credits_after,
+                "debited": debited, "commits_ok": acc.commits_ok, "new_posts": new_posts,
+                "duplicate_preview_ids": sum(n - 1 for n in acc.preview_ids.values() if n > 1),
+                "sync_jobs": dict(sync_jobs),
+                "consistent": debited == acc.commits_ok == new_posts,
+            })
+
+    ops = {name: stats[name].summary(wall) for name in OPS if name in stats}
+    total = sum(o["requests"] for o in ops.values())
+    return {
+        "target": base, "concurrency": a.concurrency, "duration_s": round(wall, 2), "mix": mix,
+        "total_requests": total, "throughput_rps": round(total / wall, 2) if wall else 0.0,
+        "ops": ops, "users": users, "credits_consistent": all(u["consistent"] for u in users),
+    }
+
+
+def report(res: dict) -> None:
+    print(f"\n{res['target']}  clients={res['concurrency']}  {res['duration_s']}s  "
+          f"{res['total_requests']} requests  {res['throughput_rps']} req/s")
+    print(f"{'op':<9}{'n':>7}{'ok':>7}{'402':>6}{'err':>6}{'err%':>7}{'rps':>8}"
+          f"{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}  statuses")
+    for name, o in res["ops"].items():
+        cols = [o[k] if o[k] is not None else "-" for k in ("p50_ms", "p95_ms", "p99_ms", "max_ms")]
+        print(f"{name:<9}{o['requests']:>7}{o['ok']:>7}{o['rejected']:>6}{o['errors']:>6}"
+              f"{o['error_rate'] * 100:>6.1f}%{o['rps']:>8}" + "".join(f"{c:>8}" for c in cols)
+              + f"  {o['statuses']}")
+    print("\ncredits")
+    for u in res["users"]:
+        flag = "OK" if u["consistent"] else "MISMATCH"
+        print(f"  {u['email']}: {u['credits_before']} -> {u['credits_after']} (debited {u['debited']}), "
+              f"commits ok {u['commits_ok']}, new posts {u['new_posts']}  {flag}"
+              + (f"  duplicate preview ids {u['duplicate_preview_ids']}" if u["duplicate_preview_ids"] else "")
+              + f"  sync jobs {u['sync_jobs']}")
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--url", help="base URL server που τρέχει ήδη (default: in-process)")
+    p.add_argument("-c", "--concurrency", type=int, default=8)
+    p.add_argument("--duration", type=float, default=20.0, help="sec")
+    p.add_argument("-n", "--requests", type=int, default=0, help="όριο συνολικών ops (0 = μόνο duration)")
+    p.add_argument("--mix", default="preview=4,commit=3,list=2,sync=1")
+    p.add_argument("--users", type=int, default=2, help="λογαριασμοί (οι clients μοιράζονται round-robin)")
+    p.add_argument("--credits", type=int, default=None, help="αρχικά credits ανά χρήστη (in-process, default 1000)")
+    p.add_argument("--template-id", type=int, default=None, help="pe_templates id για template render")
+    p.add_argument("--woo-url", help="WooCommerce upstream (default: το mock router του ίδιου server)")
+    p.add_argument("--woo-products", type=int, default=200, help="μέγεθος του mock καταλόγου (in-process)")
+    p.add_argument("--timeout", type=float, default=60.0)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--json", dest="json_out")
+    a = p.parse_args()
+    if a.url and a.credits is not None:
+        print("--credits αγνοείται με --url: οι χρήστες γράφονται με /register (default credits)")
+    if a.credits is None:
+        a.credits = 1000
+
+    server = None
+    with tempfile.TemporaryDirectory(prefix="loadtest_") as workdir:
+        cwd = os.getcwd()
+        try:
+            if a.url:
+                base = a.url.rstrip("/")
+            else:
+                base, server = start_server(workdir, a.woo_products)
+            res = asyncio.run(run(a, base))
+        finally:
+            if server is not None:
+                server.should_exit = True
+                time.sleep(0.5)
+            os.chdir(cwd)
+
+    report(res)
+    if a.json_out:
+        with open(a.json_out, "w", encoding="utf-8") as fh:
+            json.dump(res, fh, indent=2, ensure_ascii=False)
+    sys.exit(0 if res["credits_consistent"] else 1)
+
+
+if __name__ == "__main__":
+    main()
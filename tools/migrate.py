@@ -0,0 +1,66 @@
+"""
+Schema της database.db (DATABASE_URL) και του engine.db (ENGINE_DATABASE_URL), σε ένα βήμα
+πριν ξεκινήσουν server και workers. Κανένα από τα δύο δεν τρέχει DDL στο import/startup·
+ελέγχουν μόνο ότι το schema είναι ενημερωμένο (engine_database.require_schema).
+
+    python tools/migrate.py
+    DATABASE_URL=postgresql+psycopg://... python tools/migrate.py
+
+- βάση με alembic_version: alembic upgrade head
+- άδεια βάση: create_all από τα models + alembic stamp head. Η αλυσίδα των revisions δεν
+  ξαναπαίζεται από το μηδέν: παλιά revisions προσθέτουν το users.sync_url δύο φορές και μένουν
+  όπως είναι (έχουν ήδη τρέξει σε υπάρχουσες βάσεις)
+- πίνακες χωρίς alembic_version: σταματά· θέλει `alembic stamp <revision>` με το σωστό revision
+- engine.db: production_engine.init_db.init_engine_db()
+"""
+import argparse
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from sqlalchemy import create_engine, inspect  # noqa: E402
+
+
+def _alembic_config(url: str) -> Config:
+    cfg = Config(os.path.join(ROOT, "alembic.ini"))
+    cfg.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    cfg.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    return cfg
+
+
+def migrate_app_db(url: str) -> str:
+    """Επιστρέφει "created" (νέα βάση) ή "upgraded"."""
+    engine = create_engine(url)
+    try:
+        tables = set(inspect(engine).get_table_names())
+        if tables and "alembic_version" not in tables:
+            raise SystemExit(f"{engine.url!r}: tables without alembic_version; run `alembic stamp <revision>` first")
+        cfg = _alembic_config(url)
+        if not tables:
+            from database import Base
+            import models.user, models.product, models.post, models.credit_transaction  # noqa: E401,F401
+            Base.metadata.create_all(engine)
+            command.stamp(cfg, "head")
+            return "created"
+        command.upgrade(cfg, "head")
+        return "upgraded"
+    finally:
+        engine.dispose()
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    from database import DATABASE_URL
+
+    print(f"database.db: {migrate_app_db(DATABASE_URL)}")
+    from production_engine.init_db import init_engine_db
+    init_engine_db()
+    print("engine.db: ok")
+
+
+if __name__ == "__main__":
+    main()
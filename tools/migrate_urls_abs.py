@@ -1,30 +1,55 @@
-import json, sys, sqlite3, argparse
-p=argparse.ArgumentParser()
-p.add_argument("--db", default="production_engine/engine.db")
-p.add_argument("--base", required=True, help="π.χ. http://127.0.0.1:8000")
-p.add_argument("--dry-run", action="store_true")
-a=p.parse_args()
-
-def to_abs(u, base):
-    u=str(u or "")
-    if u.startswith("http://") or u.startswith("https://"): return u
-    if u.startswith("/"): return base.rstrip("/") + u
-    return base.rstrip("/") + "/" + u
-
-con=sqlite3.connect(a.db)
-cur=con.cursor()
-rows=list(cur.execute("SELECT id, urls_json FROM committed_posts ORDER BY id"))
-changed=0
-for _id, uj in rows:
-    try:
-        arr=json.loads(uj or "[]")
-    except Exception:
-        arr=[]
-    arr2=[to_abs(u, a.base) for u in arr]
-    if arr2!=arr:
-        changed+=1
-        if not a.dry_run:
-            cur.execute("UPDATE committed_posts SET urls_json=? WHERE id=?", (json.dumps(arr2), _id))
-if not a.dry_run:
-    con.commit()
-print(f"rows={len(rows)} changed={changed} dry_run={a.dry_run}")
+"""
+Data migration: committed_posts.urls_json -> absolute (canonical) URLs.
+
+Ίδιος κανόνας με το /previews/commit (production_engine.public_urls). Το --base είναι by default
+το PUBLIC_BASE_URL· ποτέ το Host ενός request.
+Τρέχει με το production_engine.data_migrations: chunks με keyset, executemany ανά chunk,
+checkpoint στο pe_data_migrations (μετά από διακοπή συνεχίζει από εκεί), throttling.
+Όσα URLs είναι ήδη absolute δεν αγγίζονται.
+
+    python tools/migrate_urls_abs.py [--base https://app.example.com] [--batch-size 1000]
+        [--sleep 0.05] [--max-batch-ms 200] [--dry-run] [--restart]
+    ENGINE_DATABASE_URL=postgresql+psycopg://... python tools/migrate_urls_abs.py --base ...
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from production_engine.data_migrations import DataMigration, add_cli_args, run_from_args  # noqa: E402
+from production_engine.engine_database import committed_posts_table  # noqa: E402
+from production_engine.public_urls import PUBLIC_BASE_URL, stored_url  # noqa: E402
+
+
+class AbsoluteUrlsMigration(DataMigration):
+    name = "committed_posts_urls_abs"
+    table = committed_posts_table
+    columns = ("urls_json",)
+
+    def __init__(self, base: str):
+        self.base = base.rstrip("/")
+
+    def transform(self, row):
+        try:
+            arr = json.loads(row.urls_json or "[]")
+        except ValueError:
+            return None  # χαλασμένο json: το αφήνουμε όπως είναι
+        arr2 = [stored_url(str(u or ""), self.base) for u in arr]
+        return {"urls_json": json.dumps(arr2)} if arr2 != arr else None
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--base", default=PUBLIC_BASE_URL or None,
+                   help="π.χ. https://app.example.com (default: PUBLIC_BASE_URL)")
+    add_cli_args(p)
+    args = p.parse_args()
+    if not args.base:
+        p.error("--base is required when PUBLIC_BASE_URL is not set")
+    run_from_args(AbsoluteUrlsMigration(args.base), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,62 @@
 # video_generator.py
 
-from moviepy.editor import *
-from gtts import gTTS
-import requests
-from BytesIO
 import os
+from io import BytesIO
 
-def generate_post_video(image_url, caption, output_path='static/post_video.mp4'):
-    # Κατέβασε εικόνα
-    response = requests.get(image_url)
-    image = ImageClip(BytesIO(response.content)).set_duration(8).resize(height=720)
+import requests
+from PIL import Image, ImageDraw
+
+from production_engine.services import tts
+from production_engine.services.greek_text_renderer import load_font, render_text_block
+from production_engine.services.video_renderer import (
+    cached_video, encode_still, fit_height, publish_copy, video_cache_key,
+)
 
-    # Δημιούργησε φωνή με gTTS
-    tts = gTTS(caption, lang='el')
-    os.makedirs("static", exist_ok=True)
-    audio_path = "static/voice.mp3"
-    tts.save(audio_path)
-    audio = AudioFileClip(audio_path)
+VIDEO_SECONDS = 8
+VOICE_LANG = 'el'
+VOICE = os.getenv("POST_VIDEO_VOICE") or None  # backend-specific (gTTS: tld)
+POST_VIDEO_DIR = os.path.join("generated", "videos")  # content-addressed: <hash>.mp4
 
-    # Δημιούργησε κείμενο (πάνω στην εικόνα)
-    txt_clip = TextClip(caption, fontsize=32, color='white', bg_color='black', size=image.size, method='caption')
-    txt_clip = txt_clip.set_duration(8).set_position(('center', 'bottom')).margin(bottom=20)
 
-    # Συνδύασε
-    final = CompositeVideoClip([image, txt_clip]).set_audio(audio)
+def _caption_frame(image: Image.Image, caption: str) -> Image.Image:
+    # Κείμενο σε μαύρη λωρίδα στο κάτω μέρος της εικόνας
+    frame = image.convert("RGB")
+    draw = ImageDraw.Draw(frame)
+    font = load_font(32)
+    pad = 20
+    probe = Image.new("RGB", (1, 1))
+    text_h = render_text_block(ImageDraw.Draw(probe), (0, 0), caption, font,
+                               max_width=frame.width - 2 * pad, stroke_width=0)
+    top = max(0, frame.height - text_h - 2 * pad)
+    draw.rectangle((0, top, frame.width, frame.height), fill=(0, 0, 0))
+    render_text_block(draw, (pad, top + pad), caption, font, fill=(255, 255, 255),
+                      max_width=frame.width - 2 * pad, align="center", stroke_width=0)
+    return frame
+
+
+def _render(image_url: str, caption: str, path: str) -> None:
+    # Κατέβασε εικόνα
+    response = requests.get(image_url, timeout=20)
+    response.raise_for_status()
+    with Image.open(BytesIO(response.content)) as im:
+        frame = _caption_frame(fit_height(im, 720), caption)
+
+    # Φωνή από το TTS cache (ίδιο caption -> ίδιο αρχείο, χωρίς νέα σύνθεση)· pinned όσο τρέχει το ffmpeg
+    with tts.pinned_caption_audio(caption, VOICE_LANG, VOICE) as audio_path:
+        # Ένα frame + ήχος -> ffmpeg (loop για όλη τη διάρκεια)
+        encode_still(frame, path, duration=VIDEO_SECONDS, audio_path=audio_path)
 
-    # Αποθήκευση βίντεο
-    final.write_videofile(output_path, fps=24, codec='libx264', audio_codec='aac')
 
-    return output_path
+def generate_post_video(image_url, caption, output_path=None):
+    """
+    Βίντεο με την εικόνα, το caption και φωνή. Το αρχείο λέγεται με το hash των inputs
+    (generated/videos/<hash>.mp4), οπότε ίδιο αίτημα επιστρέφει αμέσως το έτοιμο βίντεο.
+    Με output_path γίνεται και atomic αντίγραφο εκεί.
+    """
+    key = video_cache_key("post_video", template="caption_bar_h720", image_url=image_url,
+                          caption=caption, voice=f"{tts.get_backend().name}:{VOICE_LANG}:{VOICE}",
+                          duration=VIDEO_SECONDS)
+    path, _ = cached_video(key, lambda p: _render(image_url, caption, p), cache_dir=POST_VIDEO_DIR)
+    if output_path:
+        return publish_copy(path, output_path)
+    return path
@@ -1,28 +1,24 @@
 # backend/woocommerce_sync.py
 
-import requests
-from models.product import Product
+from services.product_sync import ProductUpserter
+from services.woocommerce_sync import iter_product_pages, make_session, map_woo_product
 
 def fetch_and_store_products_from_woocommerce(db, woocommerce_url, consumer_key, consumer_secret, owner_id):
-    url = f"{woocommerce_url}/wp-json/wc/v3/products"
+    """Όλες οι σελίδες του καταλόγου, γραμμένες σελίδα-σελίδα. Επιστρέφει summary του sync."""
+    session = make_session()
+    session.auth = (consumer_key, consumer_secret)
+    upserter = ProductUpserter(db, owner_id, key="external_id")
     try:
-        response = requests.get(url, auth=(consumer_key, consumer_secret))
-        response.raise_for_status()
+        for _, products in iter_product_pages(woocommerce_url, None, None, session=session):
+            upserter.apply(
+                {**map_woo_product(item), "name": item.get("name") or "Χωρίς Όνομα"}
+                for item in products
+            )
+            db.commit()
     except Exception as e:
+        db.rollback()
         raise Exception(f"Σφάλμα κατά το fetch από WooCommerce: {e}")
+    finally:
+        session.close()
 
-    products_data = response.json()
-    product_objects = []
-
-    for item in products_data:
-        product = Product(
-            name=item.get("name", "Χωρίς Όνομα"),
-            description=item.get("description", ""),
-            image_url=item.get("images", [{}])[0].get("src", ""),
-            owner_id=owner_id
-        )
-        db.add(product)
-        product_objects.append(product)
-
-    db.commit()
-    return product_objects
+    return upserter.summary()